@@ -3,6 +3,8 @@ import { generateTextSummary, downloadTextFile } from '../utils/export';
 import './FileDetailView.css';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5001';
+// Seconds of source audio around a detection opened by its "context" link
+const CONTEXT_S = 10;
 
 const FileDetailView = ({ file, report }) => {
   // State for collapsed/expanded detection types
@@ -80,10 +82,21 @@ const FileDetailView = ({ file, report }) => {
   // Get clip URL for a detection
   const getClipUrl = (detection) => {
     if (!file || detection.id === undefined || detection.id === null) return null;
-    const clipFilename = `${detection.type.toLowerCase()}-${detection.id}.wav`;
+    // Clips past the per-type cap are not saved
+    if (detection.clip === null) return null;
+    const clipFilename = detection.clip || `${detection.type.toLowerCase()}-${detection.id}.wav`;
     return `${API_BASE_URL}/api/files/${file.id}/clips/${clipFilename}`;
   };
 
+  // URL of the source audio around a detection; the server answers Range requests,
+  // so the browser player can scrub it without downloading the whole file
+  const getContextUrl = (detection) => {
+    if (!file || detection.start === undefined || detection.start === null) return null;
+    const end = detection.end !== null && detection.end !== undefined ? detection.end : detection.start;
+    const from = Math.max(0, detection.start - CONTEXT_S);
+    return `${API_BASE_URL}/api/files/${file.id}/audio?start=${from}&end=${end + CONTEXT_S}`;
+  };
+
   // Handle play/pause for audio clip
   const handlePlayClip = (detection, event) => {
     event.stopPropagation(); // Prevent toggling the detection group
@@ -419,6 +432,17 @@ const FileDetailView = ({ file, report }) => {
                                         <> - {detection.end_mmss}</>
                                       )}
                                     </span>
+                                    {getContextUrl(detection) && (
+                                      <a
+                                        className="file-detail-context-link"
+                                        href={getContextUrl(detection)}
+                                        target="_blank"
+                                        rel="noopener noreferrer"
+                                        title="Open the source audio around this detection"
+                                      >
+                                        context
+                                      </a>
+                                    )}
                                   </li>
                                 );
                               })}
@@ -186,7 +186,12 @@ const ProcessFiles = ({ onJobQueued }) => {
         clipPad
       );
 
-      setSuccess(`Successfully queued ${result.queued.length} file(s) for processing`);
+      if (result.queued) {
+        setSuccess(`Successfully queued ${result.queued.length} file(s) for processing`);
+      } else {
+        // Large submissions are queued in the background under a batch id
+        setSuccess(`Accepted ${result.accepted} file(s) for processing (batch ${result.batch_id})`);
+      }
       
       if (result.errors && result.errors.length > 0) {
         console.warn('Some files had errors:', result.errors);
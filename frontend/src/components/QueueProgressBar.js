@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getQueueStatus } from '../services/api';
+import { getQueueStatus, subscribeQueueEvents } from '../services/api';
 import './QueueProgressBar.css';
 
 const SESSION_STORAGE_KEY = 'auqa_queue_session_start';
@@ -43,10 +43,40 @@ const QueueProgressBar = () => {
       }
     };
 
-    fetchQueueStatus();
-    // Poll every 2 seconds
-    const interval = setInterval(fetchQueueStatus, 2000);
+    // Progress is pushed by the server; poll where EventSource is missing or the
+    // server has no stream to spare
+    let interval = null;
+    const startPolling = () => {
+      if (interval !== null) return;
+      fetchQueueStatus();
+      // Poll every 2 seconds
+      interval = setInterval(fetchQueueStatus, 2000);
+    };
+
+    if (typeof EventSource !== 'undefined') {
+      const unsubscribe = subscribeQueueEvents(
+        sessionStartTime,
+        (status) => {
+          setQueueStatus(status);
+          setLoading(false);
+        },
+        (error, closed) => {
+          // EventSource reconnects by itself and gets a fresh snapshot, unless it was turned away
+          console.error('Queue event stream error:', error);
+          if (closed) {
+            startPolling();
+          } else {
+            setLoading(false);
+          }
+        }
+      );
+      return () => {
+        unsubscribe();
+        if (interval !== null) clearInterval(interval);
+      };
+    }
 
+    startPolling();
     return () => clearInterval(interval);
   }, [sessionStartTime]);
 
@@ -58,7 +88,7 @@ const QueueProgressBar = () => {
     );
   }
 
-  const { total, completed, inProgress, queued } = queueStatus;
+  const { total, completed, inProgress, queued, failed = 0 } = queueStatus;
   const progressPercentage = total > 0 ? (completed / total) * 100 : 0;
 
   const handleReset = () => {
@@ -105,6 +135,11 @@ const QueueProgressBar = () => {
             <span className="queue-status-item completed">
               Completed: {completed}
             </span>
+            {failed > 0 && (
+              <span className="queue-status-item failed">
+                Failed: {failed}
+              </span>
+            )}
           </div>
         </>
       ) : (
@@ -1,11 +1,23 @@
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5001/api';
 
+// Build "?a=1&b=2" from an object, skipping empty values
+const toQuery = (params = {}) => {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== '') query.append(key, value);
+  });
+  const str = query.toString();
+  return str ? `?${str}` : '';
+};
+
 /**
- * Fetch all processed files (detection results)
+ * Fetch processed files (detection results). params may hold page, page_size,
+ * sort, order, name, date_from, date_to, min_issues, max_issues and fields.
+ * 'no-cache' revalidates with the server's ETag, so unchanged lists are not re-downloaded.
  */
-export const getProcessedFiles = async () => {
+export const getProcessedFiles = async (params = {}) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/files`);
+    const response = await fetch(`${API_BASE_URL}/files${toQuery(params)}`, { cache: 'no-cache' });
     if (!response.ok) {
       throw new Error('Failed to fetch processed files');
     }
@@ -17,11 +29,12 @@ export const getProcessedFiles = async () => {
 };
 
 /**
- * Fetch detection report for a specific file
+ * Fetch detection report for a specific file. params may hold type, start, end,
+ * param.<name>, offset, limit and fields to filter and page in_file_detections.
  */
-export const getDetectionReport = async (fileId) => {
+export const getDetectionReport = async (fileId, params = {}) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/files/${fileId}/report`);
+    const response = await fetch(`${API_BASE_URL}/files/${fileId}/report${toQuery(params)}`, { cache: 'no-cache' });
     if (!response.ok) {
       throw new Error('Failed to fetch detection report');
     }
@@ -50,6 +63,53 @@ export const openCli = async () => {
   }
 };
 
+/**
+ * Subscribe to queue progress pushed by the server (Server-Sent Events).
+ * onStatus receives the same {total, completed, inProgress, queued, failed} shape
+ * as getQueueStatus whenever a job changes. Returns a function that unsubscribes.
+ * @param {number} sinceTimestamp - Optional Unix timestamp (seconds) to only count jobs created after this time
+ */
+export const subscribeQueueEvents = (sinceTimestamp, onStatus, onError) => {
+  let url = `${API_BASE_URL}/queue/events`;
+  if (sinceTimestamp) {
+    url += `?since=${sinceTimestamp}`;
+  }
+  const source = new EventSource(url);
+  // Runs per state, and the runs:version they are up to date with
+  let counts = { queued: 0, running: 0, completed: 0, failed: 0 };
+  let version = 0;
+
+  const summarize = () => ({
+    total: counts.queued + counts.running + counts.completed + counts.failed,
+    completed: counts.completed,
+    inProgress: counts.running,
+    queued: counts.queued,
+    failed: counts.failed,
+  });
+
+  source.onmessage = (message) => {
+    const event = JSON.parse(message.data);
+    if (event.event === 'snapshot') {
+      // Sent on every (re)connect
+      counts = { ...counts, ...event.counts };
+      version = event.version;
+    } else if (event.version > version) {
+      // A run changed state after the snapshot was taken
+      if (event.prev_state) counts[event.prev_state] -= 1;
+      counts[event.state] += 1;
+    } else {
+      return;
+    }
+    onStatus(summarize());
+  };
+  source.onerror = (error) => {
+    // CLOSED means the server turned the stream away (e.g. too many open); no retry follows
+    if (onError) onError(error, source.readyState === EventSource.CLOSED);
+  };
+
+  return () => source.close();
+};
+
 /**
  * Get queue status
  * @param {number} sinceTimestamp - Optional Unix timestamp (seconds) to only count jobs created after this time
@@ -259,3 +319,18 @@ export const queueJob = async (fileNames, detectionParams, clipPad = 0.1) => {
   }
 };
 
+/**
+ * Get progress of a submission batch returned by queueJob
+ */
+export const getBatchStatus = async (batchId) => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/queue/batch/${batchId}`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch batch status');
+    }
+    return await response.json();
+  } catch (error) {
+    console.error('Error fetching batch status:', error);
+    throw error;
+  }
+};
@@ -33,7 +33,7 @@ Start-Sleep -Seconds 1
 # Start RQ Workers in new PowerShell windows sourcing venv
 for ($i = 1; $i -le $workers; $i++) {
     $title = "AUQA-WORKER-$i"
-    $cmd = "[console]::Title = '$title'; cd '$jobQueueDir'; rq worker --worker-class rq.SimpleWorker"
+    $cmd = "[console]::Title = '$title'; cd '$jobQueueDir'; rq worker fast interactive batch backfill default --worker-class job_queue.warm_worker.WarmWorker"
     $pw = Start-Process powershell.exe -ArgumentList "-NoExit", "-Command", $cmd -WindowStyle Normal -PassThru
     Add-Content $pidFile $pw.Id
 }
@@ -72,9 +72,9 @@ fi
 for i in $(seq 1 $WORKERS); do
     echo "Starting RQ Worker $i..."
     if [[ "$MACHINE" == "Mac" ]]; then
-        osascript -e "tell application \"Terminal\" to activate" -e "tell application \"Terminal\" to do script \"cd '$JOB_QUEUE_DIR' && PYTHONPATH=../../src rq worker --worker-class rq.SimpleWorker\"" > /dev/null 2>&1 &
+        osascript -e "tell application \"Terminal\" to activate" -e "tell application \"Terminal\" to do script \"cd '$JOB_QUEUE_DIR' && PYTHONPATH=../../src rq worker fast interactive batch backfill default --worker-class job_queue.warm_worker.WarmWorker\"" > /dev/null 2>&1 &
     elif [[ "$MACHINE" == "Linux" ]]; then
-        gnome-terminal --title="AUQA-WORKER-$i" -- bash -c "cd $JOB_QUEUE_DIR && PYTHONPATH=../../src rq worker --worker-class rq.SimpleWorker; exec bash" 2>/dev/null &
+        gnome-terminal --title="AUQA-WORKER-$i" -- bash -c "cd $JOB_QUEUE_DIR && PYTHONPATH=../../src rq worker fast interactive batch backfill default --worker-class job_queue.warm_worker.WarmWorker; exec bash" 2>/dev/null &
     fi
     sleep 1
 done
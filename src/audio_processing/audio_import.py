@@ -1,16 +1,33 @@
 import os
 import librosa
+import soundfile as sf
+import soxr
 from pydub import AudioSegment
 import numpy as np
 
 # default location for audio files is in "audio-qa-app/audio_files"
 AUDIO_DIR = os.path.join("..", "audio_files")
 
+# Analysis jobs load at this rate ("native" keeps each file's own rate) and reach any
+# other rate a detector needs with RES_TYPE, one of librosa's res_type names
+ANALYSIS_SR = os.getenv('ANALYSIS_SR', 'native')
+RES_TYPE = os.getenv('RES_TYPE', 'soxr_hq')
+
+# soxr quality presets for the soxr res_types, used when resampling a stream
+SOXR_QUALITIES = {"soxr_vhq": "VHQ", "soxr_hq": "HQ", "soxr_mq": "MQ", "soxr_lq": "LQ", "soxr_qq": "QQ"}
+
 class AudioLoader:
-    def __init__(self, directory=AUDIO_DIR, sr=22050, mono=True):
+    def __init__(self, directory=AUDIO_DIR, sr=22050, mono=True, res_type="soxr_hq"):
         self.directory = directory
         self.sr = sr
         self.mono = mono
+        self.res_type = res_type
+
+    @classmethod
+    def for_analysis(cls, directory=AUDIO_DIR) -> "AudioLoader":
+        """Loader configured for detection jobs from ANALYSIS_SR and RES_TYPE."""
+        sr = None if ANALYSIS_SR == 'native' else int(ANALYSIS_SR)
+        return cls(directory=directory, sr=sr, res_type=RES_TYPE)
 
     def is_valid_audio_file(self, filename: str) -> bool:
         """
@@ -45,6 +62,22 @@ class AudioLoader:
             audio_data[filename] = self.load_audio_file(filename, type=type)
         return audio_data
 
+    def probe_duration(self, filename: str) -> float | None:
+        """
+        Returns the duration of an audio file in seconds from its header, without decoding it.
+        """
+        filepath = os.path.join(self.directory, filename)
+        try:
+            info = sf.info(filepath)
+            return info.frames / info.samplerate
+        except Exception:
+            pass
+        try:
+            return librosa.get_duration(path=filepath)
+        except Exception as e:
+            print(f"Failed to probe {filename}: {e}")
+            return None
+
     def load_audio_file(self, filename: str, type: str = "numpy") -> dict:
         """
         Loads a single audio file using librosa.
@@ -53,7 +86,7 @@ class AudioLoader:
         print("Loading:", filepath)
         if self.is_valid_audio_file(filename):
             if type == "numpy":
-                data, samplerate = librosa.load(filepath, sr=self.sr, mono=False)
+                data, samplerate = librosa.load(filepath, sr=self.sr, mono=False, res_type=self.res_type)
                 channels = 'mono'
                 if data.ndim >= 2:
                     if data.ndim == 2:
@@ -76,6 +109,98 @@ class AudioLoader:
         else:
             print(f"Failed to load {filename}")
 
+    def resample(self, audio: dict, target_sr: int) -> dict:
+        """
+        Returns a copy of a loaded audio dict resampled to target_sr with this loader's res_type.
+        """
+        if audio['samplerate'] == target_sr:
+            return audio
+        resampled = dict(audio)
+        resampled['data'] = librosa.resample(np.asarray(audio['data']), orig_sr=audio['samplerate'],
+                                             target_sr=target_sr, res_type=self.res_type)
+        resampled['samplerate'] = target_sr
+        return resampled
+
+    def resample_stream(self, orig_sr: int, target_sr: int) -> soxr.ResampleStream:
+        """
+        Streaming resampler for mono float32 blocks. soxr res_types keep their quality
+        preset; other res_types have no streaming form and fall back to soxr "HQ".
+        """
+        return soxr.ResampleStream(orig_sr, target_sr, 1, dtype='float32',
+                                   quality=SOXR_QUALITIES.get(self.res_type, "HQ"))
+
+    def stream_audio_file(self, filename: str, block_s: float = 30.0, overlap_s: float = 0.0):
+        """
+        Decodes a single audio file block by block instead of loading it whole.
+
+        Yields dicts with "data" (mono float32 samples at self.sr, or the native rate if
+        self.sr is None), "offset" (index of data[0] in the whole decoded signal) and
+        "samplerate" and "channels" (described as in load_audio_file). Consecutive blocks cover the signal with no gaps; with overlap_s > 0
+        each block after the first also starts with the last overlap_s seconds of the
+        previous block, and "offset" accounts for that. Concatenating the non-overlapping
+        parts gives the same samples as load_audio_file, up to resampler precision.
+        """
+        filepath = os.path.join(self.directory, filename)
+        print("Streaming:", filepath)
+        if not self.is_valid_audio_file(filename):
+            print(f"Failed to load {filename}")
+            return
+
+        try:
+            info = sf.info(filepath)
+        except Exception:
+            info = None
+
+        if info is None:
+            # Formats libsndfile cannot read (e.g. m4a) are decoded whole and sliced
+            audio = self.load_audio_file(filename)
+            blocks = [audio['data']]
+            native_sr = target_sr = audio['samplerate']
+            channels = audio['channels']
+        else:
+            native_sr = info.samplerate
+            # librosa returns every multi-channel file as a 2-D array, which load_audio_file reports as stereo
+            channels = 'mono' if info.channels == 1 else 'stereo'
+
+            target_sr = self.sr or native_sr
+            blocks = sf.blocks(filepath, blocksize=max(int(block_s * native_sr), 1), dtype='float32', always_2d=True)
+
+        resampler = None
+        if target_sr != native_sr:
+            resampler = self.resample_stream(native_sr, target_sr)
+
+        block_len = max(int(block_s * target_sr), 1)
+        overlap = int(overlap_s * target_sr)
+        history = np.zeros(0, dtype=np.float32)
+        pending = np.zeros(0, dtype=np.float32)
+        offset = 0
+
+        blocks = iter(blocks)
+        block = next(blocks, None)
+        while block is not None:
+            next_block = next(blocks, None)
+            if block.ndim == 2:
+                block = np.mean(block, axis=1) if block.shape[1] > 1 else block[:, 0]
+            block = np.asarray(block, dtype=np.float32)
+            if resampler is not None:
+                block = resampler.resample_chunk(block, last=next_block is None)
+            pending = np.concatenate((pending, block))
+
+            # Emit fixed-size blocks, and whatever is left at the end of the file
+            while len(pending) >= block_len or (next_block is None and len(pending) > 0):
+                new = pending[:block_len]
+                pending = pending[block_len:]
+                yield {
+                    "data": np.concatenate((history, new)),
+                    "offset": offset - len(history),
+                    "samplerate": target_sr,
+                    "channels": channels
+                }
+                offset += len(new)
+                if overlap > 0:
+                    history = np.concatenate((history, new))[-overlap:]
+            block = next_block
+
 # Example usage
 if __name__ == "__main__":
     audio_loader = AudioLoader()
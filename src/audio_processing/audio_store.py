@@ -0,0 +1,318 @@
+import os
+import json
+import hashlib
+import shutil
+import tempfile
+import numpy as np
+from collections import OrderedDict
+
+# DecodeCache's index files, one per decoded source, named by its cache key
+INDEX_SUFFIX = '.decoded.json'
+
+class AudioStore:
+    """
+    Content-addressed store of decoded audio on a shared volume.
+
+    Decoded sample arrays are written once as .npy files named by a hash of their
+    contents, so jobs only need to pass around a small reference dict and every
+    worker can memory-map the samples instead of unpickling a copy.
+
+    in_use, if given, returns the keys that must survive pruning (e.g. those active
+    runs still read), or None when that is unknown, which holds off pruning.
+    """
+    def __init__(self, directory: str, max_bytes: int = None, in_use=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.in_use = in_use
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npy")
+
+    @staticmethod
+    def key_for(data: np.ndarray, samplerate: int) -> str:
+        """Hash decoded samples plus their rate into a store key."""
+        data = np.ascontiguousarray(data)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(memoryview(data).cast('B'))
+        return AudioStore._finish_key(digest, data.dtype, data.shape, samplerate)
+
+    @staticmethod
+    def _finish_key(digest, dtype: np.dtype, shape: tuple, samplerate: int) -> str:
+        digest.update(f"{np.dtype(dtype).str}:{tuple(shape)}:{samplerate}".encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def derived_key(key: str, **params) -> str:
+        """Key for an array derived from a stored one (e.g. a resampled copy), known before computing it."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(key.encode('utf-8'))
+        for name, value in sorted(params.items()):
+            digest.update(f"|{name}={value}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def open_writer(self, samplerate: int, dtype=np.float32) -> "AudioStoreWriter":
+        """Start writing a decoded stream block by block (see AudioStoreWriter)."""
+        return AudioStoreWriter(self, samplerate, dtype)
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def touch(self, key: str):
+        """Mark an entry as just used, so prune drops it last."""
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def put(self, audio: dict, key: str = None) -> dict:
+        """
+        Store the samples of a loaded audio dict (as returned by AudioLoader), under
+        their content key unless a key is given. Returns a reference dict with the
+        same metadata keys but no 'data'.
+        """
+        if key is None:
+            key = self.key_for(audio['data'], audio['samplerate'])
+        path = self._path(key)
+        if not os.path.exists(path):
+            # Write to a temp file and rename so readers never see a partial array
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.npy.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, np.ascontiguousarray(audio['data']))
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.prune(keep=key)
+        return self._ref(audio, key)
+
+    @staticmethod
+    def _ref(audio: dict, key: str) -> dict:
+        ref = {k: v for k, v in audio.items() if k != 'data'}
+        ref['key'] = key
+        return ref
+
+    def get(self, ref: dict) -> dict:
+        """
+        Map the samples for a reference back into a loaded audio dict.
+        The array is a copy-on-write memory map, so nothing is read until used.
+        """
+        path = self._path(ref['key'])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Decoded audio {ref['key']} is not in the store at {self.directory}")
+        audio = {k: v for k, v in ref.items() if k != 'key'}
+        audio['data'] = np.load(path, mmap_mode='c')
+        self.touch(ref['key'])
+        return audio
+
+    def prune(self, keep: str = None):
+        """
+        Delete least recently used entries until the store fits in max_bytes, with the
+        index files that point at them. keep and the in_use keys are never deleted.
+        """
+        if self.max_bytes is None:
+            return
+        entries = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.npy') or filename == f"{keep}.npy":
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, filename[:-len('.npy')]))
+
+        total = sum(size for _, size, _ in entries)
+        if keep is not None and self.contains(keep):
+            total += os.path.getsize(self._path(keep))
+        if total <= self.max_bytes:
+            return
+
+        in_use = self.in_use() if self.in_use is not None else set()
+        if in_use is None:
+            print("[WARN] Audio store over budget, but the entries in use are unknown; not pruning")
+            return
+        removed = set()
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key in in_use:
+                continue
+            try:
+                os.remove(self._path(key))
+                total -= size
+                removed.add(key)
+            except FileNotFoundError:
+                continue
+        self._prune_indexes(removed)
+
+    def _prune_indexes(self, removed: set):
+        """Delete index files that point at removed (or otherwise missing) entries."""
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(INDEX_SUFFIX):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                with open(path, 'r') as f:
+                    key = json.load(f)['key']
+            except (FileNotFoundError, ValueError, KeyError):
+                continue
+            if key in removed or not self.contains(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+class AudioStoreWriter:
+    """
+    Writes a decoded mono stream into an AudioStore without holding it in memory.
+
+    Blocks are appended to a temporary raw file and hashed as they arrive; close()
+    turns that into the content-addressed .npy entry and returns its reference.
+    """
+    def __init__(self, store: AudioStore, samplerate: int, dtype=np.float32):
+        self.store = store
+        self.samplerate = samplerate
+        self.dtype = np.dtype(dtype)
+        self.num_samples = 0
+        self.digest = hashlib.blake2b(digest_size=16)
+        fd, self.tmp_path = tempfile.mkstemp(dir=store.directory, suffix='.raw.tmp')
+        self.file = os.fdopen(fd, 'wb')
+
+    def write(self, block: np.ndarray):
+        block = np.ascontiguousarray(block, dtype=self.dtype)
+        self.digest.update(memoryview(block).cast('B'))
+        self.file.write(memoryview(block).cast('B'))
+        self.num_samples += len(block)
+
+    def close(self, metadata: dict, copy_block: int = 1 << 22) -> dict:
+        """Publish the stream under its content key. metadata holds the non-'data' fields of the audio dict."""
+        self.file.close()
+        try:
+            key = AudioStore._finish_key(self.digest, self.dtype, (self.num_samples,), self.samplerate)
+            path = self.store._path(key)
+            if not os.path.exists(path):
+                fd, npy_tmp = tempfile.mkstemp(dir=self.store.directory, suffix='.npy.tmp')
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        header = np.lib.format.header_data_from_array_1_0(np.zeros(0, self.dtype))
+                        header['shape'] = (self.num_samples,)
+                        np.lib.format.write_array_header_1_0(f, header)
+                        with open(self.tmp_path, 'rb') as raw:
+                            shutil.copyfileobj(raw, f, copy_block)
+                    os.replace(npy_tmp, path)
+                except Exception:
+                    if os.path.exists(npy_tmp):
+                        os.remove(npy_tmp)
+                    raise
+                self.store.prune(keep=key)
+        finally:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+        return AudioStore._ref(metadata, key)
+
+class DecodeCache:
+    """
+    LRU cache of decoded audio keyed by source file and decode settings.
+
+    Entries are keyed by (path, size, mtime, sr, mono, res_type), so editing or
+    replacing a file invalidates them. Decoded arrays live in the AudioStore (which
+    enforces the disk budget) with a small index file per source; the most recently
+    used arrays are also kept in memory up to max_memory_bytes.
+    """
+    def __init__(self, store: AudioStore, max_memory_bytes: int = 0):
+        self.store = store
+        self.max_memory_bytes = max_memory_bytes
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, loader, filename: str) -> str | None:
+        """Cache key for decoding filename with an AudioLoader's settings, or None if the file is missing."""
+        filepath = os.path.abspath(os.path.join(loader.directory, filename))
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        return AudioStore.derived_key(filepath, size=stat.st_size, mtime=stat.st_mtime_ns,
+                                      sr=loader.sr, mono=loader.mono, res_type=loader.res_type)
+
+    def _index_path(self, key: str) -> str:
+        return os.path.join(self.store.directory, f"{key}{INDEX_SUFFIX}")
+
+    def get(self, key: str) -> tuple[dict, dict] | None:
+        """Return (audio, store reference) for a cache key, or None on a miss."""
+        if key is None:
+            self.misses += 1
+            return None
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            # Keep the store's copy recent too, as other workers may prune it
+            self.store.touch(self.memory[key][1]['key'])
+            return self.memory[key]
+
+        index_path = self._index_path(key)
+        try:
+            with open(index_path, 'r') as f:
+                ref = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        if not self.store.contains(ref['key']):
+            # The samples were pruned from the store; drop the stale index entry
+            try:
+                os.remove(index_path)
+            except FileNotFoundError:
+                pass
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        audio = self.store.get(ref)
+        self._remember(key, audio, ref)
+        return audio, ref
+
+    def put(self, key: str, audio: dict) -> dict:
+        """Store decoded audio under a cache key and return its store reference."""
+        ref = self.store.put(audio)
+        self.add(key, ref, audio)
+        return ref
+
+    def add(self, key: str, ref: dict, audio: dict = None):
+        """Index audio that is already in the store under a cache key."""
+        if key is None:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.store.directory, suffix='.json.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(ref, f)
+        os.replace(tmp_path, self._index_path(key))
+        if audio is not None:
+            self._remember(key, audio, ref)
+
+    def load(self, loader, filename: str) -> tuple[dict, dict]:
+        """Return (audio, store reference) for filename, decoding it with loader only on a miss."""
+        key = self.key_for(loader, filename)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        audio = loader.load_audio_file(filename)
+        return audio, self.put(key, audio)
+
+    def _remember(self, key: str, audio: dict, ref: dict):
+        size = audio['data'].nbytes
+        if size > self.max_memory_bytes:
+            return
+        if key in self.memory:
+            self.memory_bytes -= self.memory.pop(key)[0]['data'].nbytes
+        self.memory[key] = (audio, ref)
+        self.memory_bytes += size
+        while self.memory_bytes > self.max_memory_bytes:
+            _, (evicted, _) = self.memory.popitem(last=False)
+            self.memory_bytes -= evicted['data'].nbytes
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self.memory), "memory_bytes": self.memory_bytes}
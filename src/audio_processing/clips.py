@@ -0,0 +1,215 @@
+import io
+import os
+import json
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+import librosa
+import numpy as np
+import soundfile as sf
+from .utils import merge_intervals
+
+# Clips of one run are packed into a single container file next to this index
+CLIP_INDEX = "index.json"
+
+# (extension, soundfile format, subtype) per clip format
+CLIP_FORMATS = {
+    "wav": ("wav", "WAV", "PCM_16"),
+    "flac": ("flac", "FLAC", "PCM_16"),
+    "opus": ("opus", "OGG", "OPUS"),
+}
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# Bytes of clips rendered from source files kept in memory as encoded WAV, per process
+CLIP_CACHE_MAX_BYTES = int(os.getenv('CLIP_CACHE_MAX_BYTES', 64 * 1024**2))
+
+def write_clips(data: np.ndarray, sr: int, ranges: dict, clips_dir: str, fmt: str = "wav") -> dict:
+    """
+    Write every clip of a run into one container file and index it.
+
+    ranges maps clip names (e.g. "cutout-3.wav") to (start, end) sample ranges in data.
+    Overlapping ranges are merged and each merged range is written once, in timeline
+    order; the index maps each clip name to its (offset, frames) in the container.
+    """
+    if fmt == "opus" and sr not in OPUS_RATES:
+        print(f"Opus does not support {sr} Hz; writing FLAC clips instead")
+        fmt = "flac"
+    extension, file_format, subtype = CLIP_FORMATS[fmt]
+    os.makedirs(clips_dir, exist_ok=True)
+    container = f"clips.{extension}"
+    index = {"file": container, "samplerate": sr, "clips": {}}
+
+    names = sorted(ranges, key=lambda name: ranges[name])
+    if names:
+        bounds = np.array([ranges[name] for name in names], dtype=np.int64).reshape(-1, 2)
+        bounds = np.clip(bounds, 0, len(data))
+        starts, ends = merge_intervals(bounds[:, 0], bounds[:, 1])
+
+        # Position of each merged range in the container, and the merged range holding each clip
+        offsets = np.concatenate(([0], np.cumsum(ends - starts)[:-1]))
+        groups = np.searchsorted(starts, bounds[:, 0], side='right') - 1
+        for name, (start, end), group in zip(names, bounds, groups):
+            index["clips"][name] = [int(offsets[group] + start - starts[group]), int(end - start)]
+
+        fd, tmp_path = tempfile.mkstemp(dir=clips_dir, suffix=f".{extension}.tmp")
+        os.close(fd)
+        try:
+            with sf.SoundFile(tmp_path, 'w', samplerate=sr, channels=1, format=file_format, subtype=subtype) as f:
+                for start, end in zip(starts, ends):
+                    f.write(np.asarray(data[start:end], dtype=np.float32))
+            os.replace(tmp_path, os.path.join(clips_dir, container))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    with open(os.path.join(clips_dir, CLIP_INDEX), 'w') as f:
+        json.dump(index, f)
+    return index
+
+def read_clip(clips_dir: str, name: str) -> tuple[np.ndarray, int] | None:
+    """Read one clip back out of a run's container, or None if the index has no such clip."""
+    index_path = os.path.join(clips_dir, CLIP_INDEX)
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, 'r') as f:
+        index = json.load(f)
+    if name not in index["clips"]:
+        return None
+    offset, frames = index["clips"][name]
+    with sf.SoundFile(os.path.join(clips_dir, index["file"])) as f:
+        f.seek(offset)
+        return f.read(frames, dtype='float32'), f.samplerate
+
+def encode_wav(data: np.ndarray, sr: int) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, data, sr, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+def render_clip(path: str, start_s: float, end_s: float, pad: float) -> tuple[np.ndarray, int]:
+    """
+    Cut [start_s - pad, end_s + pad) out of a source file as mono float32 at its own rate.
+    Only the clip's frames are read; formats libsndfile cannot seek are decoded up to the clip.
+    """
+    start_s = max(0.0, start_s - pad)
+    end_s = end_s + pad
+    try:
+        f = sf.SoundFile(path)
+    except sf.LibsndfileError:
+        data, sr = librosa.load(path, sr=None, mono=True, offset=start_s, duration=end_s - start_s)
+        return data, sr
+    with f:
+        sr = f.samplerate
+        start = min(int(start_s * sr), f.frames)
+        f.seek(start)
+        data = f.read(max(int(end_s * sr) - start, 0), dtype='float32', always_2d=True)
+    return data.mean(axis=1), sr
+
+class ClipCache:
+    """
+    LRU cache of encoded clips bounded by their total size in bytes. Clips larger than
+    the whole budget are never kept. Safe to share between request threads.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple) -> bytes | None:
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key: tuple, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= len(self.entries.pop(key))
+            self.entries[key] = data
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted)
+
+_clip_cache = ClipCache(CLIP_CACHE_MAX_BYTES)
+
+def render_clip_wav(path: str, mtime: float, start_s: float, end_s: float, pad: float) -> bytes:
+    """render_clip encoded as WAV. mtime is only part of the cache key, so a replaced source is rendered again."""
+    key = (path, mtime, start_s, end_s, pad)
+    wav = _clip_cache.get(key)
+    if wav is None:
+        wav = encode_wav(*render_clip(path, start_s, end_s, pad))
+        _clip_cache.put(key, wav)
+    return wav
+
+def wav_header(sr: int, channels: int, frames: int) -> bytes:
+    """Header of a 16-bit PCM WAV file holding frames frames."""
+    data_size = frames * channels * 2
+    return struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + data_size, b'WAVE', b'fmt ', 16, 1, channels,
+                       sr, sr * channels * 2, channels * 2, 16, b'data', data_size)
+
+class SourceWindow(io.RawIOBase):
+    """
+    Read-only, seekable view of [start_s, end_s) of a source file as a 16-bit WAV file.
+    Nothing is decoded up front: each read seeks the source to the frames that back the
+    requested bytes, so serving a byte range of a long file only reads that part of it.
+    Raises sf.LibsndfileError for formats libsndfile cannot open.
+    """
+    def __init__(self, path: str, start_s: float, end_s: float):
+        super().__init__()
+        self.source = sf.SoundFile(path)
+        self.samplerate = self.source.samplerate
+        self.channels = self.source.channels
+        self.start_frame = min(int(start_s * self.samplerate), self.source.frames)
+        self.frames = max(min(int(end_s * self.samplerate), self.source.frames) - self.start_frame, 0)
+        self.header = wav_header(self.samplerate, self.channels, self.frames)
+        self.frame_bytes = self.channels * 2
+        self.size = len(self.header) + self.frames * self.frame_bytes
+        self.pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: self.size}[whence]
+        self.pos = min(max(base + offset, 0), self.size)
+        return self.pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.size if size is None or size < 0 else min(self.pos + size, self.size)
+        chunks = []
+        if self.pos < len(self.header):
+            chunks.append(self.header[self.pos:min(end, len(self.header))])
+            self.pos = min(end, len(self.header))
+        if self.pos < end:
+            # Whole frames covering [pos, end) of the data chunk, trimmed to the bytes asked for
+            first = (self.pos - len(self.header)) // self.frame_bytes
+            last = -(-(end - len(self.header)) // self.frame_bytes)
+            if self.source.tell() != self.start_frame + first:
+                self.source.seek(self.start_frame + first)
+            data = self.source.read(last - first, dtype='int16', always_2d=True).tobytes()
+            skip = self.pos - len(self.header) - first * self.frame_bytes
+            chunks.append(data[skip:skip + end - self.pos])
+            self.pos = end
+        return b''.join(chunks)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.source.close()
+        super().close()
@@ -1,7 +1,12 @@
 import numpy as np
 import librosa
 from scipy.fftpack import fft
-from clipdetect import detect_clipping as clipdat
+from .features import FeatureCache, RunningCumulative
+from .utils import mask_to_runs, merge_intervals, filter_min_duration
+
+# Samples ClipDaT reads and converts at a time, so the memory-mapped audio of a
+# streamed or sharded run is scanned in blocks instead of loaded whole
+CLIP_BLOCK_SAMPLES = 1 << 20
 
 def thd_ratio(data : np.array):
     n = len(data)
@@ -21,52 +26,181 @@ def index_to_time(index: int, sr: int) -> float:
 # return list of (start_s, end_s) tuples for clipping regions where both are in seconds [ran by job queue]
 def detect_clipping(audio, sr) -> list[tuple[float, float]]:
     """
-    Detects clipping in an audio file.
-
-    Parameters:
-        filename (str): Path to the audio file.
-        clip_threshold (float): Amplitude threshold for clipping detection.
-        plot (bool): Whether to show waveform visualization.
+    Detects clipping in an audio signal with the ClipDaT algorithm (clipdetect's),
+    reading CLIP_BLOCK_SAMPLES at a time so a memory-mapped signal is never loaded whole.
 
     Returns:
-        dict: Summary of distortion analysis.
+        list: (start_s, end_s) of every clipped section.
+    """
+    return [(start / sr, end / sr) for start, end in _detect_clipping_blocks(audio, CLIP_BLOCK_SAMPLES)]
+
+def _detect_clipping_blocks(audio, block_len: int, threshold=0.995, max_below_threshold=3, min_consecutive_extremes=2,
+                            sustain_samples=32, flat_slope=0.0015, corner=0.004) -> list[tuple[int, int]]:
+    """
+    clipdetect.detect_clipping on a mono signal, reading block_len samples at a time. The
+    rail is a whole-file property (the peak and the highest flat shelf), so this makes
+    one pass for those and one per rail for the runs near it; memory grows with the
+    number of runs, not the signal. Returns the same (start, end) sample sections.
     """
+    n = len(audio)
+    blocks = range(0, n, block_len)
+    max_val = max(float(np.max(audio[a:a + block_len])) for a in blocks) if n else 0.0
+    min_val = min(float(np.min(audio[a:a + block_len])) for a in blocks) if n else 0.0
+    if max_val == min_val:
+        return []
+    peak = max(max_val, -min_val)
+    slope_tolerance = flat_slope * peak
+    shelves = _flat_shelves(audio, block_len, sustain_samples, slope_tolerance, 0.5 * peak)
+
+    starts, ends = [np.zeros(0, dtype=int)], [np.zeros(0, dtype=int)]
+    for sign, raw_rail in ((1.0, max_val), (-1.0, -min_val)):
+        if raw_rail <= 0:
+            continue
+        shelf = shelves[sign]
+        if shelf is not None and shelf < raw_rail:
+            rail, rail_floor = shelf, shelf - slope_tolerance
+        else:
+            rail, rail_floor = raw_rail, raw_rail
+        meets, at_rail = [], []
+        for a in blocks:
+            side = sign * np.asarray(audio[a:a + block_len], dtype=np.float64)
+            meets.append(mask_to_runs(side >= threshold * rail) + a)
+            at_rail.append(mask_to_runs(side >= rail_floor) + a)
+        meets = np.concatenate(meets)
+        at_rail = np.concatenate(at_rail)
+        # Runs split by a block edge touch and are joined again here
+        run_starts, run_ends = merge_intervals(meets[:, 0], meets[:, 1], gap=max_below_threshold)
+        rail_starts, rail_ends = merge_intervals(at_rail[:, 0], at_rail[:, 1])
+        # Samples at the rail also meet the threshold, so a long enough rail run lies
+        # inside one bridged run and the first such run is where clipping starts
+        rail_starts = rail_starts[rail_ends - rail_starts >= max(min_consecutive_extremes, 1)]
+        first = np.searchsorted(rail_starts, run_starts)
+        found = first < len(rail_starts)
+        found[found] = rail_starts[first[found]] < run_ends[found]
+        sign_starts = rail_starts[first[found]]
+        sign_ends = run_ends[found]
+        corners = np.maximum(_clip_corners(audio, sign_starts - 1), _clip_corners(audio, sign_ends - 2))
+        keep = corners >= corner * peak
+        starts.append(sign_starts[keep])
+        ends.append(sign_ends[keep])
 
-    # Normalize audio
-    detections, _ = clipdat(audio)
+    starts = np.concatenate(starts)
+    ends = np.concatenate(ends)
+    order = np.argsort(starts, kind='stable')
+    starts, ends = merge_intervals(starts[order], ends[order])
+    return list(zip(starts.tolist(), ends.tolist()))
 
-    ditorted_regions = [(detection['start'] / sr, detection['end'] / sr) for detection in detections]
+def _flat_shelves(audio, block_len: int, min_length: int, slope_tolerance: float, amplitude_min: float) -> dict:
+    """
+    Highest median level of a run of at least min_length samples whose steps stay
+    within slope_tolerance, per rail sign (None without one), as clipdetect finds it.
+    """
+    n = len(audio)
+    best = {1.0: None, -1.0: None}
+    # Open run reaching the end of the previous block: [start, hi, lo]
+    carry = None
+    runs = []
+    for a in range(0, n - 1, block_len):
+        b = min(a + block_len, n - 1)
+        seg = np.asarray(audio[a:b + 1], dtype=np.float64)
+        flat = np.abs(np.diff(seg)) <= slope_tolerance
+        found = mask_to_runs(flat)
+        if len(found) == 0:
+            if carry is not None:
+                runs.append((carry[0], a, carry[1], carry[2]))
+                carry = None
+            continue
+        # Run of steps [s, e) covers samples s..e
+        in_run = np.zeros(len(seg), dtype=bool)
+        in_run[:-1] |= flat
+        in_run[1:] |= flat
+        hi = np.maximum.reduceat(np.where(in_run, seg, -np.inf), found[:, 0])
+        lo = np.minimum.reduceat(np.where(in_run, seg, np.inf), found[:, 0])
+        first = 0
+        if carry is not None:
+            if found[0, 0] == 0:
+                carry = [carry[0], max(carry[1], hi[0]), min(carry[2], lo[0])]
+                first = 1
+                if len(found) == 1 and found[0, 1] == len(flat) and b < n - 1:
+                    continue
+                runs.append((carry[0], a + found[0, 1], carry[1], carry[2]))
+            else:
+                runs.append((carry[0], a, carry[1], carry[2]))
+            carry = None
+        last = len(found)
+        if last > first and found[-1, 1] == len(flat) and b < n - 1:
+            last -= 1
+            carry = [a + found[-1, 0], hi[-1], lo[-1]]
+        # Only long runs that reach amplitude_min on either rail can hold a shelf
+        keep = np.arange(first, last)
+        keep = keep[(found[keep, 1] - found[keep, 0] + 1 >= min_length)
+                    & ((hi[keep] >= amplitude_min) | (-lo[keep] >= amplitude_min))]
+        runs.extend((a + found[i, 0], a + found[i, 1], hi[i], lo[i]) for i in keep)
+        _update_shelves(audio, runs, best, min_length, amplitude_min)
+        runs.clear()
+    if carry is not None:
+        runs.append((carry[0], n - 1, carry[1], carry[2]))
+    _update_shelves(audio, runs, best, min_length, amplitude_min)
+    return best
+
+def _update_shelves(audio, runs: list, best: dict, min_length: int, amplitude_min: float):
+    """Fold finished flat runs (start, end step, max, min) into the best shelf per sign."""
+    for start, end, hi, lo in runs:
+        if end - start + 1 < min_length:
+            continue
+        for sign, top in ((1.0, hi), (-1.0, -lo)):
+            # The median is at most the run's top, so most runs never need it
+            if top < amplitude_min or (best[sign] is not None and top <= best[sign]):
+                continue
+            level = float(np.median(sign * np.asarray(audio[start:end + 1], dtype=np.float64)))
+            if level >= amplitude_min and (best[sign] is None or level > best[sign]):
+                best[sign] = level
 
-    return ditorted_regions
+def _clip_corners(audio, centers: np.ndarray) -> np.ndarray:
+    """
+    Largest |second difference| in the window clipdetect's corner gate checks around
+    each center (0 where the window is empty).
+    """
+    size = len(audio) - 2
+    if size <= 0 or len(centers) == 0:
+        return np.zeros(len(centers))
+    index = centers[:, None] + np.arange(-3, 1)
+    valid = (index >= 0) & (index < size)
+    index = np.clip(index, 0, size - 1)
+    x0, x1, x2 = (np.asarray(audio[index + k], dtype=np.float64) for k in range(3))
+    # Same operation order as np.diff(x, n=2)
+    second = np.abs((x2 - x1) - (x1 - x0))
+    return np.where(valid, second, 0.0).max(axis=1)
 
 # return list of (start_s, end_s) tuples for cutout regions where both are in seconds [ran by job queue]
-def detect_cutout(audio, sr, silence_threshold=0.0001, minimum_length=100) -> list[tuple[float, float]]:
+def detect_cutout(audio, sr, silence_threshold=0.0001, minimum_length=100, features: FeatureCache = None) -> list[tuple[float, float]]:
     frame_length = int((minimum_length * sr) / 1000)
     hop_length = frame_length // 2
-    rms = librosa.feature.rms(y=audio, frame_length=frame_length, hop_length=hop_length)[0]
-    duration_s = len(audio) / float(sr)
+    if features is None:
+        features = FeatureCache(audio, sr)
+    rms = features.rms(frame_length, hop_length)
+    return _silent_regions(rms, sr, frame_length, hop_length, len(audio), silence_threshold)
+
+def cutout_shard_context(sr: int, silence_threshold=0.0001, minimum_length=100, **_) -> tuple[int, int]:
+    """
+    (align, overlap) in samples for running detect_cutout on time slices: slices start
+    on the RMS frame grid and carry two frames so padded edge frames never reach the core.
+    """
+    frame_length = int((minimum_length * sr) / 1000)
+    return frame_length // 2, 2 * frame_length
+
+def _silent_regions(rms: np.ndarray, sr: int, frame_length: int, hop_length: int, num_samples: int,
+                    silence_threshold: float) -> list[tuple[float, float]]:
+    duration_s = num_samples / float(sr)
     intervals = rms_frame_intervals_seconds(len(rms), sr, frame_length, hop_length, duration_s=duration_s)
 
-    # Detect frames below threshold
-    silent_frames = rms < silence_threshold
-
-    # Group consecutive frames into regions using start/end of covered intervals
-    regions = []
-    start_time = None
-    end_time = None
-    for i, is_silent in enumerate(silent_frames):
-        if is_silent:
-            if start_time is None:
-                start_time = intervals[i][0]
-            end_time = intervals[i][1]
-        elif not is_silent and start_time is not None:
-            regions.append((start_time, end_time))
-            start_time = None
-            end_time = None
-    if start_time is not None:
-        end_time = intervals[-1][1]
-        regions.append((start_time, end_time))
-    return regions
+    # Group consecutive frames below threshold into regions using start/end of covered intervals
+    runs = mask_to_runs(rms < silence_threshold)
+    starts, ends = intervals[runs[:, 0], 0], intervals[runs[:, 1] - 1, 1]
+    # Drop regions shorter than a frame (minimum_length), which only come from edge
+    # frames clamped to the signal; a sample of slack keeps whole frames on rounding
+    starts, ends = filter_min_duration(starts, ends, (frame_length - 1) / float(sr))
+    return list(zip(starts.tolist(), ends.tolist()))
 
 def rms_frame_intervals_seconds(num_frames: int, sr: int, frame_length: int, hop_length: int, center: bool = True,
                                 duration_s: float | None = None) -> np.ndarray:
@@ -94,4 +228,49 @@ def rms_frame_intervals_seconds(num_frames: int, sr: int, frame_length: int, hop
     if duration_s is not None:
         starts = np.clip(starts, 0.0, duration_s)
         ends = np.clip(ends, 0.0, duration_s)
-    return np.stack([starts, ends], axis=1)
\ No newline at end of file
+    return np.stack([starts, ends], axis=1)
+
+class StreamingCutout:
+    """
+    Chunk-aware detect_cutout: push() consecutive blocks, then finish() returns the
+    same regions detect_cutout gives for the whole signal. Frame RMS values are
+    computed as frames complete, so only one frame of prefix sums is kept.
+    """
+    def __init__(self, sr: int, silence_threshold=0.0001, minimum_length=100):
+        self.sr = sr
+        self.silence_threshold = silence_threshold
+        self.frame_length = int((minimum_length * sr) / 1000)
+        self.hop_length = self.frame_length // 2
+        self.pad = self.frame_length // 2  # librosa centers frames with constant padding
+        self.energy = RunningCumulative(np.float64)
+        self.rms = []
+        self.next_frame = 0
+
+    def _frame_rms(self, frames: np.ndarray, n: int) -> np.ndarray:
+        starts = frames * self.hop_length - self.pad
+        lo = np.clip(starts, 0, n)
+        hi = np.clip(starts + self.frame_length, 0, n)
+        energy = self.energy[hi] - self.energy[lo]
+        return np.sqrt(np.maximum(energy, 0.0) / self.frame_length)
+
+    def push(self, block: np.ndarray):
+        self.energy.push(np.square(block, dtype=np.float64))
+        n = self.energy.total_samples
+
+        # Frames that end inside the samples seen so far
+        last = (n + self.pad - self.frame_length) // self.hop_length
+        if last < self.next_frame:
+            return
+        frames = np.arange(self.next_frame, last + 1)
+        self.rms.append(self._frame_rms(frames, n))
+        self.next_frame = last + 1
+        self.energy.discard_before(max(self.next_frame * self.hop_length - self.pad, 0))
+
+    def finish(self) -> list[tuple[float, float]]:
+        n = self.energy.total_samples
+        num_frames = 1 + (n + 2 * self.pad - self.frame_length) // self.hop_length
+        if num_frames > self.next_frame:
+            self.rms.append(self._frame_rms(np.arange(self.next_frame, num_frames), n))
+            self.next_frame = num_frames
+        rms = np.concatenate(self.rms) if self.rms else np.zeros(0)
+        return _silent_regions(rms, self.sr, self.frame_length, self.hop_length, n, self.silence_threshold)
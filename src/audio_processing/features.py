@@ -0,0 +1,185 @@
+import math
+import numpy as np
+import pyloudnorm as pyln
+from scipy.signal import sosfilt
+
+# |x| above this counts as signal; matches np.allclose(chunk, 0.0)
+NONZERO_ATOL = 1e-8
+# Samples transformed and reduced at a time when summing a statistic over windows
+FEATURE_CHUNK_SAMPLES = 1 << 20
+
+def k_weighting_sos(sr: int) -> np.ndarray:
+    """BS.1770 K-weighting filter chain (pyloudnorm's coefficients) as second-order sections."""
+    meter = pyln.Meter(sr)
+    return np.array([
+        np.concatenate((filter_stage.passband_gain * filter_stage.b, filter_stage.a))
+        for filter_stage in meter._filters.values()
+    ])
+
+class KWeightingStream:
+    """K-weighting over consecutive blocks, carrying filter state so the output equals one pass over the whole signal."""
+    def __init__(self, sr: int):
+        self.sos = k_weighting_sos(sr)
+        self.zi = np.zeros((self.sos.shape[0], 2))
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if len(block) == 0:
+            return np.zeros(0, dtype=np.float64)
+        out, self.zi = sosfilt(self.sos, np.asarray(block, dtype=np.float64), zi=self.zi)
+        return out
+
+class FeatureCache:
+    """
+    Per-file cache of framed features shared by the detectors.
+
+    Results are keyed by (feature, transform, frame_length, hop_length, ...) so that
+    detectors asking for the same framing of the same transform reuse one computation;
+    loudness spikes and integrated loudness share the K-weighted energy on the 100 ms
+    gating grid. Only per-block and per-frame values are kept, never per-sample copies.
+    Transforms are "raw" (the samples as loaded) and "k_weighted" (BS.1770 weighting).
+    """
+    def __init__(self, audio: np.ndarray, sr: int):
+        self.audio = audio
+        self.sr = sr
+        self._cache = {}
+
+    def _get(self, key: tuple, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def segment_sums(self, stat: str, bounds: np.ndarray, transform: str = "raw") -> np.ndarray:
+        """
+        Sum of a per-sample statistic over [bounds[i], bounds[i + 1]) for sorted, unique
+        bounds within the signal. The signal is transformed and reduced a chunk at a
+        time, so no per-sample copy of it is kept.
+
+        stat "energy" sums squared samples and "nonzero" counts samples with
+        |x| > NONZERO_ATOL.
+        """
+        if transform == "raw":
+            process = lambda x: x
+        elif transform == "k_weighted":
+            process = KWeightingStream(self.sr).process
+        else:
+            raise ValueError(f"Unknown transform: {transform}")
+        if stat == "energy":
+            values, dtype = lambda x: np.square(x, dtype=np.float64), np.float64
+        elif stat == "nonzero":
+            values, dtype = lambda x: np.abs(x) > NONZERO_ATOL, np.int64
+        else:
+            raise ValueError(f"Unknown statistic: {stat}")
+
+        sums = np.zeros(max(len(bounds) - 1, 0), dtype=dtype)
+        if len(sums) == 0:
+            return sums
+        # K-weighting has to run from the first sample, whatever the first bound
+        first = 0 if transform == "k_weighted" else int(bounds[0])
+        for lo in range(first, int(bounds[-1]), FEATURE_CHUNK_SAMPLES):
+            hi = min(lo + FEATURE_CHUNK_SAMPLES, int(bounds[-1]))
+            x = values(process(self.audio[lo:hi]))
+            # Segments overlapping [lo, hi), the first of which may have started earlier
+            k0 = max(np.searchsorted(bounds, lo, side="right") - 1, 0)
+            k1 = np.searchsorted(bounds, hi, side="left")
+            if k1 <= k0:
+                continue
+            cuts = np.maximum(bounds[k0:k1], lo) - lo
+            sums[k0:k1] += np.add.reduceat(x, cuts, dtype=dtype)
+        return sums
+
+    def grid_sums(self, stat: str, block_len: int, transform: str = "raw") -> tuple[np.ndarray, np.ndarray]:
+        """
+        (bounds, prefix sums at bounds) of a statistic on a grid of block_len samples,
+        computed in one pass and memoized, so every detector framing the same transform
+        on that grid shares it. The grid also holds the sample before each step, as float
+        framing arithmetic (like pyloudnorm's) can land a bound one sample short.
+        """
+        def compute():
+            n = len(self.audio)
+            steps = np.arange(0, n + 1, block_len)
+            bounds = np.unique(np.concatenate((steps, steps[1:] - 1, [n])))
+            sums = self.segment_sums(stat, bounds, transform)
+            return bounds, np.concatenate((np.zeros(1, dtype=sums.dtype), np.cumsum(sums)))
+        return self._get(("grid_sums", stat, transform, block_len), compute)
+
+    def window_sums(self, stat: str, starts: np.ndarray, length, transform: str = "raw", block_len: int = None) -> np.ndarray:
+        """
+        Sum a statistic over [start, start + length) for every start. Bounds are clipped
+        to the signal, so out-of-range parts count as zeros (like constant padding).
+        starts and length broadcast against each other.
+
+        With block_len, bounds on that grid are read from grid_sums; windows with other
+        bounds are summed from the signal without keeping anything.
+        """
+        n = len(self.audio)
+        lo = np.clip(starts, 0, n)
+        hi = np.clip(np.asarray(starts) + length, 0, n)
+        if block_len:
+            bounds, cum = self.grid_sums(stat, block_len, transform)
+            i_lo = np.searchsorted(bounds, lo)
+            i_hi = np.searchsorted(bounds, hi)
+            if np.array_equal(bounds[i_lo], lo) and np.array_equal(bounds[i_hi], hi):
+                return cum[i_hi] - cum[i_lo]
+
+        bounds = np.unique(np.concatenate((np.ravel(lo), np.ravel(hi))))
+        sums = self.segment_sums(stat, bounds, transform)
+        cum = np.concatenate((np.zeros(1, dtype=sums.dtype), np.cumsum(sums)))
+        return cum[np.searchsorted(bounds, hi)] - cum[np.searchsorted(bounds, lo)]
+
+    def frame_starts(self, frame_length: int, hop_length: int, center: bool = True) -> np.ndarray:
+        """First sample of every frame, using librosa's framing (constant padding when centered)."""
+        def compute():
+            n = len(self.audio)
+            pad = frame_length // 2 if center else 0
+            num_frames = 1 + (n + 2 * pad - frame_length) // hop_length
+            return np.arange(max(num_frames, 0)) * hop_length - pad
+        return self._get(("frame_starts", frame_length, hop_length, center), compute)
+
+    def rms(self, frame_length: int, hop_length: int, center: bool = True, transform: str = "raw") -> np.ndarray:
+        """Frame RMS equivalent to librosa.feature.rms(y=..., frame_length, hop_length, center)[0]."""
+        def compute():
+            starts = self.frame_starts(frame_length, hop_length, center)
+            pad = frame_length // 2 if center else 0
+            block_len = math.gcd(hop_length, frame_length, pad)
+            energy = self.window_sums("energy", starts, frame_length, transform, block_len=block_len)
+            return np.sqrt(np.maximum(energy, 0.0) / frame_length)
+        return self._get(("rms", transform, frame_length, hop_length, center), compute)
+
+class RunningCumulative:
+    """
+    Prefix sums of a per-sample statistic over a stream of blocks, with a leading 0.
+
+    Only the tail from the last discard_before() onwards is kept in memory.
+    """
+    def __init__(self, dtype=np.float64):
+        self.dtype = dtype
+        self.base = 0  # absolute sample index of self.values[0]
+        self.values = np.zeros(1, dtype=dtype)
+
+    @property
+    def total_samples(self) -> int:
+        return self.base + len(self.values) - 1
+
+    def push(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        block = np.array(values, dtype=self.dtype)
+        # Fold the running total into the first element so the additions happen in
+        # the same order as one np.cumsum over the whole signal
+        block[0] += self.values[-1]
+        self.values = np.concatenate((self.values, np.cumsum(block)))
+
+    def __getitem__(self, index):
+        return self.values[np.asarray(index) - self.base]
+
+    def window_sums(self, starts: np.ndarray, length) -> np.ndarray:
+        """Sum over [start, start + length) for every start still held."""
+        starts = np.asarray(starts)
+        return self[starts + length] - self[starts]
+
+    def discard_before(self, index: int):
+        """Forget prefix sums for sample indices below index."""
+        drop = min(index, self.total_samples) - self.base
+        if drop > 0:
+            self.values = self.values[drop:]
+            self.base += drop
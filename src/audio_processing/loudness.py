@@ -1,15 +1,120 @@
+from functools import partial
 from typing import List, Tuple
 import numpy as np
 import librosa
 import pyloudnorm as pyln
+from .features import FeatureCache, KWeightingStream, RunningCumulative, NONZERO_ATOL
+from .utils import merge_intervals
+
+# BS.1770 gating constants (match pyloudnorm.Meter defaults)
+GATE_BLOCK_S = 0.4
+GATE_OVERLAP = 0.75
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+
+# Fast mode K-weights the whole signal once, so each window sees the filter already
+# settled instead of starting from zero state like pyloudnorm does per chunk. On
+# program material this stays within COMPAT_TOLERANCE_LU of compat mode.
+COMPAT_TOLERANCE_LU = 0.5
+
+def _gated_loudness(z: np.ndarray) -> np.ndarray:
+    """
+    Vectorized BS.1770 gating, one row of block mean-squares per window.
+    Mirrors pyln.Meter.integrated_loudness, including -inf for fully gated windows.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        block_lufs = -0.691 + 10.0 * np.log10(z)
+
+        abs_gated = block_lufs >= ABSOLUTE_GATE
+        abs_mean = np.sum(z * abs_gated, axis=1) / np.sum(abs_gated, axis=1)
+        rel_threshold = -0.691 + 10.0 * np.log10(abs_mean) + RELATIVE_GATE
+
+        gated = (block_lufs > rel_threshold[:, None]) & (block_lufs > ABSOLUTE_GATE)
+        gated_mean = np.nan_to_num(np.sum(z * gated, axis=1) / np.sum(gated, axis=1))
+        return -0.691 + 10.0 * np.log10(gated_mean)
+
+def _gating_step(sr: int) -> int:
+    """Samples between gating block starts (100 ms), the grid FeatureCache shares sums on."""
+    return max(int(round(GATE_BLOCK_S * (1.0 - GATE_OVERLAP) * sr)), 1)
+
+def _gating_blocks(win_len: int, sr: int, num_blocks: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (lo, hi) sample offsets of the BS.1770 gating blocks inside a window of win_len
+    samples, computed with the same arithmetic as pyloudnorm.
+    """
+    step = 1.0 - GATE_OVERLAP
+    if num_blocks is None:
+        window_s = win_len / sr
+        num_blocks = int(np.round((window_s - GATE_BLOCK_S) / (GATE_BLOCK_S * step))) + 1
+    j = np.arange(max(num_blocks, 1))
+    block_lo = np.minimum((GATE_BLOCK_S * (j * step) * sr).astype(int), win_len)
+    block_hi = np.minimum((GATE_BLOCK_S * (j * step + 1) * sr).astype(int), win_len)
+    return block_lo, block_hi
+
+def _window_lufs(energy, nonzero, starts: np.ndarray, win_len: int, sr: int) -> np.ndarray:
+    """
+    Loudness of windows [start, start + win_len). energy and nonzero are
+    window_sums(starts, length) callables over the K-weighted energy and the
+    nonzero-sample counts.
+    """
+    block_lo, block_hi = _gating_blocks(win_len, sr)
+    z = energy(starts[:, None] + block_lo, block_hi - block_lo) / (GATE_BLOCK_S * sr)
+    lufs = _gated_loudness(np.maximum(z, 0.0))
+
+    # Same digital-silence rule as np.allclose(chunk, 0.0) in compat mode
+    lufs[nonzero(starts, win_len) == 0] = -np.inf
+    return lufs
+
+def sliding_loudness(
+    audio: np.ndarray,
+    sr: int,
+    win_len: int,
+    hop_len: int,
+    compat: bool = False,
+    features: FeatureCache = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integrated loudness of every full window of win_len samples, hop_len apart.
+
+    Fast mode K-weights the signal once, a chunk at a time, and sums its energy between
+    gating-block boundaries (100 ms apart), so every block's mean-square comes from a
+    few sums per window instead of re-filtering it. Compat mode runs pyloudnorm on each window, which is exact
+    but re-filters every chunk.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (start sample of each window, LUFS of each window)
+    """
+    if win_len <= 0 or hop_len <= 0:
+        raise ValueError("win_len and hop_len must be > 0")
+
+    n = len(audio)
+    if n < win_len:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=float)
+    starts = np.arange(0, n - win_len + 1, hop_len)
+
+    if compat:
+        meter = pyln.Meter(sr)
+        lufs = np.empty(len(starts), dtype=float)
+        for i, start in enumerate(starts):
+            chunk = audio[start:start + win_len]
+            lufs[i] = -np.inf if np.allclose(chunk, 0.0) else meter.integrated_loudness(chunk)
+        return starts, lufs
+
+    if features is None:
+        features = FeatureCache(audio, sr)
+    step = _gating_step(sr)
+    energy = partial(features.window_sums, "energy", transform="k_weighted", block_len=step)
+    nonzero = partial(features.window_sums, "nonzero", block_len=step)
+    lufs = _window_lufs(energy, nonzero, starts, win_len, sr)
+    return starts, lufs
 
 def compute_short_term_loudness(
     audio: np.ndarray,
     sr: int,
     window_s: float = 0.4,
+    compat: bool = False,
+    features: FeatureCache = None,
 ) -> Tuple[np.ndarray, np.ndarray]:
-    
-    meter = pyln.Meter(sr)
 
     hop_s = window_s / 2.0  # 50% overlap
     win_len = int(window_s * sr)
@@ -20,111 +125,103 @@ def compute_short_term_loudness(
 
     n = len(audio)
     if n < win_len:
-        loud = meter.integrated_loudness(audio)
+        loud = pyln.Meter(sr).integrated_loudness(audio)
         return np.array([n / (2 * sr)], float), np.array([loud], float)
 
-    times = []
-    lufs = []
-    start = 0
-    while start + win_len <= n:
-        end = start + win_len
-        chunk = audio[start:end]
-        loud = -np.inf if np.allclose(chunk, 0.0) else meter.integrated_loudness(chunk)
-        center_time = (start + win_len / 2) / sr
-        times.append(center_time)
-        lufs.append(loud)
-        start += hop_len
-
-    return np.array(times, float), np.array(lufs, float)
+    starts, lufs = sliding_loudness(audio, sr, win_len, hop_len, compat=compat, features=features)
+    times = (starts + win_len / 2) / sr
+    return times.astype(float), lufs.astype(float)
 
 # Return (start, end, max_lufs) tuples for loudness spikes above threshold [ran by job queue]
 def get_loudness_spikes(
     audio: np.ndarray,
     sr: int,
     window_size: float = 0.4,
-    threshold: float = -16.0
+    threshold: float = -16.0,
+    compat: bool = False,
+    features: FeatureCache = None,
 ) -> List[Tuple[float, float, float]]:
     """
     Find sections of audio where loudness exceeds the specified threshold.
-    
+
     Args:
         audio (np.ndarray): Audio signal.
         sr (int): Sample rate.
         window_s (float): Window size in seconds for loudness analysis.
         threshold (float): Loudness threshold in LUFS. Sections above this are returned.
-        merge (bool): Whether to merge adjacent sections. Default True.
-    
+        compat (bool): Measure each window with pyloudnorm instead of the single-pass
+                       engine. Slower; fast mode agrees within COMPAT_TOLERANCE_LU.
+        features (FeatureCache): Shared per-file feature cache, created if not given.
+
     Returns:
         List[Tuple[float, float, float]]: List of (start_time, end_time, max_lufs) tuples
                                           for each detected spike section.
     """
-    merge = True
-
-    hop_s = window_size / 2.0  # 50% overlap
-    meter = pyln.Meter(sr)
-    win_len = int(window_size * sr)
-    hop_len = int(hop_s * sr)
-
-    if win_len <= 0 or hop_len <= 0:
-        raise ValueError("window_s and hop_s must be > 0")
+    win_len, hop_len = _spike_windows(sr, window_size)
 
     n = len(audio)
-    
+
     # pyloudnorm requires at least 0.4 seconds for integrated loudness
     min_samples = int(0.4 * sr)
     if n < min_samples:
         return []
-    
+
     # If audio is shorter than window, use the audio length as window
     if n < win_len:
         win_len = n
         hop_len = n  # Only one measurement
 
-    detections = []  # List of (start_sample, end_sample, loudness)
-    start_sample = 0
-    
-    while start_sample + win_len <= n:
-        end_sample = start_sample + win_len
-        chunk = audio[start_sample:end_sample]
-        loud = -np.inf if np.allclose(chunk, 0.0) else meter.integrated_loudness(chunk)
-        
-        # Only include sections above threshold
-        if loud > threshold:
-            detections.append((start_sample, end_sample, loud))
-        
-        start_sample += hop_len
-
-    if len(detections) == 0:
-        return []
-    
+    starts, lufs = sliding_loudness(audio, sr, win_len, hop_len, compat=compat, features=features)
+    return _merge_spikes(starts, lufs, win_len, sr, threshold)
+
+def _spike_windows(sr: int, window_size: float) -> Tuple[int, int]:
+    hop_s = window_size / 2.0  # 50% overlap
+    win_len = int(window_size * sr)
+    hop_len = int(hop_s * sr)
+
+    if win_len <= 0 or hop_len <= 0:
+        raise ValueError("window_s and hop_s must be > 0")
+    return win_len, hop_len
+
+def spike_shard_context(sr: int, window_size: float = 0.4, threshold: float = -16.0, **_) -> Tuple[int, int]:
+    """
+    (align, overlap) in samples for running get_loudness_spikes on time slices: slices
+    start on the window grid and carry one window plus 1 s for the K-weighting filter
+    to settle. Each slice restarts the filter from rest; its transient has decayed far
+    below float precision within that second, so slice values differ from the
+    whole-file run only by rounding (around 1e-13 LU), but they are cached as a
+    separate variant all the same.
+    """
+    win_len, hop_len = _spike_windows(sr, window_size)
+    return hop_len, win_len + sr
+
+def _merge_spikes(
+    starts: np.ndarray,
+    lufs: np.ndarray,
+    win_len: int,
+    sr: int,
+    threshold: float,
+    merge: bool = True,
+) -> List[Tuple[float, float, float]]:
+    # Only include sections above threshold
+    above = lufs > threshold
+    starts = np.asarray(starts)[above].astype(np.int64)
+    lufs = np.asarray(lufs)[above]
+    ends = starts + win_len
+
     if not merge:
         # Return individual windows as intervals
-        return [(start / sr, end / sr, lufs) for start, end, lufs in detections]
-
-    # Merge adjacent/overlapping sections
-    merged = []
-    current_start, current_end, current_max_lufs = detections[0]
-    
-    for start, end, lufs in detections[1:]:
-        # Check if current detection overlaps or is adjacent to previous
-        if start <= current_end:
-            # Merge: extend end time and update max loudness
-            current_end = max(current_end, end)
-            current_max_lufs = max(current_max_lufs, lufs)
-        else:
-            # No overlap: save current section and start new one
-            merged.append((current_start / sr, current_end / sr, current_max_lufs))
-            current_start, current_end, current_max_lufs = start, end, lufs
-    
-    # Add the last section
-    merged.append((current_start / sr, current_end / sr, current_max_lufs))
-    
-    return merged
+        return [(int(start) / sr, int(end) / sr, float(loud)) for start, end, loud in zip(starts, ends, lufs)]
+
+    # Merge adjacent/overlapping sections, keeping the max loudness of each
+    starts, ends, max_lufs = merge_intervals(starts, ends, values=lufs, func=np.maximum)
+    return [(int(start) / sr, int(end) / sr, float(loud)) for start, end, loud in zip(starts, ends, max_lufs)]
 
 # Get overall LUFS for entire audio file [ran by job queue]
 def get_lufs(
     audio: np.ndarray,
-    sr: int
+    sr: int,
+    features: FeatureCache = None,
 ) -> float:
     """
     Compute the integrated LUFS (loudness) for the entire audio signal.
@@ -132,13 +229,110 @@ def get_lufs(
     Args:
         audio (np.ndarray): Audio signal.
         sr (int): Sample rate.
-        meter (pyln.Meter): Loudness meter.
+        features (FeatureCache): Shared per-file feature cache, so the K-weighted energy
+                                 on the gating grid is shared with get_loudness_spikes.
 
     Returns:
         float: Integrated loudness in LUFS.
     """
-    meter = pyln.Meter(sr)
-
     if audio.size == 0:
         return float('-inf')
-    return meter.integrated_loudness(audio)
\ No newline at end of file
+
+    # pyloudnorm rejects input shorter than one gating block
+    if audio.size < GATE_BLOCK_S * sr:
+        return pyln.Meter(sr).integrated_loudness(audio)
+
+    # Whole-file K-weighting is exactly what pyloudnorm does, so this matches it
+    _, lufs = sliding_loudness(audio, sr, len(audio), len(audio), features=features)
+    return float(lufs[0])
+
+class StreamingLoudnessSpikes:
+    """
+    Chunk-aware get_loudness_spikes: push() consecutive blocks of the signal, then
+    finish() returns the same spans get_loudness_spikes gives for the whole signal.
+    Only the prefix sums for the current window are kept between blocks.
+    """
+    def __init__(self, sr: int, window_size: float = 0.4, threshold: float = -16.0):
+        self.sr = sr
+        self.threshold = threshold
+        self.win_len, self.hop_len = _spike_windows(sr, window_size)
+        self.k_weighting = KWeightingStream(sr)
+        self.energy = RunningCumulative(np.float64)
+        self.nonzero = RunningCumulative(np.int64)
+        self.starts = []
+        self.lufs = []
+        self.next_start = 0
+
+    def push(self, block: np.ndarray):
+        self.energy.push(np.square(self.k_weighting.process(block)))
+        self.nonzero.push(np.abs(block) > NONZERO_ATOL)
+
+        n = self.energy.total_samples
+        if n < self.next_start + self.win_len:
+            return
+        starts = np.arange(self.next_start, n - self.win_len + 1, self.hop_len)
+        self.starts.append(starts)
+        self.lufs.append(_window_lufs(self.energy.window_sums, self.nonzero.window_sums, starts, self.win_len, self.sr))
+        self.next_start = int(starts[-1]) + self.hop_len
+        self.energy.discard_before(self.next_start)
+        self.nonzero.discard_before(self.next_start)
+
+    def finish(self) -> List[Tuple[float, float, float]]:
+        n = self.energy.total_samples
+        if n < int(0.4 * self.sr):
+            return []
+        if n < self.win_len:
+            # Whole signal is one window, and nothing has been discarded yet
+            starts = np.zeros(1, dtype=int)
+            return _merge_spikes(starts, _window_lufs(self.energy.window_sums, self.nonzero.window_sums, starts, n, self.sr), n, self.sr, self.threshold)
+        if not self.starts:
+            return []
+        return _merge_spikes(np.concatenate(self.starts), np.concatenate(self.lufs), self.win_len, self.sr, self.threshold)
+
+class StreamingLufs:
+    """
+    Chunk-aware get_lufs: push() consecutive blocks, then finish() returns the
+    integrated loudness of the whole signal, keeping one value per gating block.
+    """
+    def __init__(self, sr: int):
+        self.sr = sr
+        self.k_weighting = KWeightingStream(sr)
+        self.energy = RunningCumulative(np.float64)
+        self.nonzero_count = 0
+        self.block_energy = []
+        self.head = []  # raw samples, kept only while the signal is shorter than one gating block
+
+    def push(self, block: np.ndarray):
+        self.head.append(np.asarray(block))
+        self.energy.push(np.square(self.k_weighting.process(block)))
+        if self.energy.total_samples >= GATE_BLOCK_S * self.sr:
+            self.head = []
+        self.nonzero_count += int(np.count_nonzero(np.abs(block) > NONZERO_ATOL))
+        self._complete_blocks(self.energy.total_samples)
+
+    def _complete_blocks(self, n: int, num_blocks: int = None):
+        step = 1.0 - GATE_OVERLAP
+        while num_blocks is None or len(self.block_energy) < num_blocks:
+            j = len(self.block_energy)
+            lo = int(GATE_BLOCK_S * (j * step) * self.sr)
+            hi = int(GATE_BLOCK_S * (j * step + 1) * self.sr)
+            if num_blocks is None and hi > n:
+                break
+            lo, hi = min(lo, n), min(hi, n)
+            self.block_energy.append((self.energy[hi] - self.energy[lo]) / (GATE_BLOCK_S * self.sr))
+            if num_blocks is None:
+                self.energy.discard_before(int(GATE_BLOCK_S * ((j + 1) * step) * self.sr))
+
+    def finish(self) -> float:
+        n = self.energy.total_samples
+        if n == 0:
+            return float('-inf')
+        if n < GATE_BLOCK_S * self.sr:
+            return pyln.Meter(self.sr).integrated_loudness(np.concatenate(self.head))
+
+        block_lo, _ = _gating_blocks(n, self.sr)
+        self._complete_blocks(n, num_blocks=len(block_lo))
+        if self.nonzero_count == 0:
+            return float('-inf')
+        z = np.array(self.block_energy[:len(block_lo)])[None, :]
+        return float(_gated_loudness(np.maximum(z, 0.0))[0])
@@ -0,0 +1,76 @@
+import os
+import time
+import torch
+
+# Which form of each model to serve: "eager", "jit" (TorchScript) or "quantized" (dynamic int8)
+MODEL_VARIANT = os.getenv('MODEL_VARIANT', 'eager')
+# torch intra-op threads per worker process (0 keeps torch's default)
+TORCH_NUM_THREADS = int(os.getenv('TORCH_NUM_THREADS', 0))
+
+_factories = {}
+_models = {}
+_stats = {}
+_torch_configured = False
+
+def register_model(name: str, factory, example=None):
+    """
+    Register a model by name. factory() builds the torch.nn.Module; example(), if
+    given, returns the positional args of one forward call used to warm the model up.
+    """
+    _factories[name] = (factory, example)
+
+def _configure_torch():
+    global _torch_configured
+    if not _torch_configured:
+        if TORCH_NUM_THREADS > 0:
+            torch.set_num_threads(TORCH_NUM_THREADS)
+        _torch_configured = True
+
+def _prepare(model: torch.nn.Module, variant: str) -> torch.nn.Module:
+    model = model.to('cpu')
+    model.eval()
+    if variant == "jit":
+        try:
+            model = torch.jit.script(model)
+        except Exception as e:
+            print(f"TorchScript compile failed, serving eager model: {e}")
+    elif variant == "quantized":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear, torch.nn.LSTM, torch.nn.GRU}, dtype=torch.qint8)
+    elif variant != "eager":
+        raise ValueError(f"Unknown model variant: {variant}")
+    return model
+
+def _tensor_bytes(model: torch.nn.Module) -> int:
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+def get_model(name: str, variant: str = None) -> torch.nn.Module:
+    """Return the named model, building it the first time it is asked for in this process."""
+    variant = variant or MODEL_VARIANT
+    key = (name, variant)
+    if key not in _models:
+        if name not in _factories:
+            raise KeyError(f"No model registered as {name}")
+        _configure_torch()
+        factory, example = _factories[name]
+
+        start = time.perf_counter()
+        model = _prepare(factory(), variant)
+        if example is not None:
+            with torch.inference_mode():
+                model(*example())
+        load_s = time.perf_counter() - start
+
+        _models[key] = model
+        _stats[key] = {"load_s": load_s, "tensor_bytes": _tensor_bytes(model)}
+        print(f"Loaded model {name} ({variant}) in {load_s:.3f}s, {_stats[key]['tensor_bytes'] / 1024**2:.1f} MiB of weights")
+    return _models[key]
+
+def warm_models(names: list[str] = None, variant: str = None) -> dict:
+    """Load the given models (default: every registered one) and return their load stats."""
+    for name in names or list(_factories):
+        get_model(name, variant)
+    return model_stats()
+
+def model_stats() -> dict:
+    return {f"{name}:{variant}": dict(stats) for (name, variant), stats in _stats.items()}
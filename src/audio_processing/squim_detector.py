@@ -1,43 +1,71 @@
+import os
 import torch
 import numpy as np
 from .utils import Detection
-import math
+from .model_registry import register_model, get_model
 
 DEFAULT_SR = 48000
+# Rate the SQUIM objective model is trained on; inputs are resampled to it
+MODEL_SR = 16000
+
+# Windows scored per model call
+MOS_BATCH_SIZE = int(os.getenv('MOS_BATCH_SIZE', 128))
 
 def _compute_simple_features(wav: torch.Tensor):
+    """Per-row (rms_db, peak, clip_ratio) of a (batch, samples) tensor."""
     if wav.dim() == 1:
         wav = wav.unsqueeze(0)
     eps = 1e-12
-    peak = wav.abs().max().item()
-    rms = float(torch.sqrt(torch.mean(wav ** 2)) + eps)
-    rms_db = 20.0 * math.log10(rms + eps)
+    peak = wav.abs().amax(dim=-1)
+    rms = (torch.sqrt(torch.mean(wav ** 2, dim=-1)) + eps).double()
+    rms_db = 20.0 * torch.log10(rms + eps)
     clip_thresh = 0.99
-    clipped = (wav.abs() >= clip_thresh).float()
-    clip_ratio = float(clipped.mean().item())
+    # Only windows whose peak reaches the threshold can have clipped samples
+    clip_ratio = torch.zeros(wav.shape[0], dtype=torch.float64)
+    reached = peak >= clip_thresh
+    if reached.any():
+        clipped = (wav[reached].abs() >= clip_thresh).float()
+        clip_ratio[reached] = clipped.mean(dim=-1).double()
     return rms_db, peak, clip_ratio
 
-def _compute_simple_mos(wav: torch.Tensor, sr: int) -> float:
+def _compute_simple_mos(wav: torch.Tensor, sr: int) -> torch.Tensor:
     rms_db, peak, clip_ratio = _compute_simple_features(wav)
-    rms_db_clamped = max(-60.0, min(0.0, rms_db))
+    rms_db_clamped = rms_db.clamp(-60.0, 0.0)
     mos = 1.0 + 4.0 * (rms_db_clamped + 60.0) / 60.0
-    mos -= 2.0 * min(clip_ratio * 10.0, 1.0)
-    if rms_db < -50.0:
-        mos -= 0.5
-    mos = max(1.0, min(5.0, mos))
-    return float(mos)
+    mos -= 2.0 * torch.clamp(clip_ratio * 10.0, max=1.0)
+    mos = torch.where(rms_db < -50.0, mos - 0.5, mos)
+    mos = mos.clamp(1.0, 5.0)
+    return mos.to(torch.float32)
 
-# Create squim MOS model
-def get_squim_model():
+class SimpleMOSModel(torch.nn.Module):
+    """
+    Stand-in for the SQUIM objective model. Like the real network it takes a
+    (batch, samples) tensor of windows and returns one MOS per window, so it can be
+    swapped for SQUIM without changing how windows are batched.
+    """
+    def forward(self, wav: torch.Tensor, sr: int) -> torch.Tensor:
+        return _compute_simple_mos(wav.cpu(), sr)
+
+register_model("squim", SimpleMOSModel, example=lambda: (torch.zeros(1, MODEL_SR), MODEL_SR))
 
-    class SimpleMOSModel(torch.nn.Module):
-        def forward(self, wav: torch.Tensor, sr: int) -> torch.Tensor:
-            mos = _compute_simple_mos(wav.cpu(), sr)
-            return torch.tensor(mos, dtype=torch.float32)
-    model = SimpleMOSModel().to('cpu')
-    model.eval()
+# Squim MOS model, loaded once per process by the model registry
+def get_squim_model():
+    return get_model("squim")
 
-    return model
+def score_windows(wav: torch.Tensor, sr: int, win: int, hop: int, model=None, batch_size: int = None) -> torch.Tensor:
+    """
+    MOS of every full window of a 1-D signal tensor, windows starting every hop samples.
+    Windows are a strided view of the signal and are scored batch_size at a time.
+    """
+    if model is None:
+        model = get_squim_model()
+    if batch_size is None:
+        batch_size = MOS_BATCH_SIZE
+    if wav.shape[-1] < win:
+        return torch.zeros(0, dtype=torch.float32)
+    windows = wav.unfold(-1, win, hop)  # (num_windows, win), no copy
+    with torch.inference_mode():
+        return torch.cat([model(windows[i:i + batch_size], sr) for i in range(0, windows.shape[0], batch_size)])
 
 def sliding_mos(
     audio: np.ndarray,
@@ -45,24 +73,18 @@ def sliding_mos(
     window_s: float = 1.0,
 ):
     hop_s = window_s / 2
-    wav = torch.from_numpy(audio).unsqueeze(0)  # Shape: (1, samples)
-    model = get_squim_model()
-    wav = wav.to('cpu')
+    wav = torch.from_numpy(np.ascontiguousarray(audio))
 
     win = int(window_s * sr)
     hop = int(hop_s * sr)
 
-    scores = []
-    with torch.inference_mode():
-        pos = 0
-        while pos + win <= wav.shape[-1]:
-            chunk = wav[:, pos:pos + win]
-            mos_val = model(chunk, sr).item()
-            start_t = pos / sr
-            end_t = (pos + win) / sr
-            scores.append((float(start_t), float(end_t), float(mos_val)))
-            pos += hop
-    return scores
+    mos = score_windows(wav, sr, win, hop).numpy()
+    pos = np.arange(len(mos)) * hop
+    return list(zip((pos / sr).tolist(), ((pos + win) / sr).tolist(), mos.astype(np.float64).tolist()))
+
+def mos_shard_context(sr: int, mos_threshold: float = 2.0, window_size: float = 1.0, **_) -> tuple[int, int]:
+    """(align, overlap) in samples for running detect_low_mos_regions on time slices."""
+    return int((window_size / 2) * sr), int(window_size * sr)
 
 def detect_low_mos_regions(
     audio: np.ndarray,
@@ -75,8 +97,42 @@ def detect_low_mos_regions(
         sr=sr,
         window_s=window_size,
     )
-    detections = []
-    for start_t, end_t, mos_val in scores:
-        if mos_val < mos_threshold:
-            detections.append((start_t, end_t, mos_val))
-    return detections
+    return _low_mos(scores, mos_threshold)
+
+def _low_mos(scores: list[tuple[float, float, float]], mos_threshold: float) -> list[tuple[float, float, float]]:
+    """Keep the (start_t, end_t, mos) windows scoring below the threshold."""
+    if len(scores) == 0:
+        return []
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1, 3)
+    return [tuple(row) for row in scores[scores[:, 2] < mos_threshold].tolist()]
+
+class StreamingLowMOS:
+    """
+    Chunk-aware detect_low_mos_regions: push() consecutive blocks, then finish()
+    returns the same regions as the whole-signal detector. Windows are scored as soon
+    as they are complete, so only the last partial window of samples is kept.
+    """
+    def __init__(self, sr: int, mos_threshold: float = 2.0, window_size: float = 1.0):
+        self.sr = sr
+        self.mos_threshold = mos_threshold
+        self.win = int(window_size * sr)
+        self.hop = int((window_size / 2) * sr)
+        self.model = get_squim_model()
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_offset = 0  # absolute index of buffer[0]
+        self.pos = 0  # absolute index of the next window start
+        self.scores = []
+
+    def push(self, block: np.ndarray):
+        self.buffer = np.concatenate((self.buffer, np.asarray(block, dtype=np.float32)))
+        rel = self.pos - self.buffer_offset
+        mos = score_windows(torch.from_numpy(self.buffer[rel:]), self.sr, self.win, self.hop, self.model).numpy()
+        pos = self.pos + np.arange(len(mos)) * self.hop
+        self.scores.extend(zip((pos / self.sr).tolist(), ((pos + self.win) / self.sr).tolist(), mos.astype(np.float64).tolist()))
+        self.pos += len(mos) * self.hop
+        drop = min(self.pos - self.buffer_offset, len(self.buffer))
+        self.buffer = self.buffer[drop:]
+        self.buffer_offset += drop
+
+    def finish(self):
+        return _low_mos(self.scores, self.mos_threshold)
@@ -1,5 +1,6 @@
 import json
 import inspect
+import numpy as np
 
 def seconds_to_mmss(seconds : float):
     if seconds is None:
@@ -70,10 +71,55 @@ def fill_default_params(func, params):
     sig = inspect.signature(func)
     filled = {}
     for name, param in sig.parameters.items():
-        if name in ['audio', 'sr']:
+        if name in ['audio', 'sr', 'features']:
             continue
         if name in params:
             filled[name] = params[name]
         elif param.default is not inspect.Parameter.empty:
             filled[name] = param.default
     return filled
+
+# Interval helpers shared by the detectors. Intervals are parallel arrays of starts and
+# (exclusive) ends in whatever unit the caller uses, sorted by start.
+
+def mask_to_runs(mask: np.ndarray) -> np.ndarray:
+    """Return [num_runs, 2] array of (start, end) indices of the runs of True in a boolean mask."""
+    mask = np.asarray(mask, dtype=bool)
+    edges = np.diff(mask.astype(np.int8), prepend=0, append=0)
+    return np.stack([np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)], axis=1)
+
+def merge_groups(starts: np.ndarray, ends: np.ndarray, gap=0) -> np.ndarray:
+    """
+    Index of the first interval of every merged group. An interval joins the group
+    before it when it starts no more than gap after the furthest end seen so far, so
+    overlapping and touching intervals (gap=0) merge.
+    """
+    starts = np.asarray(starts)
+    if len(starts) == 0:
+        return np.zeros(0, dtype=int)
+    furthest = np.maximum.accumulate(np.asarray(ends))
+    breaks = starts[1:] > furthest[:-1] + gap
+    return np.concatenate(([0], np.flatnonzero(breaks) + 1))
+
+def region_reduce(values: np.ndarray, group_starts: np.ndarray, func=np.maximum) -> np.ndarray:
+    """Reduce values over each group given by merge_groups (e.g. func=np.minimum for the per-region min)."""
+    if len(group_starts) == 0:
+        return np.zeros(0, dtype=np.asarray(values).dtype)
+    return func.reduceat(np.asarray(values), group_starts)
+
+def merge_intervals(starts: np.ndarray, ends: np.ndarray, gap=0, values: np.ndarray = None, func=np.maximum):
+    """
+    Merge sorted intervals that overlap or are at most gap apart. Returns merged
+    (starts, ends), plus the values reduced per merged interval when values are given.
+    """
+    groups = merge_groups(starts, ends, gap)
+    merged_starts = np.asarray(starts)[groups]
+    merged_ends = region_reduce(ends, groups, np.maximum)
+    if values is None:
+        return merged_starts, merged_ends
+    return merged_starts, merged_ends, region_reduce(values, groups, func)
+
+def filter_min_duration(starts: np.ndarray, ends: np.ndarray, min_duration, *values: np.ndarray):
+    """Keep intervals at least min_duration long; any extra per-interval arrays are filtered alongside."""
+    keep = (np.asarray(ends) - np.asarray(starts)) >= min_duration
+    return tuple(np.asarray(a)[keep] for a in (starts, ends) + values)
@@ -1,6 +1,16 @@
 from . import analysis_types
+from . import result_cache
+from . import report_catalog
+from . import redis_pool
+from . import run_status
+from . import lanes
+from . import batches
+from . import parallel
 from . import worker
+from . import warm_worker
 from . import queue_cli
+from . import serving
+from . import queue_events
 from . import api_server
 
-__all__ = [analysis_types, worker, queue_cli, api_server]
\ No newline at end of file
+__all__ = [analysis_types, result_cache, report_catalog, redis_pool, run_status, lanes, batches, parallel, worker, warm_worker, queue_cli, serving, queue_events, api_server]
\ No newline at end of file
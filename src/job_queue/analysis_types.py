@@ -1,36 +1,64 @@
-from audio_processing.distortion_detection import detect_clipping, detect_cutout
-from audio_processing.loudness import get_loudness_spikes, get_lufs
-from audio_processing.squim_detector import detect_low_mos_regions
+from audio_processing.distortion_detection import detect_clipping, detect_cutout, cutout_shard_context, StreamingCutout
+from audio_processing.loudness import get_loudness_spikes, get_lufs, spike_shard_context, StreamingLoudnessSpikes, StreamingLufs
+from audio_processing.squim_detector import detect_low_mos_regions, mos_shard_context, StreamingLowMOS, MODEL_SR as SQUIM_SR
 
 USER_JOB_TYPES = {
     "load_and_queue": {"audio_files": list, "detection_types": list, "detection_params": dict},
     "simulate_artifacts": {"artifacts": dict}
 }
 
+# "sr" is the sample rate an analysis needs, or None to run at whatever rate the file was loaded at.
+# Bump "version" whenever a detector's output changes, so cached results for it are not reused.
+# Analyses with a "shard" function can run on overlapping time slices: it returns the
+# (align, overlap) in samples the slices need, and "shard_merge" says how slice results
+# combine ("regions" are clipped to each slice and joined, "windows" are kept by start).
 ANALYSIS_TYPES = {
     "Clipping": {
         "type": "in-file",
+        # 2: streamed runs no longer store per-block ClipDaT results under this key
+        "version": 2,
+        "sr": None,
         "params": {},
         "func": detect_clipping
     },
     "Cutout": {
         "type": "in-file",
+        # 2: regions shorter than minimum_length at the file edges are dropped
+        "version": 2,
+        "sr": None,
         "params": {"silence_threshold": 0.0001, "minimum_length": 100},
-        "func": detect_cutout
+        "func": detect_cutout,
+        "shard": cutout_shard_context,
+        "shard_merge": "regions",
+        "stream": StreamingCutout
     },
     "Loudness": {
         "type": "in-file",
+        # 2: merged shards, which restart the K-weighting filter, were stored under this key
+        "version": 2,
+        "sr": None,
         "params": {"loudness_threshold": -10.0, "window_size": 0.4},
-        "func": get_loudness_spikes
+        "func": get_loudness_spikes,
+        "shard": spike_shard_context,
+        "shard_merge": "regions",
+        "stream": StreamingLoudnessSpikes
     },
     "Speech Quality": {
         "type": "in-file",
+        "version": 1,
+        "sr": SQUIM_SR,
         "params": {"mos_threshold": 2.0, "window_size": 1.0},
-        "func": detect_low_mos_regions
+        "func": detect_low_mos_regions,
+        "shard": mos_shard_context,
+        "shard_merge": "windows",
+        "stream": StreamingLowMOS
     },
     "Overall LUFS": {
         "type": "overall",
+        "version": 1,
+        "sr": None,
         "params": {},
-        "func": get_lufs
+        "func": get_lufs,
+        "stream": StreamingLufs
     }
 }
\ No newline at end of file
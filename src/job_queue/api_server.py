@@ -9,7 +9,13 @@ import redis
 import subprocess
 import platform
 import shutil
-from flask import Flask, jsonify, request, send_from_directory
+import hashlib
+import uuid
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, jsonify, request, send_from_directory
+from werkzeug.wsgi import wrap_file
 from flask_cors import CORS
 from datetime import datetime
 from pathlib import Path
@@ -21,6 +27,14 @@ SRC_DIR = os.path.join(PROJECT_ROOT, 'src')
 if SRC_DIR not in sys.path:
     sys.path.insert(0, SRC_DIR)
 
+from job_queue.report_catalog import get_report_catalog
+from job_queue import run_status
+from job_queue import lanes
+from job_queue import batches
+from job_queue import redis_pool
+from job_queue import serving
+from job_queue import queue_events as queue_events_hub
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
 
@@ -28,6 +42,28 @@ CORS(app)  # Enable CORS for React frontend
 DETECTION_RESULTS_DIR = os.path.join(PROJECT_ROOT, 'detection_results')
 DEFAULT_AUDIO_FILES_DIR = os.path.join(PROJECT_ROOT, 'audio_files')
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+# Pub/sub channel workers publish job progress on, and how often an idle
+# /api/queue/events stream sends a keepalive
+QUEUE_EVENTS_CHANNEL = os.getenv('QUEUE_EVENTS_CHANNEL', 'queue_events')
+SSE_KEEPALIVE_S = float(os.getenv('SSE_KEEPALIVE_S', 15))
+# Page size of /api/files when a page is asked for without one, and the largest allowed
+DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 50))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 500))
+# Largest clip padding a client may ask for, in seconds
+MAX_CLIP_PAD = float(os.getenv('MAX_CLIP_PAD', 10))
+# Clips written with a run never change, so browsers keep them this long without asking again
+CLIP_MAX_AGE_S = int(os.getenv('CLIP_MAX_AGE_S', 365 * 24 * 3600))
+# Audio cut from source files is revalidated after this long, in case a source was replaced
+SOURCE_MAX_AGE_S = int(os.getenv('SOURCE_MAX_AGE_S', 3600))
+# Longest window of a source file /api/files/<file_id>/audio serves, and its read size
+MAX_SOURCE_WINDOW_S = float(os.getenv('MAX_SOURCE_WINDOW_S', 600))
+SOURCE_READ_BYTES = int(os.getenv('SOURCE_READ_BYTES', 256 * 1024))
+# Threads for slow filesystem work (removing deleted runs) done after the response is sent
+BACKGROUND_THREADS = int(os.getenv('BACKGROUND_THREADS', 2))
+# Deleted run directories are moved here, then removed in the background
+TRASH_DIR = os.path.join(DETECTION_RESULTS_DIR, '.cache', 'trash')
+
+background = ThreadPoolExecutor(max_workers=BACKGROUND_THREADS, thread_name_prefix='api-background')
 
 # Config file to store audio directory preference
 CONFIG_FILE = os.path.join(PROJECT_ROOT, '.audio_qa_config.json')
@@ -56,86 +92,102 @@ def set_audio_files_dir(path):
         print(f"Error writing config file: {e}")
         return False
 
-def get_processed_files():
-    """Scan detection_results directory and return list of processed files."""
-    files = []
-    
-    if not os.path.exists(DETECTION_RESULTS_DIR):
-        return files
-    
-    for item in os.listdir(DETECTION_RESULTS_DIR):
-        item_path = os.path.join(DETECTION_RESULTS_DIR, item)
-        if os.path.isdir(item_path):
-            # Look for report JSON files
-            for file in os.listdir(item_path):
-                if file.endswith('_report.json'):
-                    report_path = os.path.join(item_path, file)
-                    try:
-                        with open(report_path, 'r') as f:
-                            report_data = json.load(f)
-                        
-                        # Handle new format (object with title, file, overall_results, in_file_detections)
-                        # or old format (array of detections)
-                        if isinstance(report_data, dict):
-                            # New format
-                            base_name = report_data.get('file', file.replace('_report.json', ''))
-                            issue_count = len(report_data.get('in_file_detections', []))
-                        else:
-                            # Old format (backward compatibility)
-                            base_name = file.replace('_report.json', '')
-                            issue_count = len(report_data) if isinstance(report_data, list) else 0
-                        
-                        # Extract timestamp from directory name
-                        # Format: {base_name}_{timestamp} or just timestamp
-                        # Try to find timestamp pattern in directory name
-                        timestamp_str = None
-                        dir_parts = item.split('_')
-                        
-                        # Look for YYYY-MM-DD_HH-MM-SS pattern (last 2 parts if they match)
-                        if len(dir_parts) >= 2:
-                            potential_timestamp = '_'.join(dir_parts[-2:])
-                            try:
-                                datetime.strptime(potential_timestamp, '%Y-%m-%d_%H-%M-%S')
-                                timestamp_str = potential_timestamp
-                            except ValueError:
-                                pass
-                        
-                        # If no timestamp found, try the whole directory name
-                        if not timestamp_str:
-                            try:
-                                datetime.strptime(item, '%Y-%m-%d_%H-%M-%S')
-                                timestamp_str = item
-                            except ValueError:
-                                pass
-                        
-                        if timestamp_str:
-                            try:
-                                processed_date = datetime.strptime(timestamp_str, '%Y-%m-%d_%H-%M-%S')
-                                formatted_date = processed_date.strftime('%Y-%m-%d %H:%M:%S')
-                            except ValueError:
-                                formatted_date = item
-                        else:
-                            # Use directory modification time as fallback
-                            try:
-                                mtime = os.path.getmtime(item_path)
-                                formatted_date = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
-                            except:
-                                formatted_date = item
-                        
-                        files.append({
-                            'id': item,  # Use directory name as ID
-                            'name': base_name,
-                            'issueCount': issue_count,
-                            'processedDate': formatted_date,
-                            'reportPath': report_path
-                        })
-                    except Exception as e:
-                        print(f"Error reading report {report_path}: {e}")
-                        continue
-    
-    # Sort by processed date (newest first)
-    files.sort(key=lambda x: x['processedDate'], reverse=True)
-    return files
+def find_report_file(file_dir):
+    """Path of the report JSON in a results directory, or None."""
+    if not os.path.isdir(file_dir):
+        return None
+    for file in os.listdir(file_dir):
+        if file.endswith('_report.json'):
+            return os.path.join(file_dir, file)
+    return None
+
+def project(entry, fields):
+    """Keep only the requested keys of a dict (all of them when fields is None)."""
+    if fields is None:
+        return entry
+    return {k: v for k, v in entry.items() if k in fields}
+
+def parse_fields(args):
+    """The ?fields=a,b projection, or None."""
+    fields = args.get('fields')
+    return set(f.strip() for f in fields.split(',') if f.strip()) if fields else None
+
+def cached_json(payload, etag=None):
+    """
+    JSON response with an ETag (a hash of the body unless given) that answers
+    If-None-Match with 304. no-cache makes browsers revalidate instead of re-downloading.
+    """
+    response = jsonify(payload)
+    if etag is None:
+        response.add_etag()
+    else:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def audio_response(body, etag, last_modified, max_age, immutable=False, length=None):
+    """
+    audio/wav response with ETag, Last-Modified and Cache-Control that answers Range
+    with 206 and If-None-Match / If-Modified-Since with 304. body is bytes, or a
+    seekable stream of length bytes so a range only reads its part.
+    """
+    response = Response(body, mimetype='audio/wav', direct_passthrough=not isinstance(body, bytes))
+    if length is not None:
+        response.content_length = length
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(body) if length is None else length)
+
+def find_source(report_data):
+    """Path of the audio file a report was made from."""
+    return report_data.get('source') or os.path.join(get_audio_files_dir(), report_data['file'])
+
+def filter_detections(detections, args):
+    """
+    Detections matching ?type=a,b (case-insensitive), ?start=/?end= (seconds, overlapping
+    the range) and ?param.<name>=<value> (equal as numbers or strings).
+    """
+    types = args.get('type')
+    types = set(t.strip().lower() for t in types.split(',')) if types else None
+    start = args.get('start', type=float)
+    end = args.get('end', type=float)
+    param_filters = {k[len('param.'):]: v for k, v in args.items() if k.startswith('param.')}
+
+    def param_matches(value, wanted):
+        try:
+            return float(value) == float(wanted)
+        except (TypeError, ValueError):
+            return str(value) == wanted
+
+    matched = []
+    for d in detections:
+        if types is not None and d.get('type', '').lower() not in types:
+            continue
+        d_start = d.get('start')
+        d_end = d.get('end') if d.get('end') is not None else d_start
+        if start is not None and (d_end is None or d_end < start):
+            continue
+        if end is not None and (d_start is None or d_start > end):
+            continue
+        params = d.get('params') or {}
+        if any(name not in params or not param_matches(params[name], wanted) for name, wanted in param_filters.items()):
+            continue
+        matched.append(d)
+    return matched
+
+def get_processed_files(**query):
+    """Processed files from the report catalog, newest first; query is passed to ReportCatalog.query."""
+    return get_report_catalog().query(**query)
 
 @app.route('/api/open-cli', methods=['POST'])
 def open_cli():
@@ -182,61 +234,196 @@ def open_cli():
 
 @app.route('/api/files', methods=['GET'])
 def list_files():
-    """Get list of all processed files."""
+    """
+    Get list of processed files. With page or page_size the response is one page,
+    {files, total, page, page_size}; sort (date, name, issues), order (asc, desc),
+    name, date_from, date_to, min_issues and max_issues filter and order it, and
+    fields=a,b keeps only those keys of each file. Responses carry an ETag and honor
+    If-None-Match.
+    """
     try:
-        files = get_processed_files()
-        return jsonify(files)
+        args = request.args
+        query = {
+            'sort': args.get('sort', 'date'),
+            'order': args.get('order', 'desc'),
+            'name': args.get('name'),
+            'date_from': args.get('date_from'),
+            'date_to': args.get('date_to'),
+            'min_issues': args.get('min_issues', type=int),
+            'max_issues': args.get('max_issues', type=int),
+        }
+        paged = 'page' in args or 'page_size' in args
+        if paged:
+            query['page'] = max(args.get('page', 1, type=int), 1)
+            query['page_size'] = min(max(args.get('page_size', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+        try:
+            files, total = get_processed_files(**query)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        fields = parse_fields(args)
+        files = [project(f, fields) for f in files]
+        if not paged:
+            return cached_json(files)
+        return cached_json({'files': files, 'total': total, 'page': query['page'], 'page_size': query['page_size']})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/files/<file_id>/report', methods=['GET'])
 def get_report(file_id):
-    """Get detection report for a specific file."""
+    """
+    Get detection report for a specific file. in_file_detections can be filtered with
+    type, start, end and param.<name>, paged with offset and limit, and projected with
+    fields; the response then also has detections_total and next_offset (None on the
+    last page). Responses carry an ETag and honor If-None-Match.
+    """
     try:
         # Find the report file
         file_dir = os.path.join(DETECTION_RESULTS_DIR, file_id)
         if not os.path.exists(file_dir):
             return jsonify({'error': 'File not found'}), 404
         
-        # Look for report JSON
-        report_file = None
-        for file in os.listdir(file_dir):
-            if file.endswith('_report.json'):
-                report_file = os.path.join(file_dir, file)
-                break
-        
+        report_file = find_report_file(file_dir)
         if not report_file:
             return jsonify({'error': 'Report not found'}), 404
+
+        # Reports are written once, so the file's stat and the query identify the response
+        stat = os.stat(report_file)
+        etag = hashlib.md5(f"{report_file}|{stat.st_mtime_ns}|{stat.st_size}|{request.query_string.decode()}".encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
         
         with open(report_file, 'r') as f:
             report_data = json.load(f)
-        
-        return jsonify(report_data)
+
+        query_keys = {'type', 'start', 'end', 'offset', 'limit', 'fields'}
+        if isinstance(report_data, dict) and any(k in query_keys or k.startswith('param.') for k in request.args):
+            detections = filter_detections(report_data.get('in_file_detections', []), request.args)
+            offset = max(request.args.get('offset', 0, type=int), 0)
+            limit = request.args.get('limit', type=int)
+            page = detections[offset:] if limit is None else detections[offset:offset + max(limit, 0)]
+            fields = parse_fields(request.args)
+            next_offset = offset + len(page)
+            report_data = dict(report_data)
+            report_data['in_file_detections'] = [project(d, fields) for d in page]
+            report_data['detections_total'] = len(detections)
+            report_data['offset'] = offset
+            report_data['next_offset'] = next_offset if next_offset < len(detections) else None
+
+        return cached_json(report_data, etag)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/files/<file_id>/clips/<clip_filename>', methods=['GET'])
 def get_clip(file_id, clip_filename):
-    """Serve audio clip file for a specific detection."""
+    """
+    Serve the audio clip of a specific detection. Clips are cut from the source file
+    on request; ?pad=<seconds> overrides the padding the file was analyzed with.
+    """
     try:
+        from audio_processing.clips import CLIP_INDEX, read_clip, render_clip_wav, encode_wav
+
         # Find the clips directory
         file_dir = os.path.join(DETECTION_RESULTS_DIR, file_id)
         clips_dir = os.path.join(file_dir, 'clips')
         
-        if not os.path.exists(clips_dir):
-            return jsonify({'error': 'Clips directory not found'}), 404
-        
         clip_path = os.path.join(clips_dir, clip_filename)
         
         # Security check: ensure the clip is within the clips directory
         if not os.path.abspath(clip_path).startswith(os.path.abspath(clips_dir)):
             return jsonify({'error': 'Invalid clip path'}), 400
-        
-        if not os.path.exists(clip_path):
+
+        pad = request.args.get('pad', type=float)
+        if pad is not None and not 0 <= pad <= MAX_CLIP_PAD:
+            return jsonify({'error': f'pad must be between 0 and {MAX_CLIP_PAD} seconds'}), 400
+
+        if pad is None:
+            # Clips written during analysis, one file each or packed in a container.
+            # Runs are written once, so these never change.
+            if os.path.exists(clip_path):
+                response = send_from_directory(clips_dir, clip_filename, max_age=CLIP_MAX_AGE_S)
+                response.cache_control.public = True
+                response.cache_control.immutable = True
+                return response
+            index_path = os.path.join(clips_dir, CLIP_INDEX)
+            if os.path.exists(index_path):
+                stat = os.stat(index_path)
+                etag = hashlib.md5(f"{index_path}|{stat.st_mtime_ns}|{clip_filename}".encode()).hexdigest()
+                if request.if_none_match.contains(etag):
+                    return audio_response(b'', etag, stat.st_mtime, CLIP_MAX_AGE_S, immutable=True)
+                clip = read_clip(clips_dir, clip_filename)
+                if clip is not None:
+                    return audio_response(encode_wav(*clip), etag, stat.st_mtime, CLIP_MAX_AGE_S, immutable=True)
+
+        report_file = find_report_file(file_dir)
+        if not report_file:
+            return jsonify({'error': 'Report not found'}), 404
+        with open(report_file, 'r') as f:
+            report_data = json.load(f)
+
+        detection = None
+        for d in report_data.get('in_file_detections', []):
+            if d.get('clip', f"{d['type'].lower()}-{d['id']}.wav") == clip_filename:
+                detection = d
+                break
+        if detection is None:
             return jsonify({'error': 'Clip not found'}), 404
-        
-        # Serve the audio file
-        return send_from_directory(clips_dir, clip_filename)
+
+        source = find_source(report_data)
+        if not os.path.exists(source):
+            return jsonify({'error': 'Source audio not found'}), 404
+        if pad is None:
+            pad = report_data.get('clip_pad', 0.1)
+        end = detection['end'] if detection['end'] is not None else detection['start']
+
+        # The clip is fixed by the source's version, the detection's times and the padding
+        mtime = os.path.getmtime(source)
+        etag = hashlib.md5(f"{source}|{mtime}|{detection['start']}|{end}|{pad}".encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            return audio_response(b'', etag, mtime, SOURCE_MAX_AGE_S)
+        wav = render_clip_wav(source, mtime, detection['start'], end, pad)
+        return audio_response(wav, etag, mtime, SOURCE_MAX_AGE_S)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/files/<file_id>/audio', methods=['GET'])
+def get_source_audio(file_id):
+    """
+    Stream [start, end) seconds of the source file a run was made from, as 16-bit WAV,
+    for scrubbing long audio without downloading all of it. end defaults to
+    MAX_SOURCE_WINDOW_S past start. Range requests read only the frames they cover.
+    """
+    try:
+        from audio_processing.clips import SourceWindow, render_clip, encode_wav
+        import soundfile as sf
+
+        start = request.args.get('start', 0.0, type=float)
+        end = request.args.get('end', start + MAX_SOURCE_WINDOW_S, type=float)
+        if start < 0 or end <= start:
+            return jsonify({'error': 'start must be >= 0 and end must be after start'}), 400
+        if end - start > MAX_SOURCE_WINDOW_S:
+            return jsonify({'error': f'Window must be at most {MAX_SOURCE_WINDOW_S} seconds'}), 400
+
+        report_file = find_report_file(os.path.join(DETECTION_RESULTS_DIR, file_id))
+        if not report_file:
+            return jsonify({'error': 'Report not found'}), 404
+        with open(report_file, 'r') as f:
+            report_data = json.load(f)
+        source = find_source(report_data)
+        if not os.path.exists(source):
+            return jsonify({'error': 'Source audio not found'}), 404
+
+        stat = os.stat(source)
+        etag = hashlib.md5(f"{source}|{stat.st_mtime_ns}|{stat.st_size}|{start}|{end}".encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            return audio_response(b'', etag, stat.st_mtime, SOURCE_MAX_AGE_S)
+
+        try:
+            window = SourceWindow(source, start, end)
+        except sf.LibsndfileError:
+            # Formats libsndfile cannot seek are decoded up to the window instead
+            return audio_response(encode_wav(*render_clip(source, start, end, 0)), etag, stat.st_mtime, SOURCE_MAX_AGE_S)
+        body = wrap_file(request.environ, window, buffer_size=SOURCE_READ_BYTES)
+        return audio_response(body, etag, stat.st_mtime, SOURCE_MAX_AGE_S, length=window.size)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -263,8 +450,13 @@ def delete_files():
                     continue
                 
                 if os.path.exists(file_dir):
-                    shutil.rmtree(file_dir)
+                    # Renaming is quick; removing a run with many clips is not, so it happens after the response
+                    os.makedirs(TRASH_DIR, exist_ok=True)
+                    trash_dir = os.path.join(TRASH_DIR, f"{os.path.basename(os.path.normpath(file_dir))}_{uuid.uuid4().hex[:8]}")
+                    os.rename(file_dir, trash_dir)
+                    background.submit(shutil.rmtree, trash_dir, ignore_errors=True)
                     deleted.append(file_id)
+                    get_report_catalog().remove([file_id])
                 else:
                     errors.append({'file_id': file_id, 'error': 'File not found'})
             except Exception as e:
@@ -288,40 +480,33 @@ def export_files():
         if not file_ids or not isinstance(file_ids, list):
             return jsonify({'error': 'file_ids must be a non-empty array'}), 400
         
-        reports = []
-        errors = []
-        
-        for file_id in file_ids:
-            try:
-                file_dir = os.path.join(DETECTION_RESULTS_DIR, file_id)
-                if not os.path.exists(file_dir):
-                    errors.append({'file_id': file_id, 'error': 'File not found'})
-                    continue
-                
-                # Look for report JSON
-                report_file = None
-                for file in os.listdir(file_dir):
-                    if file.endswith('_report.json'):
-                        report_file = os.path.join(file_dir, file)
-                        break
-                
-                if not report_file:
-                    errors.append({'file_id': file_id, 'error': 'Report not found'})
-                    continue
-                
-                with open(report_file, 'r') as f:
-                    report_data = json.load(f)
-                    reports.append({
-                        'file_id': file_id,
-                        'report': report_data
-                    })
-            except Exception as e:
-                errors.append({'file_id': file_id, 'error': str(e)})
+        def stream():
+            # Reports are read and sent one at a time as the client takes them, so a
+            # large export neither builds the whole response in memory nor delays its first byte
+            errors = []
+            yield '{"reports": ['
+            first = True
+            for file_id in file_ids:
+                try:
+                    file_dir = os.path.join(DETECTION_RESULTS_DIR, file_id)
+                    if not os.path.exists(file_dir):
+                        errors.append({'file_id': file_id, 'error': 'File not found'})
+                        continue
+                    
+                    report_file = find_report_file(file_dir)
+                    if not report_file:
+                        errors.append({'file_id': file_id, 'error': 'Report not found'})
+                        continue
+                    
+                    with open(report_file, 'r') as f:
+                        report_data = json.load(f)
+                    yield ('' if first else ', ') + json.dumps({'file_id': file_id, 'report': report_data})
+                    first = False
+                except Exception as e:
+                    errors.append({'file_id': file_id, 'error': str(e)})
+            yield f'], "errors": {json.dumps(errors)}}}'
         
-        return jsonify({
-            'reports': reports,
-            'errors': errors
-        })
+        return Response(stream(), mimetype='application/json')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -353,16 +538,24 @@ def queue_job():
         file_names = data.get('file_names', [])
         detection_params = data.get('detection_params', {})
         clip_pad = data.get('clip_pad', 0.1)
+        mode = data.get('mode', 'auto')
+        # A single file is an interactive check unless said otherwise; more are a batch
+        priority = data.get('priority') or ('interactive' if len(file_names) == 1 else 'batch')
+        submitter = data.get('submitter') or request.headers.get('X-Submitter') or request.remote_addr or 'anonymous'
         
         if not file_names or not isinstance(file_names, list):
             return jsonify({'error': 'file_names must be a non-empty array'}), 400
         
         if not detection_params or not isinstance(detection_params, dict):
             return jsonify({'error': 'detection_params must be a dictionary'}), 400
+
+        if mode not in ('auto', 'fused', 'fanout', 'stream', 'parallel', 'sharded'):
+            return jsonify({'error': 'mode must be one of auto, fused, fanout, stream, parallel, sharded'}), 400
+
+        if priority not in lanes.PRIORITIES:
+            return jsonify({'error': f"priority must be one of {', '.join(lanes.PRIORITIES)}"}), 400
         
         # Import here to avoid circular imports
-        from audio_processing.audio_import import AudioLoader
-        from job_queue.worker import AudioDetectionJob
         from job_queue.analysis_types import ANALYSIS_TYPES
         from rq import Queue
         
@@ -372,139 +565,72 @@ def queue_job():
                 return jsonify({'error': f'Invalid detection type: {det_type}'}), 400
         
         AUDIO_FILES_DIR = get_audio_files_dir()
-        loader = AudioLoader(directory=AUDIO_FILES_DIR)
         
         # Queue the files
         try:
-            redis_conn = redis.from_url(REDIS_URL)
+            redis_conn = redis_pool.get_redis(REDIS_URL)
             redis_conn.ping()
-            job_queue = Queue(connection=redis_conn)
-            
-            queued = []
-            errors = []
-            
-            for file_name in file_names:
-                try:
-                    # Validate file exists
-                    file_path = os.path.join(AUDIO_FILES_DIR, file_name)
-                    if not os.path.exists(file_path):
-                        errors.append({'file': file_name, 'error': 'File not found'})
-                        continue
-                    
-                    # Create job and queue it
-                    job = AudioDetectionJob(loader, file_name, REDIS_URL, clip_pad=clip_pad)
-                    job_queue.enqueue(job.load_and_queue, detection_params)
-                    queued.append(file_name)
-                except Exception as e:
-                    errors.append({'file': file_name, 'error': str(e)})
-            
+
+            batch_id = batches.create_batch(redis_conn, len(file_names), priority, submitter)
+            submission = (REDIS_URL, batch_id, AUDIO_FILES_DIR, file_names, detection_params, clip_pad, mode, priority, submitter)
+
+            if len(file_names) > batches.SYNC_SUBMIT_MAX_FILES:
+                # Checking, probing and queueing many files happens in a worker; poll the batch for progress
+                Queue('fast', connection=redis_conn).enqueue(batches.submit_batch, *submission)
+                return jsonify({
+                    'message': f'Accepted {len(file_names)} file(s) for processing',
+                    'batch_id': batch_id,
+                    'accepted': len(file_names),
+                    'status_url': f'/api/queue/batch/{batch_id}'
+                }), 202
+
+            result = batches.submit_batch(*submission)
             return jsonify({
-                'message': f'Queued {len(queued)} file(s) for processing',
-                'queued': queued,
-                'errors': errors
+                'message': f"Queued {len(result['queued'])} file(s) for processing",
+                'batch_id': batch_id,
+                'queued': result['queued'],
+                'lanes': result['lanes'],
+                'errors': result['errors']
             })
         except redis.ConnectionError:
             return jsonify({'error': 'Redis not available. Please ensure Redis is running.'}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/queue/batch/<batch_id>', methods=['GET'])
+def get_batch_status(batch_id):
+    """Progress of a submission batch: files submitted, rejected, completed and failed, and per-file errors."""
+    try:
+        redis_conn = redis_pool.get_redis(REDIS_URL)
+        status = batches.batch_status(redis_conn, batch_id)
+        if status is None:
+            return jsonify({'error': 'Batch not found'}), 404
+        return jsonify(status)
+    except redis.ConnectionError:
+        return jsonify({'error': 'Redis not available. Please ensure Redis is running.'}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/queue/status', methods=['GET'])
 def get_queue_status():
-    """Get current queue status from Redis.
+    """Get current queue status from Redis: how many runs are in each state.
     
     Optional query parameter:
     - since: Unix timestamp - only count jobs created after this time
     """
     try:
-        redis_conn = redis.from_url(REDIS_URL)
+        redis_conn = redis_pool.get_redis(REDIS_URL)
         
         # Get optional 'since' timestamp parameter
         since_timestamp = request.args.get('since', type=int)
-        
-        # Get all job statuses
-        job_statuses = redis_conn.hgetall('job_status')
-        
-        # Filter by timestamp if provided and group by file
-        # Job keys are in format: {audio_base}_{type}_{timestamp}
-        # We want to group by {audio_base}_{timestamp} to count files, not individual detection jobs
-        
-        file_groups = {}  # Key: {audio_base}_{timestamp}, Value: list of (job_key, status)
-        
-        for job_key, status in job_statuses.items():
-            job_key_str = job_key.decode('utf-8') if isinstance(job_key, bytes) else job_key
-            status_str = status.decode('utf-8') if isinstance(status, bytes) else status
-            
-            # Extract timestamp from the key
-            try:
-                # Split by underscore and get the last part (timestamp)
-                parts = job_key_str.rsplit('_', 1)
-                if len(parts) == 2:
-                    job_timestamp = int(parts[1])
-                    
-                    # Filter by timestamp if provided
-                    if since_timestamp and job_timestamp < since_timestamp:
-                        continue
-                    
-                    # Extract file identifier: everything before the last underscore (which is timestamp)
-                    # But we need to remove the detection type too
-                    # Format is: {audio_base}_{type}_{timestamp}
-                    # We want: {audio_base}_{timestamp}
-                    file_key_parts = parts[0].rsplit('_', 1)  # Split to get {audio_base} and {type}
-                    if len(file_key_parts) == 2:
-                        audio_base = file_key_parts[0]
-                        file_key = f"{audio_base}_{parts[1]}"  # {audio_base}_{timestamp}
-                    else:
-                        # Fallback: use the whole thing before timestamp
-                        file_key = parts[0]
-                    
-                    if file_key not in file_groups:
-                        file_groups[file_key] = []
-                    file_groups[file_key].append((job_key_str, status_str))
-                else:
-                    # If we can't parse, treat each job as a separate file (backward compatibility)
-                    file_key = job_key_str
-                    if file_key not in file_groups:
-                        file_groups[file_key] = []
-                    file_groups[file_key].append((job_key_str, status_str))
-            except (ValueError, IndexError):
-                # If we can't parse, treat each job as a separate file (backward compatibility)
-                file_key = job_key_str
-                if file_key not in file_groups:
-                    file_groups[file_key] = []
-                file_groups[file_key].append((job_key_str, status_str))
-        
-        # Count files by their status
-        # A file is "completed" only when ALL its detection jobs are completed
-        # A file is "queued" if ANY of its detection jobs are queued (and not all completed)
-        # A file is "in progress" if it has some jobs in progress but not all completed
-        
-        completed_files = 0
-        queued_files = 0
-        in_progress_files = 0
-        
-        for file_key, jobs in file_groups.items():
-            statuses = [status for _, status in jobs]
-            
-            # Check if all jobs are completed
-            all_completed = all(s == 'completed' for s in statuses)
-            if all_completed:
-                completed_files += 1
-            else:
-                # Check if any job is queued
-                has_queued = any(s == 'queued' for s in statuses)
-                if has_queued:
-                    queued_files += 1
-                else:
-                    # Has some jobs in progress or other status
-                    in_progress_files += 1
-        
-        total = len(file_groups)
+        counts = run_status.queue_counts(redis_conn, since_timestamp)
         
         return jsonify({
-            'total': total,
-            'completed': completed_files,
-            'queued': queued_files,
-            'inProgress': in_progress_files
+            'total': sum(counts.values()),
+            'completed': counts['completed'],
+            'queued': counts['queued'],
+            'inProgress': counts['running'],
+            'failed': counts['failed']
         })
     except redis.ConnectionError:
         # Redis not available, return empty status
@@ -512,11 +638,83 @@ def get_queue_status():
             'total': 0,
             'completed': 0,
             'queued': 0,
-            'inProgress': 0
+            'inProgress': 0,
+            'failed': 0
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/queue/lanes', methods=['GET'])
+def get_queue_lanes():
+    """Depth of each queue lane: queued and running jobs, and jobs and submitters waiting for a fair turn."""
+    try:
+        redis_conn = redis_pool.get_redis(REDIS_URL)
+        return jsonify(lanes.lane_depths(redis_conn))
+    except redis.ConnectionError:
+        return jsonify({'error': 'Redis not available. Please ensure Redis is running.'}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Redis connection counts: this process's pool, each worker's pool, and the Redis server's clients."""
+    try:
+        return jsonify({'redis': redis_pool.connection_metrics(redis_pool.get_redis(REDIS_URL))})
+    except redis.ConnectionError:
+        return jsonify({'error': 'Redis not available. Please ensure Redis is running.'}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/queue/events', methods=['GET'])
+def queue_events():
+    """
+    Server-Sent Events stream of queue progress. The first event is a "snapshot" of
+    the number of runs in each state (optionally since a Unix timestamp given as
+    ?since=) and the runs:version it was read at; after that the workers' progress
+    events are relayed as they are published, so clients do not need to poll
+    /api/queue/status. Events carrying a version newer than the snapshot's are run
+    state changes (prev_state -> state) to apply to the counts.
+
+    All streams of a process share one Redis subscription. When SSE_MAX_CLIENTS
+    streams are open the request gets a 503 and the client polls instead.
+    """
+    since_timestamp = request.args.get('since', type=int)
+    hub = queue_events_hub.get_event_hub(REDIS_URL, QUEUE_EVENTS_CHANNEL)
+    client = None
+    try:
+        # Subscribe before taking the snapshot so no event falls in between
+        client = hub.subscribe()
+        if client is None:
+            return jsonify({'error': 'Too many open event streams, poll /api/queue/status instead'}), 503
+        counts, version = run_status.queue_snapshot(redis_pool.get_redis(REDIS_URL), since_timestamp)
+    except redis.ConnectionError:
+        if client is not None:
+            hub.unsubscribe(client)
+        return jsonify({'error': 'Redis not available. Please ensure Redis is running.'}), 503
+
+    def stream():
+        try:
+            yield f"data: {json.dumps({'event': 'snapshot', 'counts': counts, 'version': version})}\n\n"
+            # Ends when the server shuts down; EventSource clients then reconnect
+            while not serving.shutting_down.is_set():
+                try:
+                    data = client.get(timeout=SSE_KEEPALIVE_S)
+                except queue.Empty:
+                    # Comment line, keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                if data is None:
+                    # Dropped by the hub (too far behind, or Redis went away); the client reconnects
+                    break
+                if since_timestamp and json.loads(data).get('timestamp', 0) < since_timestamp:
+                    continue
+                yield f"data: {data}\n\n"
+        finally:
+            hub.unsubscribe(client)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """Handle file upload. File is saved but not automatically queued."""
@@ -558,7 +756,12 @@ def root():
             '/api': 'GET - List all API endpoints',
             '/api/files': 'GET - List all processed files',
             '/api/files/<file_id>/report': 'GET - Get detection report for a file',
+            '/api/files/<file_id>/audio': 'GET - Stream a time window of the source audio (?start=&end=)',
             '/api/queue/status': 'GET - Get queue status',
+            '/api/queue/events': 'GET - Stream queue progress (Server-Sent Events)',
+            '/api/queue/lanes': 'GET - Get queue depth per lane',
+            '/api/queue/batch/<batch_id>': 'GET - Get progress of a submission batch',
+            '/api/metrics': 'GET - Get Redis connection metrics',
             '/api/upload': 'POST - Upload audio file',
             '/api/health': 'GET - Health check'
         }
@@ -573,7 +776,12 @@ def api_info():
         'endpoints': {
             'files': '/api/files',
             'file_report': '/api/files/<file_id>/report',
+            'file_audio': '/api/files/<file_id>/audio',
             'queue_status': '/api/queue/status',
+            'queue_events': '/api/queue/events',
+            'queue_lanes': '/api/queue/lanes',
+            'queue_batch': '/api/queue/batch/<batch_id>',
+            'metrics': '/api/metrics',
             'upload': '/api/upload',
             'health': '/api/health'
         }
@@ -658,11 +866,18 @@ def health():
     return jsonify({'status': 'ok'})
 
 def main():
-    """Main entry point for the API server."""
+    """Main entry point for the API server. --prod serves with gunicorn (waitress on Windows) instead of the Flask dev server."""
+    prod = '--prod' in sys.argv[1:]
+
     # Ensure directories exist
     os.makedirs(DETECTION_RESULTS_DIR, exist_ok=True)
     audio_dir = get_audio_files_dir()
     os.makedirs(audio_dir, exist_ok=True)
+
+    # Finish removing runs deleted before a restart. A plain thread rather than the
+    # background pool, whose threads would not survive gunicorn forking its workers.
+    if os.path.isdir(TRASH_DIR):
+        threading.Thread(target=shutil.rmtree, args=(TRASH_DIR,), kwargs={'ignore_errors': True}).start()
     
     # Use port 5001 by default (5000 is often used by AirPlay on macOS)
     port = int(os.getenv('API_PORT', 5001))
@@ -673,7 +888,10 @@ def main():
     print(f"Redis URL: {REDIS_URL}")
     print(f"API server running on http://localhost:{port}")
     
-    app.run(host='0.0.0.0', port=port, debug=True)
+    if prod:
+        serving.serve(app, '0.0.0.0', port)
+    else:
+        app.run(host='0.0.0.0', port=port, debug=True)
 
 if __name__ == '__main__':
     main()
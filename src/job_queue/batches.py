@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import uuid
+
+from . import lanes
+from . import redis_pool
+from .run_status import RUN_STATUS_TTL_S
+
+# Submissions of up to this many files are queued during the request; larger ones are
+# validated, probed and queued by a worker job while the request returns a batch id
+SYNC_SUBMIT_MAX_FILES = int(os.getenv('SYNC_SUBMIT_MAX_FILES', 20))
+
+# Keys:
+#   batch:{id}          hash of counters (files, submitted, rejected, completed, failed),
+#                       state ("submitting" or "queued"), priority, submitter, created, lanes
+#   batch:{id}:errors   list of JSON {file, error} for files that could not be queued
+COUNTERS = ("files", "submitted", "rejected", "completed", "failed", "created")
+
+def create_batch(redis_conn, files: int, priority: str, submitter: str) -> str:
+    batch_id = uuid.uuid4().hex[:16]
+    pipe = redis_conn.pipeline()
+    pipe.hset(f"batch:{batch_id}", mapping={
+        "files": files, "submitted": 0, "rejected": 0, "completed": 0, "failed": 0,
+        "state": "submitting", "priority": priority, "submitter": submitter, "created": int(time.time())
+    })
+    pipe.expire(f"batch:{batch_id}", RUN_STATUS_TTL_S)
+    pipe.execute()
+    return batch_id
+
+def submit_batch(redis_url: str, batch_id: str, directory: str, file_names: list[str], detection_params: dict,
+                 clip_pad: float, mode: str, priority: str, submitter: str) -> dict:
+    """
+    Check and probe each file of a batch, then queue one load_and_queue job per file,
+    written with one pipeline per lane. Returns the queued file names, how many went
+    to each lane, and per-file errors.
+    """
+    # The worker module loads the detectors; only the process that submits needs it
+    from audio_processing.audio_import import AudioLoader
+    from .worker import AudioDetectionJob
+
+    redis_conn = redis_pool.get_redis(redis_url)
+    loader = AudioLoader.for_analysis(directory=directory)
+    calls = {}
+    queued = []
+    errors = []
+    for file_name in file_names:
+        try:
+            if not os.path.exists(os.path.join(directory, file_name)):
+                errors.append({'file': file_name, 'error': 'File not found'})
+                continue
+            lane = lanes.choose_lane(priority, loader.probe_duration(file_name))
+            job = AudioDetectionJob(loader, file_name, redis_url, clip_pad=clip_pad, queue_name=lane, batch_id=batch_id)
+            calls.setdefault(lane, []).append((job.load_and_queue, (detection_params, mode)))
+            queued.append(file_name)
+        except Exception as e:
+            errors.append({'file': file_name, 'error': str(e)})
+
+    lane_counts = {}
+    for lane, lane_calls in calls.items():
+        lanes.submit_many(redis_conn, lane, submitter, lane_calls)
+        lane_counts[lane] = len(lane_calls)
+
+    pipe = redis_conn.pipeline()
+    pipe.hset(f"batch:{batch_id}", mapping={
+        "submitted": len(queued), "rejected": len(errors), "state": "queued", "lanes": json.dumps(lane_counts)
+    })
+    if errors:
+        pipe.rpush(f"batch:{batch_id}:errors", *[json.dumps(error) for error in errors])
+        pipe.expire(f"batch:{batch_id}:errors", RUN_STATUS_TTL_S)
+    pipe.execute()
+    print(f"Batch {batch_id}: queued {len(queued)} file(s), {len(errors)} error(s)")
+    return {'queued': queued, 'lanes': lane_counts, 'errors': errors}
+
+def batch_status(redis_conn, batch_id: str) -> dict | None:
+    """Counters, state and errors of a batch, or None if there is no such batch (or it expired)."""
+    pipe = redis_conn.pipeline(transaction=False)
+    pipe.hgetall(f"batch:{batch_id}")
+    pipe.lrange(f"batch:{batch_id}:errors", 0, -1)
+    fields, errors = pipe.execute()
+    if not fields:
+        return None
+
+    status = {'batch_id': batch_id}
+    for name, value in fields.items():
+        name, value = name.decode('utf-8'), value.decode('utf-8')
+        status[name] = int(value) if name in COUNTERS else value
+    status['lanes'] = json.loads(status.get('lanes', '{}'))
+    status['errors'] = [json.loads(error) for error in errors]
+    finished = status['completed'] + status['failed']
+    if status['state'] == 'queued' and finished >= status['submitted']:
+        status['state'] = 'done'
+    status['pending'] = status['submitted'] - finished
+    return status
@@ -0,0 +1,118 @@
+import os
+from rq import Queue
+from rq.job import Job
+from rq.exceptions import NoSuchJobError
+from rq.registry import StartedJobRegistry
+
+# Queues in the order workers take jobs from them: short files first, then the
+# priorities from most to least urgent. "default" keeps jobs queued before lanes existed.
+LANES = ("fast", "interactive", "batch", "backfill", "default")
+PRIORITIES = ("interactive", "batch", "backfill")
+# Lanes whose submissions are shared out round-robin between submitters
+FAIR_LANES = ("batch", "backfill")
+
+# Files up to this long skip the interactive and batch lanes for the fast lane
+FAST_LANE_MAX_S = float(os.getenv('FAST_LANE_MAX_S', 60))
+# How many jobs a fair lane's RQ queue is topped up to; the rest wait per submitter
+FAIR_QUEUE_DEPTH = int(os.getenv('FAIR_QUEUE_DEPTH', 4))
+
+# Keys of a fair lane:
+#   fair:{lane}:ring               list of submitters with waiting jobs, rotated on each pick
+#   fair:{lane}:active             set of the same submitters
+#   fair:{lane}:jobs:{submitter}   list of the submitter's waiting RQ job ids
+_SUBMIT = """
+redis.call('RPUSH', KEYS[3], ARGV[2])
+if redis.call('SADD', KEYS[2], ARGV[1]) == 1 then
+    redis.call('LPUSH', KEYS[1], ARGV[1])
+end
+"""
+
+_PICK_NEXT = """
+for i = 1, redis.call('LLEN', KEYS[1]) do
+    local submitter = redis.call('RPOPLPUSH', KEYS[1], KEYS[1])
+    local jobs = ARGV[1] .. submitter
+    local job_id = redis.call('LPOP', jobs)
+    if redis.call('LLEN', jobs) == 0 then
+        redis.call('LREM', KEYS[1], 0, submitter)
+        redis.call('SREM', KEYS[2], submitter)
+    end
+    if job_id then
+        return job_id
+    end
+end
+return false
+"""
+
+def choose_lane(priority: str, duration: float | None) -> str:
+    """Lane for a file submitted at a priority; short files go to the fast lane unless backfilled."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+    if priority != "backfill" and duration is not None and duration <= FAST_LANE_MAX_S:
+        return "fast"
+    return priority
+
+def submit(redis_conn, lane: str, submitter: str, func, *args) -> str:
+    """
+    Queue func(*args) on a lane and return the RQ job id. On fair lanes the job waits
+    in the submitter's list until feed() moves it to the RQ queue.
+    """
+    return submit_many(redis_conn, lane, submitter, [(func, args)])[0]
+
+def submit_many(redis_conn, lane: str, submitter: str, calls: list[tuple]) -> list[str]:
+    """submit() for a list of (func, args) calls, written to Redis in one pipeline."""
+    if not calls:
+        return []
+    if lane not in FAIR_LANES:
+        queue = Queue(lane, connection=redis_conn)
+        return [job.id for job in queue.enqueue_many([Queue.prepare_data(func, args) for func, args in calls])]
+
+    pipe = redis_conn.pipeline()
+    job_ids = []
+    for func, args in calls:
+        job = Job.create(func, args=args, connection=redis_conn, origin=lane)
+        job.save(pipeline=pipe)
+        pipe.eval(_SUBMIT, 3, f"fair:{lane}:ring", f"fair:{lane}:active", f"fair:{lane}:jobs:{submitter}",
+                  submitter, job.id)
+        job_ids.append(job.id)
+    pipe.execute()
+    feed(redis_conn, lane)
+    return job_ids
+
+def feed(redis_conn, lane: str) -> int:
+    """Top a fair lane's RQ queue up to FAIR_QUEUE_DEPTH, one job per submitter in turn. Returns how many were moved."""
+    queue = Queue(lane, connection=redis_conn)
+    fed = 0
+    while queue.count < FAIR_QUEUE_DEPTH:
+        job_id = redis_conn.eval(_PICK_NEXT, 2, f"fair:{lane}:ring", f"fair:{lane}:active", f"fair:{lane}:jobs:")
+        if job_id is None:
+            break
+        try:
+            job = Job.fetch(job_id.decode('utf-8'), connection=redis_conn)
+        except NoSuchJobError:
+            continue
+        queue.enqueue_job(job)
+        fed += 1
+    return fed
+
+def feed_all(redis_conn) -> int:
+    return sum(feed(redis_conn, lane) for lane in FAIR_LANES)
+
+def lane_depths(redis_conn) -> dict:
+    """Per lane: jobs in the RQ queue, jobs running, and jobs and submitters still waiting for a fair turn."""
+    depths = {}
+    for lane in LANES:
+        queue = Queue(lane, connection=redis_conn)
+        depths[lane] = {
+            "queued": queue.count,
+            "running": StartedJobRegistry(queue=queue).count,
+            "waiting": 0,
+            "submitters": 0
+        }
+    for lane in FAIR_LANES:
+        submitters = [s.decode('utf-8') for s in redis_conn.smembers(f"fair:{lane}:active")]
+        pipe = redis_conn.pipeline(transaction=False)
+        for submitter in submitters:
+            pipe.llen(f"fair:{lane}:jobs:{submitter}")
+        depths[lane]["waiting"] = sum(pipe.execute()) if submitters else 0
+        depths[lane]["submitters"] = len(submitters)
+    return depths
@@ -0,0 +1,158 @@
+import inspect
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+from audio_processing.features import FeatureCache
+from .analysis_types import ANALYSIS_TYPES
+
+class SharedSignal:
+    """A 1-D sample array copied once into multiprocessing shared memory."""
+    def __init__(self, data: np.ndarray):
+        data = np.ascontiguousarray(data)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        np.ndarray(data.shape, dtype=data.dtype, buffer=self.shm.buf)[:] = data
+        self.spec = (self.shm.name, data.shape, data.dtype.str)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+def plan_shards(num_samples: int, shard_len: int, align: int, overlap: int) -> list[tuple[int, int, int, int]]:
+    """
+    Split [0, num_samples) into cores of about shard_len samples starting on multiples
+    of align. Returns (read_start, core_start, core_end, read_end) per shard, where the
+    read range extends the core by overlap (rounded up to align) on both sides.
+    """
+    align = max(int(align), 1)
+    shard_len = max(int(shard_len) // align, 1) * align
+    overlap = -(-int(overlap) // align) * align
+    shards = []
+    for core_start in range(0, num_samples, shard_len):
+        core_end = min(core_start + shard_len, num_samples)
+        shards.append((max(core_start - overlap, 0), core_start, core_end, min(core_end + overlap, num_samples)))
+    return shards
+
+def _shift(result, offset_s: float):
+    """Move one slice's in-file result from slice time to file time."""
+    shifted = []
+    for det in result:
+        if isinstance(det, tuple):
+            shifted.append((det[0] + offset_s, det[1] + offset_s) + tuple(det[2:]))
+        else:
+            shifted.append(det + offset_s)
+    return shifted
+
+# Slack when comparing region times with shard bounds, far below one sample
+SEAM_EPS_S = 1e-9
+
+def merge_shards(pieces: list[tuple[float, float, list]], merge: str) -> list:
+    """
+    Combine per-slice results given as (core_start_s, core_end_s, shifted result).
+    "windows" keeps items that start inside their slice's core. "regions" clips each
+    (start, end[, value]) region to its core and joins a region cut at a core's end
+    with the region cut at the next core's start, keeping the max value. Regions that
+    merely touch are left apart, as the detector run on the whole file leaves them.
+    """
+    if merge == "windows":
+        return [det for core_start, core_end, result in pieces for det in result
+                if core_start <= (det[0] if isinstance(det, tuple) else det) < core_end]
+
+    regions = []
+    # Whether the last region kept was cut at its core's end
+    open_end = False
+    for core_start, core_end, result in sorted(pieces, key=lambda piece: piece[0]):
+        prev_open, open_end = open_end, False
+        for det in sorted(result):
+            start, end = max(det[0], core_start), min(det[1], core_end)
+            if end - start <= SEAM_EPS_S:
+                # Outside the core, or a region starting on the seam that the shift
+                # to file time moved a rounding error into this core
+                continue
+            cut_start = det[0] < core_start - SEAM_EPS_S
+            if prev_open and cut_start and regions and abs(regions[-1][1] - core_start) <= SEAM_EPS_S:
+                # The same region, split at the seam
+                last = regions[-1]
+                regions[-1] = (last[0], end) + tuple(max(a, b) for a, b in zip(last[2:], det[2:]))
+            else:
+                regions.append((start, end) + tuple(det[2:]))
+            prev_open = False
+            open_end = det[1] > core_end + SEAM_EPS_S
+    return [tuple(v.item() if isinstance(v, np.generic) else v for v in region) for region in regions]
+
+def run_on_slice(det_type: str, params: dict, audio: np.ndarray, sr: int, read_start: int):
+    """Run one analysis (with filled-in params) on a slice starting at sample read_start; times come back in file time."""
+    func = ANALYSIS_TYPES[det_type]['func']
+    extra = {}
+    if 'features' in inspect.signature(func).parameters:
+        extra['features'] = FeatureCache(audio, sr)
+    result = func(audio, sr, **params, **extra)
+    if ANALYSIS_TYPES[det_type]['type'] != 'in-file':
+        return result
+    return _shift(result, read_start / sr)
+
+def _run_slice(det_type: str, params: dict, spec, sr: int, read_start: int, read_end: int):
+    """Pool task: run one analysis on samples [read_start, read_end) of a shared signal."""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        audio = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)[read_start:read_end]
+        result = run_on_slice(det_type, params, audio, sr, read_start)
+        # Views of the segment must be gone before it can be closed
+        del audio
+    finally:
+        shm.close()
+    return result
+
+_pool = None
+_pool_workers = 0
+
+def get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool kept for the life of the worker, so interpreter start-up is paid once."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != max_workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        _pool_workers = max_workers
+    return _pool
+
+def run_parallel(signals: dict, base_sr: int, analyses: dict, max_workers: int, shard_s: float) -> dict:
+    """
+    Run analyses concurrently in a process pool. signals maps each sample rate to the
+    audio at that rate, with base_sr used by analyses that need no particular rate;
+    analyses maps analysis types to filled-in params. Analyses with a
+    "shard" function are also split into overlapping time slices of about shard_s.
+    Returns the raw detector result per analysis type.
+    """
+    shared = {sr: SharedSignal(data) for sr, data in signals.items()}
+    try:
+        pool = get_pool(max_workers)
+        futures = {}
+        for det_type, params in analyses.items():
+            sr = ANALYSIS_TYPES[det_type].get('sr') or base_sr
+            n = len(signals[sr])
+            shard = ANALYSIS_TYPES[det_type].get('shard')
+            if shard is None:
+                plan = [(0, 0, n, n)]
+            else:
+                align, overlap = shard(sr, **params)
+                plan = plan_shards(n, int(shard_s * sr), align, overlap)
+            futures[det_type] = [
+                (core_start / sr, core_end / sr,
+                 pool.submit(_run_slice, det_type, params, shared[sr].spec, sr, read_start, read_end))
+                for read_start, core_start, core_end, read_end in plan
+            ]
+
+        results = {}
+        for det_type, slices in futures.items():
+            if len(slices) == 1:
+                results[det_type] = slices[0][2].result()
+            else:
+                pieces = [(core_start, core_end, future.result()) for core_start, core_end, future in slices]
+                results[det_type] = merge_shards(pieces, ANALYSIS_TYPES[det_type]['shard_merge'])
+        return results
+    finally:
+        for signal in shared.values():
+            signal.close()
@@ -1,10 +1,12 @@
 import os
 import json
-import redis
 from rq import Queue
 from audio_processing.audio_import import AudioLoader
 from .worker import AudioDetectionJob, simulate_artifacts
 from .analysis_types import USER_JOB_TYPES, ANALYSIS_TYPES
+from . import lanes
+from . import redis_pool
+import getpass
 import multiprocessing
 from typing import List
 import soundfile as sf
@@ -75,11 +77,11 @@ def main():
     multiprocessing.set_start_method("spawn", force=True)
     # Get the current configured directory (in case it changed)
     audio_dir = get_audio_files_dir()
-    loader = AudioLoader(directory=audio_dir)
+    loader = AudioLoader.for_analysis(directory=audio_dir)
 
     # Establish Redis connection and validate
     try:
-        redis_conn = redis.from_url("redis://localhost:6379/0")
+        redis_conn = redis_pool.get_redis("redis://localhost:6379/0")
         redis_conn.ping()
     except Exception as exc:
         print(f"Warning: could not connect to Redis at default URL: {exc}")
@@ -101,7 +103,7 @@ def main():
         if get_audio_files_dir() != loader.directory:
             audio_dir = get_audio_files_dir()
             print(f"Audio directory changed. Using new directory: {audio_dir}")
-            loader = AudioLoader(directory=audio_dir)
+            loader = AudioLoader.for_analysis(directory=audio_dir)
 
         if choice == "1":
             clear_screen()
@@ -162,6 +164,14 @@ def main():
                 continue
 
             selected_files = [files[i] for i in file_indices]
+            default_priority = "interactive" if len(selected_files) == 1 else "batch"
+            priority = safe_input(f"Enter priority ({', '.join(lanes.PRIORITIES)}) [press Enter to use default ({default_priority})]: ")
+            if priority not in lanes.PRIORITIES:
+                if priority:
+                    print(f"Invalid priority; using {default_priority}.")
+                priority = default_priority
+            submitter = getpass.getuser()
+
             for audio_file_path in selected_files:
                 # Validate file exists
                 abs_path = os.path.join(loader.directory, audio_file_path)
@@ -169,10 +179,11 @@ def main():
                     print(f"File not found: {abs_path}; skipping.")
                     safe_input("Press Enter to continue...")
                     continue
-                job = AudioDetectionJob(loader, audio_file_path, clip_pad=clip_padding)
+                lane = lanes.choose_lane(priority, loader.probe_duration(audio_file_path))
+                job = AudioDetectionJob(loader, audio_file_path, clip_pad=clip_padding, queue_name=lane)
                 try:
-                    job_queue.enqueue(job.load_and_queue, detection_params)
-                    print(f"Queued detection job for {audio_file_path}")
+                    lanes.submit(redis_conn, lane, submitter, job.load_and_queue, detection_params)
+                    print(f"Queued detection job for {audio_file_path} on the {lane} lane")
                 except Exception as exc:
                     print(f"Failed to enqueue job for {audio_file_path}: {exc}")
                     safe_input("Press Enter to continue...")
@@ -0,0 +1,119 @@
+"""
+Fan-out of the workers' progress events to /api/queue/events streams: one pub/sub
+subscription per API process, on a connection of its own, feeding a queue per client.
+"""
+import os
+import queue
+import threading
+import time
+import redis
+from . import redis_pool
+from .serving import API_THREADS
+
+# Events buffered for a slow client before it is dropped; its EventSource then
+# reconnects and starts again from a fresh snapshot
+SSE_CLIENT_QUEUE = int(os.getenv('SSE_CLIENT_QUEUE', 1000))
+# Event streams one API process serves at once. Each holds a request thread, so this
+# stays below API_THREADS to leave threads for the other routes; clients turned away
+# poll /api/queue/status instead.
+SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', max(API_THREADS // 2, 1)))
+# How long a new stream waits for the subscription to be up before giving up
+SSE_SUBSCRIBE_TIMEOUT_S = float(os.getenv('SSE_SUBSCRIBE_TIMEOUT_S', 5))
+
+_hubs = {}
+_lock = threading.Lock()
+
+class EventHub:
+    """
+    Relays messages of one pub/sub channel to every connected client's queue. The
+    subscriber thread starts with the first client; if the subscription drops, every
+    client gets None (end of stream) so it reconnects and resyncs.
+    """
+    def __init__(self, redis_url: str, channel: str, max_clients: int = SSE_MAX_CLIENTS):
+        self.redis_url = redis_url
+        self.channel = channel
+        self.max_clients = max_clients
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.subscribed = threading.Event()
+        self.thread = None
+
+    def subscribe(self) -> queue.Queue | None:
+        """
+        Register a client and return its queue of message payloads, once the channel
+        subscription is active; None if max_clients streams are already open.
+        Raises redis.ConnectionError if Redis cannot be subscribed to in time.
+        """
+        with self.lock:
+            if len(self.clients) >= self.max_clients:
+                return None
+            client = queue.Queue(maxsize=SSE_CLIENT_QUEUE)
+            self.clients.add(client)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='queue-events', daemon=True)
+                self.thread.start()
+        if not self.subscribed.wait(SSE_SUBSCRIBE_TIMEOUT_S):
+            self.unsubscribe(client)
+            raise redis.ConnectionError(f"Could not subscribe to {self.channel}")
+        return client
+
+    def unsubscribe(self, client: queue.Queue):
+        with self.lock:
+            self.clients.discard(client)
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = redis_pool.get_dedicated(self.redis_url).pubsub()
+                pubsub.subscribe(self.channel)
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    if message['type'] == 'subscribe':
+                        # Confirmed, so nothing published from now on is missed
+                        self.subscribed.set()
+                    elif message['type'] == 'message':
+                        data = message['data']
+                        self._send(data.decode('utf-8') if isinstance(data, bytes) else data)
+            except redis.RedisError as e:
+                print(f"[WARN] Queue event subscription lost, retrying: {e}")
+                self.subscribed.clear()
+                self._drop_all()
+                time.sleep(1)
+
+    def _send(self, data: str):
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.put_nowait(data)
+            except queue.Full:
+                # Too far behind; end its stream so it resyncs from a snapshot
+                self._drop(client)
+
+    def _drop(self, client: queue.Queue):
+        self.unsubscribe(client)
+        try:
+            while True:
+                client.get_nowait()
+        except queue.Empty:
+            pass
+        client.put_nowait(None)
+
+    def _drop_all(self):
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            self._drop(client)
+
+def get_event_hub(redis_url: str, channel: str) -> EventHub:
+    """Process-wide EventHub for a Redis URL and channel."""
+    key = (redis_url, channel)
+    hub = _hubs.get(key)
+    if hub is None:
+        with _lock:
+            hub = _hubs.get(key)
+            if hub is None:
+                hub = _hubs[key] = EventHub(redis_url, channel)
+    return hub
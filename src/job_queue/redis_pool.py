@@ -0,0 +1,120 @@
+import os
+import socket
+import threading
+import redis
+
+# Most connections one process keeps open to Redis; callers wait for a free one beyond that.
+# Each open /api/queue/events stream holds one for as long as it is open.
+REDIS_POOL_SIZE = int(os.getenv('REDIS_POOL_SIZE', 50))
+# How long a caller waits for a free pooled connection before a ConnectionError
+REDIS_POOL_TIMEOUT_S = float(os.getenv('REDIS_POOL_TIMEOUT_S', 5))
+# Idle pooled connections are PINGed before reuse once they have been idle this long
+REDIS_HEALTH_CHECK_S = int(os.getenv('REDIS_HEALTH_CHECK_S', 30))
+# Workers publish their pool counters under redis_pool:{host}:{pid} for this long
+REDIS_POOL_STATS_TTL_S = int(os.getenv('REDIS_POOL_STATS_TTL_S', 300))
+
+_clients = {}
+_lock = threading.Lock()
+
+class CountingConnectionPool(redis.BlockingConnectionPool):
+    """BlockingConnectionPool that counts the connections it opened and has checked out, for pool_stats()."""
+    def reset(self):
+        super().reset()
+        self.count_lock = threading.Lock()
+        self.created = 0
+        self.checked_out = set()
+
+    def make_connection(self):
+        connection = super().make_connection()
+        with self.count_lock:
+            self.created += 1
+        return connection
+
+    def get_connection(self, *args, **kwargs):
+        connection = super().get_connection(*args, **kwargs)
+        with self.count_lock:
+            self.checked_out.add(connection)
+        return connection
+
+    def release(self, connection):
+        with self.count_lock:
+            self.checked_out.discard(connection)
+        super().release(connection)
+
+def get_redis(url: str) -> redis.Redis:
+    """
+    Process-wide client for a Redis URL, backed by a blocking connection pool, so API
+    handlers and worker jobs reuse connections instead of opening one per call.
+    The pool reconnects by itself in a forked child.
+    """
+    client = _clients.get(url)
+    if client is None:
+        with _lock:
+            client = _clients.get(url)
+            if client is None:
+                pool = CountingConnectionPool.from_url(
+                    url,
+                    max_connections=REDIS_POOL_SIZE,
+                    timeout=REDIS_POOL_TIMEOUT_S,
+                    health_check_interval=REDIS_HEALTH_CHECK_S,
+                    socket_keepalive=True
+                )
+                client = _clients[url] = redis.Redis(connection_pool=pool)
+    return client
+
+def get_dedicated(url: str) -> redis.Redis:
+    """
+    Client with a connection of its own, for a long blocking read (a pub/sub
+    subscription) that should not hold one of the pool's connections.
+    """
+    return redis.Redis.from_url(url, socket_keepalive=True, health_check_interval=REDIS_HEALTH_CHECK_S)
+
+def pool_stats() -> dict:
+    """Connection counts of this process's pools: size, opened, in use and idle."""
+    stats = {"max": 0, "created": 0, "in_use": 0, "idle": 0}
+    for client in list(_clients.values()):
+        pool = client.connection_pool
+        with pool.count_lock:
+            created, in_use = pool.created, len(pool.checked_out)
+        stats["max"] += pool.max_connections
+        stats["created"] += created
+        stats["in_use"] += in_use
+        stats["idle"] += created - in_use
+    return stats
+
+def publish_pool_stats(redis_conn, role: str = "worker"):
+    """Store this process's pool counters in Redis so the API can report them for every worker."""
+    key = f"redis_pool:{socket.gethostname()}:{os.getpid()}"
+    pipe = redis_conn.pipeline()
+    pipe.hset(key, mapping={"role": role, **pool_stats()})
+    pipe.expire(key, REDIS_POOL_STATS_TTL_S)
+    pipe.execute()
+
+def connection_metrics(redis_conn) -> dict:
+    """
+    Pool counters of this process and of each worker that published them recently,
+    plus the Redis server's own client counts; a fast growing total_connections_received
+    means something is still opening a connection per call.
+    """
+    processes = {}
+    for key in redis_conn.scan_iter(match="redis_pool:*", count=100):
+        fields = {name.decode('utf-8'): value.decode('utf-8') for name, value in redis_conn.hgetall(key).items()}
+        if fields:
+            processes[key.decode('utf-8').split(':', 1)[1]] = {
+                name: value if name == "role" else int(value) for name, value in fields.items()
+            }
+    metrics = {"pool": pool_stats(), "workers": processes}
+    try:
+        clients = redis_conn.info("clients")
+        server_stats = redis_conn.info("stats")
+    except redis.ResponseError as e:
+        # Some hosted Redis deployments disable INFO
+        print(f"[WARN] Could not read Redis server stats: {e}")
+        return metrics
+    metrics["server"] = {
+        "connected_clients": clients.get("connected_clients"),
+        "blocked_clients": clients.get("blocked_clients"),
+        "total_connections_received": server_stats.get("total_connections_received"),
+        "rejected_connections": server_stats.get("rejected_connections")
+    }
+    return metrics
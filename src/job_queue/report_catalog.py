@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import sqlite3
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+DETECTION_RESULTS_DIR = os.path.join(PROJECT_ROOT, 'detection_results')
+
+# SQLite catalog of finished reports, so listing runs does not read every report
+REPORT_CATALOG_PATH = os.getenv('REPORT_CATALOG_PATH', os.path.join(DETECTION_RESULTS_DIR, ".cache", "reports.sqlite3"))
+
+# API sort names to catalog columns
+SORT_COLUMNS = {"date": "processed_date", "name": "name", "issues": "issue_count"}
+
+def parse_run_date(run_id: str, run_dir: str) -> str:
+    """Processed date of a run from its directory name ({base}_YYYY-MM-DD_HH-MM-SS), else its mtime."""
+    for timestamp_str in ('_'.join(run_id.split('_')[-2:]), run_id):
+        try:
+            return datetime.strptime(timestamp_str, '%Y-%m-%d_%H-%M-%S').strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+    try:
+        return datetime.fromtimestamp(os.path.getmtime(run_dir)).strftime('%Y-%m-%d %H:%M:%S')
+    except OSError:
+        return run_id
+
+def describe_report(report_path: str, report_data=None) -> dict:
+    """Catalog entry (as returned by /api/files) for a report file; report_data saves reading it again."""
+    run_dir = os.path.dirname(report_path)
+    run_id = os.path.basename(run_dir)
+    if report_data is None:
+        with open(report_path, 'r') as f:
+            report_data = json.load(f)
+
+    # Reports are objects with title, file, overall_results and in_file_detections;
+    # old ones are a bare array of detections
+    if isinstance(report_data, dict):
+        name = report_data.get('file', os.path.basename(report_path).replace('_report.json', ''))
+        issue_count = len(report_data.get('in_file_detections', []))
+    else:
+        name = os.path.basename(report_path).replace('_report.json', '')
+        issue_count = len(report_data) if isinstance(report_data, list) else 0
+
+    return {
+        'id': run_id,
+        'name': name,
+        'issueCount': issue_count,
+        'processedDate': parse_run_date(run_id, run_dir),
+        'reportPath': report_path
+    }
+
+class ReportCatalog:
+    """
+    Index of report runs kept in SQLite. Workers add a run when they write its report;
+    listing, paging, sorting and filtering then only touch the rows asked for.
+    """
+    def __init__(self, path: str = REPORT_CATALOG_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    issue_count INTEGER NOT NULL,
+                    processed_date TEXT NOT NULL,
+                    report_path TEXT NOT NULL
+                )
+            """)
+            for column in SORT_COLUMNS.values():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS reports_{column} ON reports ({column}, id)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Several workers may write at once; wait for the lock instead of failing
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, entry: dict):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO reports (id, name, issue_count, processed_date, report_path) VALUES (?, ?, ?, ?, ?)",
+                (entry['id'], entry['name'], entry['issueCount'], entry['processedDate'], entry['reportPath'])
+            )
+
+    def remove(self, run_ids: list[str]):
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM reports WHERE id = ?", [(run_id,) for run_id in run_ids])
+
+    def is_empty(self) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM reports LIMIT 1").fetchone() is None
+
+    def query(self, page: int = 1, page_size: int = None, sort: str = "date", order: str = "desc",
+              name: str = None, date_from: str = None, date_to: str = None,
+              min_issues: int = None, max_issues: int = None) -> tuple[list[dict], int]:
+        """
+        One page of entries and the number of entries matching the filters. name matches
+        a case-insensitive substring; dates are 'YYYY-MM-DD[ HH:MM:SS]' and inclusive.
+        page_size None returns every match.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_COLUMNS)}")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be asc or desc")
+
+        where = []
+        args = []
+        if name:
+            where.append("instr(lower(name), lower(?)) > 0")
+            args.append(name)
+        if date_from:
+            where.append("processed_date >= ?")
+            args.append(date_from)
+        if date_to:
+            where.append("processed_date <= ?")
+            args.append(date_to if len(date_to) > 10 else date_to + " 23:59:59")
+        if min_issues is not None:
+            where.append("issue_count >= ?")
+            args.append(min_issues)
+        if max_issues is not None:
+            where.append("issue_count <= ?")
+            args.append(max_issues)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        column = SORT_COLUMNS[sort]
+        sql = f"SELECT id, name, issue_count, processed_date, report_path FROM reports {where_sql} ORDER BY {column} {order}, id {order}"
+        page_args = []
+        if page_size is not None:
+            sql += " LIMIT ? OFFSET ?"
+            page_args = [page_size, (max(page, 1) - 1) * page_size]
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, args + page_args).fetchall()
+            total = conn.execute(f"SELECT COUNT(*) FROM reports {where_sql}", args).fetchone()[0]
+        entries = [
+            {'id': row[0], 'name': row[1], 'issueCount': row[2], 'processedDate': row[3], 'reportPath': row[4]}
+            for row in rows
+        ]
+        return entries, total
+
+    def reindex(self, results_dir: str = DETECTION_RESULTS_DIR) -> int:
+        """Rebuild the catalog from the report files under results_dir. Returns the number of runs found."""
+        entries = []
+        if os.path.exists(results_dir):
+            for item in os.listdir(results_dir):
+                item_path = os.path.join(results_dir, item)
+                if not os.path.isdir(item_path):
+                    continue
+                for file in os.listdir(item_path):
+                    if file.endswith('_report.json'):
+                        report_path = os.path.join(item_path, file)
+                        try:
+                            entries.append(describe_report(report_path))
+                        except Exception as e:
+                            print(f"Error reading report {report_path}: {e}")
+                        break
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM reports")
+            conn.executemany(
+                "INSERT OR REPLACE INTO reports (id, name, issue_count, processed_date, report_path) VALUES (?, ?, ?, ?, ?)",
+                [(e['id'], e['name'], e['issueCount'], e['processedDate'], e['reportPath']) for e in entries]
+            )
+        return len(entries)
+
+_catalog = None
+
+def get_report_catalog() -> ReportCatalog:
+    """Process-wide catalog; an empty one is filled from the existing run directories once."""
+    global _catalog
+    if _catalog is None:
+        _catalog = ReportCatalog()
+        if _catalog.is_empty():
+            _catalog.reindex()
+    return _catalog
+
+def main():
+    """Rebuild the report catalog from detection_results (or the directory given)."""
+    results_dir = sys.argv[1] if len(sys.argv) > 1 else DETECTION_RESULTS_DIR
+    count = ReportCatalog().reindex(results_dir)
+    print(f"Indexed {count} report(s) from {results_dir} into {REPORT_CATALOG_PATH}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import os
+import json
+import hashlib
+import tempfile
+from audio_processing.utils import Detection
+
+class ResultCache:
+    """
+    Persistent cache of detector output.
+
+    Entries are keyed by (audio content key, detector name, detector version,
+    normalized params), so a file that was already analyzed with the same settings
+    gets its detections back without running the detector again. With max_bytes set,
+    least recently used entries are deleted once the cache grows past it.
+    """
+    def __init__(self, directory: str, max_bytes: int = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def normalize_params(params: dict) -> str:
+        """Canonical form of detector params: sorted keys, and ints and floats that are equal compare equal."""
+        def normalize(value):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return value
+            return float(value)
+        return json.dumps({k: normalize(v) for k, v in params.items()}, sort_keys=True)
+
+    @staticmethod
+    def key_for(audio_key: str, det_type: str, version: int, params: dict, **extra) -> str:
+        """extra holds anything else that changes the detector input, e.g. the rate it runs at."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{audio_key}|{det_type}|{version}|{ResultCache.normalize_params(params)}".encode('utf-8'))
+        for name, value in sorted(extra.items()):
+            digest.update(f"|{name}={value}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> list[Detection] | None:
+        try:
+            with open(self._path(key), 'r') as f:
+                entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            # Mark the entry used; access times are often not updated on reads
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return [Detection.det_from_string(entry) for entry in entries]
+
+    def put(self, key: str, detections: list[Detection]):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.json.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump([str(d) for d in detections], f)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.prune(keep=key)
+
+    def prune(self, keep: str = None):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        if self.max_bytes is None:
+            return
+        entries = []
+        total = 0
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                continue
+            total += stat.st_size
+            if filename != f"{keep}.json":
+                entries.append((stat.st_mtime, stat.st_size, filename))
+
+        for _, size, filename in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, filename))
+                total -= size
+            except FileNotFoundError:
+                continue
@@ -0,0 +1,174 @@
+import os
+
+# Run status is kept for this long after its last update, then expires
+RUN_STATUS_TTL_S = int(os.getenv('RUN_STATUS_TTL_S', 7 * 24 * 3600))
+
+# Runs one run_summaries call returns at most
+RUN_SUMMARY_PAGE_SIZE = int(os.getenv('RUN_SUMMARY_PAGE_SIZE', 100))
+
+# Run states, in the order a run moves through them ("failed" can follow any)
+STATES = ("queued", "running", "completed", "failed")
+
+# Keys:
+#   run_status:{run}  hash of the run's counters (total and one per status), its state,
+#                     file and timestamp
+#   run_jobs:{run}    hash of detector -> status
+#   runs              sorted set of runs by enqueue timestamp
+#   runs:{state}      sorted set of the runs in each state, by enqueue timestamp, so
+#                     counting runs per state (since a time) is a ZCOUNT
+#   runs:version      counter bumped on every run state change, so a client that read
+#                     queue counts at one version can skip the changes it already has
+#   batch:{id}        hash of a submission batch's counters; a run that belongs to
+#                     one adds itself to "completed" or "failed" when it finishes
+#   run_audio:{run}   set of the audio store keys the run reads, kept in the store
+#                     while the run is queued or running
+#
+# The status script gets every key it touches in KEYS: run_status:{run}, run_jobs:{run},
+# runs:version, runs, runs:{state} for each of STATES in order, then batch:{id} if any.
+_SET_STATUSES = """
+local ts, ttl = tonumber(ARGV[2]), tonumber(ARGV[3])
+local state_keys = {queued = KEYS[5], running = KEYS[6], completed = KEYS[7], failed = KEYS[8]}
+local batch_key = KEYS[9]
+local prev_state = redis.call('HGET', KEYS[1], 'state')
+if not prev_state then
+    -- New run: index it and drop runs whose status has expired
+    redis.call('HSET', KEYS[1], 'file', ARGV[4], 'timestamp', ts, 'total', 0)
+    redis.call('ZADD', KEYS[4], ts, ARGV[1])
+    redis.call('ZREMRANGEBYSCORE', KEYS[4], '-inf', '(' .. (ts - ttl))
+    for i = 5, 8 do
+        redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', '(' .. (ts - ttl))
+    end
+end
+
+for i = 5, #ARGV, 2 do
+    local detector, status = ARGV[i], ARGV[i + 1]
+    local old = redis.call('HGET', KEYS[2], detector)
+    if old ~= status then
+        redis.call('HSET', KEYS[2], detector, status)
+        if old then
+            redis.call('HINCRBY', KEYS[1], old, -1)
+        else
+            redis.call('HINCRBY', KEYS[1], 'total', 1)
+        end
+        redis.call('HINCRBY', KEYS[1], status, 1)
+    end
+end
+
+local counts = redis.call('HMGET', KEYS[1], 'total', 'running', 'completed', 'failed')
+local total, running = tonumber(counts[1]) or 0, tonumber(counts[2]) or 0
+local completed, failed = tonumber(counts[3]) or 0, tonumber(counts[4]) or 0
+local state = 'queued'
+local version = 0
+if failed > 0 then
+    state = 'failed'
+elseif total > 0 and completed == total then
+    state = 'completed'
+elseif running > 0 or completed > 0 then
+    state = 'running'
+end
+if state ~= prev_state then
+    if prev_state then
+        redis.call('ZREM', state_keys[prev_state], ARGV[1])
+    end
+    redis.call('ZADD', state_keys[state], ts, ARGV[1])
+    redis.call('HSET', KEYS[1], 'state', state)
+    version = redis.call('INCR', KEYS[3])
+    if batch_key then
+        if prev_state == 'completed' or prev_state == 'failed' then
+            redis.call('HINCRBY', batch_key, prev_state, -1)
+        end
+        if state == 'completed' or state == 'failed' then
+            redis.call('HINCRBY', batch_key, state, 1)
+        end
+    end
+end
+redis.call('EXPIRE', KEYS[1], ttl)
+redis.call('EXPIRE', KEYS[2], ttl)
+
+local became_completed = 0
+if state == 'completed' and prev_state ~= 'completed' then
+    became_completed = 1
+end
+return {became_completed, completed, total, state, prev_state or '', version}
+"""
+
+def set_statuses(redis_conn, run: str, timestamp: int, file: str, statuses: dict, batch: str = None) -> tuple[bool, int, int, str, str, int]:
+    """
+    Atomically set detector statuses of a run and update its counters and state, and
+    those of its batch if it has one. Returns (whether this call completed the run,
+    completed count, total, state, previous state or "" for a new run, runs:version
+    after the change or 0 if the state did not change); only one caller sees the run
+    become completed.
+    """
+    args = [run, timestamp, RUN_STATUS_TTL_S, file]
+    for detector, status in statuses.items():
+        args.extend((detector, status))
+    keys = [f"run_status:{run}", f"run_jobs:{run}", "runs:version", "runs"] + [f"runs:{state}" for state in STATES]
+    if batch:
+        keys.append(f"batch:{batch}")
+    became_completed, completed, total, state, prev_state, version = redis_conn.eval(_SET_STATUSES, len(keys), *keys, *args)
+    return bool(became_completed), int(completed), int(total), _text(state), _text(prev_state), int(version)
+
+def hold_audio(redis_conn, run: str, *keys: str):
+    """Record audio store keys a run reads, so the store keeps them until the run finishes."""
+    pipe = redis_conn.pipeline(transaction=False)
+    pipe.sadd(f"run_audio:{run}", *keys)
+    pipe.expire(f"run_audio:{run}", RUN_STATUS_TTL_S)
+    pipe.execute()
+
+def held_audio_keys(redis_conn) -> set:
+    """Audio store keys held by runs that are queued or running."""
+    pipe = redis_conn.pipeline(transaction=True)
+    pipe.zrange("runs:queued", 0, -1)
+    pipe.zrange("runs:running", 0, -1)
+    runs = [_text(run) for state_runs in pipe.execute() for run in state_runs]
+    if not runs:
+        return set()
+    return {_text(key) for key in redis_conn.sunion([f"run_audio:{run}" for run in runs])}
+
+def run_counts(redis_conn, run: str) -> dict:
+    """Counters and state of one run ({} once it has expired)."""
+    return _decode(redis_conn.hgetall(f"run_status:{run}"))
+
+def queue_counts(redis_conn, since: int = None) -> dict:
+    """Number of runs in each state, optionally only runs enqueued from timestamp since."""
+    low = since if since else '-inf'
+    pipe = redis_conn.pipeline(transaction=False)
+    for state in STATES:
+        pipe.zcount(f"runs:{state}", low, '+inf')
+    return dict(zip(STATES, pipe.execute()))
+
+def queue_snapshot(redis_conn, since: int = None) -> tuple[dict, int]:
+    """
+    queue_counts together with the runs:version they were read at, in one transaction,
+    so state changes published later can be applied on top without counting twice.
+    """
+    low = since if since else '-inf'
+    pipe = redis_conn.pipeline(transaction=True)
+    pipe.get("runs:version")
+    for state in STATES:
+        pipe.zcount(f"runs:{state}", low, '+inf')
+    version, *counts = pipe.execute()
+    return dict(zip(STATES, counts)), int(version or 0)
+
+def run_summaries(redis_conn, since: int = None, offset: int = 0, limit: int = RUN_SUMMARY_PAGE_SIZE) -> dict:
+    """
+    Counters and state of one page of runs, newest first, optionally only runs enqueued
+    from timestamp since. Reads limit runs off the runs index, however many there are.
+    """
+    runs = [_text(run) for run in redis_conn.zrevrangebyscore(
+        "runs", '+inf', since if since else '-inf', start=max(offset, 0), num=max(limit, 0))]
+    pipe = redis_conn.pipeline(transaction=False)
+    for run in runs:
+        pipe.hgetall(f"run_status:{run}")
+    return {run: _decode(counts) for run, counts in zip(runs, pipe.execute()) if counts}
+
+def _text(value) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+def _decode(counts: dict) -> dict:
+    decoded = {}
+    for name, value in counts.items():
+        name, value = _text(name), _text(value)
+        decoded[name] = int(value) if name in ('total', 'timestamp') + STATES else value
+    return decoded
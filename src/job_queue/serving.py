@@ -0,0 +1,65 @@
+"""
+Production serving for the API: gunicorn with threaded workers where available
+(Linux, macOS), waitress on Windows. Started with `auqa-api --prod`.
+"""
+import os
+import signal
+import threading
+
+# Worker processes and request threads per worker. Every open /api/queue/events
+# stream holds a thread, so allow for the number of open browser tabs.
+API_WORKERS = int(os.getenv('API_WORKERS', min(4, os.cpu_count() or 1)))
+API_THREADS = int(os.getenv('API_THREADS', 16))
+# On SIGTERM workers stop taking requests and get this long to finish the ones in flight
+API_GRACEFUL_TIMEOUT_S = int(os.getenv('API_GRACEFUL_TIMEOUT_S', 30))
+# A worker that has not checked in for this long is restarted
+API_TIMEOUT_S = int(os.getenv('API_TIMEOUT_S', 120))
+
+# Set when the server starts shutting down, so endless responses (event streams) can end
+shutting_down = threading.Event()
+
+def _post_worker_init(worker):
+    """Chain a SIGTERM handler that sets shutting_down in front of gunicorn's own."""
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def on_term(signum, frame):
+        shutting_down.set()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, on_term)
+
+def serve(app, host: str, port: int):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+
+    if BaseApplication is None:
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            raise SystemExit("[ERROR] --prod needs gunicorn (Linux, macOS) or waitress (Windows): pip install -r requirements.txt")
+        print(f"Serving with waitress, {API_THREADS} threads")
+        try:
+            waitress_serve(app, host=host, port=port, threads=API_THREADS)
+        finally:
+            shutting_down.set()
+        return
+
+    class GunicornApp(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{host}:{port}")
+            self.cfg.set('workers', API_WORKERS)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', API_THREADS)
+            self.cfg.set('graceful_timeout', API_GRACEFUL_TIMEOUT_S)
+            self.cfg.set('timeout', API_TIMEOUT_S)
+            self.cfg.set('accesslog', '-')
+            self.cfg.set('post_worker_init', _post_worker_init)
+
+        def load(self):
+            return app
+
+    print(f"Serving with gunicorn, {API_WORKERS} worker(s) x {API_THREADS} threads")
+    GunicornApp().run()
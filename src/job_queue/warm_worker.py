@@ -0,0 +1,35 @@
+import os
+from rq import SimpleWorker
+
+from audio_processing.model_registry import warm_models
+from . import worker  # registers the detection models
+from . import lanes
+from . import redis_pool
+
+# Comma-separated model names to load at startup; empty loads every registered model
+WARM_MODELS = os.getenv('WARM_MODELS', '')
+
+class WarmWorker(SimpleWorker):
+    """
+    SimpleWorker that loads the detection models before taking jobs, so no job pays
+    for model construction, tops up the fair lanes after each job and publishes its
+    Redis pool counters for /api/metrics. Start with:
+    rq worker fast interactive batch backfill default --worker-class job_queue.warm_worker.WarmWorker
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        names = [name.strip() for name in WARM_MODELS.split(',') if name.strip()]
+        for name, stats in warm_models(names or None).items():
+            print(f"Warmed {name}: {stats['load_s']:.3f}s, {stats['tensor_bytes']} bytes of weights")
+
+    def perform_job(self, job, queue):
+        result = super().perform_job(job, queue)
+        try:
+            lanes.feed_all(self.connection)
+        except Exception as e:
+            print(f"[WARN] Could not feed fair lanes: {e}")
+        try:
+            redis_pool.publish_pool_stats(self.connection)
+        except Exception as e:
+            print(f"[WARN] Could not publish Redis pool stats: {e}")
+        return result
@@ -1,12 +1,14 @@
 import os
 import sys
 import json
+import math
+import inspect
 import traceback
 import redis
 from typing import Type
 from rq import Queue
 from datetime import datetime
-import soundfile as sf
+import numpy as np
 
 # Add src directory to path so imports work when RQ executes jobs
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,21 +18,102 @@ if SRC_DIR not in sys.path:
     sys.path.insert(0, SRC_DIR)
 
 from audio_processing.audio_import import AudioLoader
+from audio_processing.audio_store import AudioStore, DecodeCache
+from audio_processing.features import FeatureCache
+from audio_processing.clips import write_clips
 from audio_processing.utils import Detection, seconds_to_mmss, fill_default_params
 from audio_processing.artifact_simulate import ArtifactSim
 from .analysis_types import ANALYSIS_TYPES
+from .result_cache import ResultCache
+from .report_catalog import get_report_catalog, describe_report
+from . import run_status
+from . import redis_pool
+from . import parallel
 
 # Use absolute path for output directory
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "detection_results")
 
+# Decoded audio is shared between jobs through the results volume, not the job payload
+AUDIO_STORE_DIR = os.getenv('AUDIO_STORE_DIR', os.path.join(OUTPUT_DIR, ".cache", "audio"))
+AUDIO_STORE_MAX_BYTES = int(os.getenv('AUDIO_STORE_MAX_BYTES', 20 * 1024**3))
+
+# Files up to this long run all analyses in one job instead of fanning out
+FUSED_MAX_DURATION_S = float(os.getenv('FUSED_MAX_DURATION_S', 300))
+
+# Files from this long are decoded and analyzed block by block to bound worker memory
+STREAM_MIN_DURATION_S = float(os.getenv('STREAM_MIN_DURATION_S', 1800))
+STREAM_BLOCK_S = float(os.getenv('STREAM_BLOCK_S', 30))
+
+# Processes used to run one file's analyses side by side (1 disables the parallel mode),
+# and the length of the time slices long analyses are split into
+PARALLEL_WORKERS = int(os.getenv('PARALLEL_WORKERS', 1))
+PARALLEL_SHARD_S = float(os.getenv('PARALLEL_SHARD_S', 300))
+
+# Streamed files from this long are split into time shards of SHARD_S, queued as separate jobs
+SHARD_MIN_DURATION_S = float(os.getenv('SHARD_MIN_DURATION_S', 3600))
+SHARD_S = float(os.getenv('SHARD_S', 600))
+# Extra native audio a shard resamples on either side of its range, for the resampler's filter to settle
+SHARD_RESAMPLE_PAD_S = 0.1
+
+# Recently decoded files are also kept in worker memory up to this many bytes
+DECODE_CACHE_MEMORY_BYTES = int(os.getenv('DECODE_CACHE_MEMORY_BYTES', 1024**3))
+
+# Write clips during analysis; otherwise they are rendered from the source on request
+PRERENDER_CLIPS = os.getenv('PRERENDER_CLIPS', '0') == '1'
+
+# Container format for pre-rendered clips ("wav", "flac" or "opus") and the most clips
+# pre-rendered per detection type (0 keeps all); clips cut on request are never capped
+CLIP_FORMAT = os.getenv('CLIP_FORMAT', 'wav')
+CLIP_MAX_PER_TYPE = int(os.getenv('CLIP_MAX_PER_TYPE', 0))
+
+# Pub/sub channel job progress is announced on
+QUEUE_EVENTS_CHANNEL = os.getenv('QUEUE_EVENTS_CHANNEL', 'queue_events')
+
+# Redis the workers share; runs record there which audio store entries they still read
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+def held_audio_keys() -> set | None:
+    """Audio store keys that queued or running runs hold, or None if Redis cannot be read."""
+    try:
+        return run_status.held_audio_keys(redis_pool.get_redis(REDIS_URL))
+    except redis.RedisError as e:
+        print(f"[WARN] Could not read the audio held by active runs: {e}")
+        return None
+
+def get_audio_store() -> AudioStore:
+    return AudioStore(AUDIO_STORE_DIR, max_bytes=AUDIO_STORE_MAX_BYTES, in_use=held_audio_keys)
+
+# Detector output is reused when the same audio is analyzed again with the same params;
+# least recently used results are dropped past RESULT_CACHE_MAX_BYTES
+RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR', os.path.join(OUTPUT_DIR, ".cache", "results"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', 1024**3))
+
+def get_result_cache() -> ResultCache:
+    return ResultCache(RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_MAX_BYTES)
+
+_decode_cache = None
+
+def get_decode_cache() -> DecodeCache:
+    """Process-wide cache of decoded source files, backed by the audio store."""
+    global _decode_cache
+    if _decode_cache is None:
+        _decode_cache = DecodeCache(get_audio_store(), max_memory_bytes=DECODE_CACHE_MEMORY_BYTES)
+    return _decode_cache
+
 class AudioDetectionJob:
-    def __init__(self, loader: Type[AudioLoader], audio_file_path: str, redis_url: Type[str] = 'redis://localhost:6379/0', clip_pad: float = 0.1):
+    def __init__(self, loader: Type[AudioLoader], audio_file_path: str, redis_url: Type[str] = 'redis://localhost:6379/0', clip_pad: float = 0.1,
+                 queue_name: str = "default", batch_id: str = None):
         self.redis_url = redis_url
+        # RQ queue (lane) this run's follow-up jobs go to, and the submission batch it is part of
+        self.queue_name = queue_name
+        self.batch_id = batch_id
         self.loader = loader
         self.completed = {}
         self.audio_file = audio_file_path
         self.audio = None
-        self.job_ids = []
+        self.audio_ref = None
+        self.resampled = {}
+        self.features = {}
         self.audio_base = os.path.splitext(os.path.basename(self.audio_file))[0]
         self.start_timestamp = int(datetime.now().timestamp())
         self.clip_pad = clip_pad
@@ -39,107 +122,659 @@ class AudioDetectionJob:
         self.out_dir = os.path.join(OUTPUT_DIR, f"{self.audio_base}_{ts_str}")
         os.makedirs(self.out_dir, exist_ok=True)
 
-    def save_clip(self, det_type: str, id: int, start_s: float, end_s: float = None):
-        if end_s is None:
-            end_s = start_s  # Save a very short clip for point detections
+    def __getstate__(self):
+        # RQ pickles the job object into every enqueued call; never ship the samples
+        state = self.__dict__.copy()
+        state['audio'] = None
+        state['resampled'] = {}
+        state['features'] = {}
+        return state
+
+    def get_audio(self, sr: int = None) -> dict:
+        """
+        Return the decoded audio, mapping it from the shared store on first use.
+        With sr, return it at that rate instead; each rate is resampled from the loaded
+        audio at most once and kept in the store for later jobs on the same file.
+        """
+        if self.audio is None:
+            store = get_audio_store()
+            if self.audio_ref is not None and store.contains(self.audio_ref['key']):
+                self.audio = store.get(self.audio_ref)
+            else:
+                # Evicted or never stored: decode again, block by block into the store
+                self.load_audio_streamed()
+                if self.audio is None:
+                    self.audio = store.get(self.audio_ref)
+        if sr is None or sr == self.audio['samplerate']:
+            return self.audio
+
+        if sr not in self.resampled:
+            store = get_audio_store()
+            key = store.derived_key(self.audio_ref['key'], sr=sr, res_type=self.loader.res_type)
+            if store.contains(key):
+                self.resampled[sr] = store.get({**self.audio_ref, 'samplerate': sr, 'key': key})
+            else:
+                print(f"Resampling {self.audio_file} to {sr} Hz")
+                audio = self.loader.resample(self.audio, sr)
+                store.put(audio, key=key)
+                self.resampled[sr] = audio
+            self.hold_audio(key)
+        return self.resampled[sr]
+
+    def num_samples(self, sr: int = None) -> int:
+        """Length of the audio at rate sr (the loaded rate by default), without resampling it."""
+        audio = self.get_audio()
+        if sr is None or sr == audio['samplerate']:
+            return len(audio['data'])
+        # What a stream resampler gives for the whole signal
+        return round(len(audio['data']) * sr / audio['samplerate'])
+
+    def read_samples(self, sr: int, start: int, end: int) -> np.ndarray:
+        """
+        Samples [start, end) of the audio at rate sr. At a rate other than the loaded one
+        only the native samples around the range go through a stream resampler, so a
+        shard never resamples (or loads) the whole file; the result matches resampling
+        the whole signal as a stream up to resampler precision.
+        """
+        audio = self.get_audio()
+        native = audio['samplerate']
+        if sr is None or sr == native:
+            return np.asarray(audio['data'][start:end])
+        # Cut the native signal where its samples line up with the target grid
+        g = math.gcd(native, sr)
+        step_in, step_out = native // g, sr // g
+        pad = math.ceil(SHARD_RESAMPLE_PAD_S * sr / step_out)
+        first = max(start // step_out - pad, 0)
+        last = -(-end // step_out) + pad
+        block = np.asarray(audio['data'][first * step_in:last * step_in], dtype=np.float32)
+        out = self.loader.resample_stream(native, sr).resample_chunk(block, last=True)
+        return out[start - first * step_out:end - first * step_out]
+
+    def load_audio(self):
+        """Decode the source file, or map it from the decode cache if it was decoded before with the same settings."""
+        cache = get_decode_cache()
+        hits = cache.hits
+        self.audio, self.audio_ref = cache.load(self.loader, self.audio_file)
+        self.record_decode_cache(cache.hits > hits)
+        self.hold_audio(self.audio_ref['key'])
+
+    def load_audio_streamed(self):
+        """Like load_audio, but decode block by block straight into the audio store and map it from there."""
+        cache = get_decode_cache()
+        cache_key = cache.key_for(self.loader, self.audio_file)
+        cached = cache.get(cache_key)
+        self.record_decode_cache(cached is not None)
+        if cached is not None:
+            self.audio, self.audio_ref = cached
+            self.hold_audio(self.audio_ref['key'])
+            return
+
+        writer = None
+        metadata = None
+        for block in self.loader.stream_audio_file(self.audio_file, block_s=STREAM_BLOCK_S):
+            if writer is None:
+                writer = get_audio_store().open_writer(block['samplerate'])
+                metadata = {"samplerate": block['samplerate'], "channels": block['channels']}
+            writer.write(block['data'])
+        if writer is None:
+            raise ValueError(f"Could not decode {self.audio_file}")
+        metadata["duration_sec"] = writer.num_samples / metadata["samplerate"]
+        self.audio_ref = writer.close(metadata)
+        cache.add(cache_key, self.audio_ref)
+        self.hold_audio(self.audio_ref['key'])
+        self.audio = None
+
+    def hold_audio(self, key: str):
+        """Keep a store entry this run reads from being pruned until the run finishes."""
+        try:
+            run_status.hold_audio(redis_pool.get_redis(self.redis_url), self.run_key(), key)
+        except redis.RedisError as e:
+            print(f"[WARN] Could not hold audio {key} for {self.run_key()}: {e}")
+
+    def record_decode_cache(self, hit: bool):
+        redis_conn = redis_pool.get_redis(self.redis_url)
+        redis_conn.hincrby("decode_cache", "hits" if hit else "misses")
+        if hit:
+            print(f"Decoded audio for {self.audio_file} found in cache")
+
+    def get_features(self, sr: int = None) -> FeatureCache:
+        """Return the feature cache shared by every detector run on this job's audio at a rate."""
+        audio = self.get_audio(sr)
+        if audio['samplerate'] not in self.features:
+            self.features[audio['samplerate']] = FeatureCache(audio['data'], audio['samplerate'])
+        return self.features[audio['samplerate']]
+
+    def feature_rate(self, det_type: str) -> int | None:
+        """Sample rate of the feature cache det_type's analysis shares, or None if it takes none."""
+        if 'features' not in inspect.signature(ANALYSIS_TYPES[det_type]['func']).parameters:
+            return None
+        return ANALYSIS_TYPES[det_type].get('sr') or self.get_audio()['samplerate']
 
-        start = max(0, start_s - self.clip_pad)
+    def last_feature_users(self, det_types) -> dict:
+        """The last of det_types (in run order) to use each rate's feature cache."""
+        return {self.feature_rate(det_type): det_type for det_type in det_types}
+
+    def release_features(self, det_type: str, last_users: dict):
+        """Drop a rate's feature cache once the last analysis sharing it has run."""
+        rate = self.feature_rate(det_type)
+        if rate is not None and last_users.get(rate) == det_type:
+            self.features.pop(rate, None)
+
+    def clip_range(self, detection: Detection, sr: int) -> tuple[int, int]:
+        """Padded sample range of a detection's clip; point detections get a very short clip."""
+        end_s = detection.start if detection.end is None else detection.end
+        start = max(0, detection.start - self.clip_pad)
         end = end_s + self.clip_pad
+        return int(start * sr), int(end * sr)
 
-        start = int(start * self.audio['samplerate'])
-        end = int(end * self.audio['samplerate'])
+    def clip_names(self, detections: list[Detection]) -> dict:
+        """
+        Clip name per (type, id) of in-file detections. When clips are pre-rendered, only
+        the first CLIP_MAX_PER_TYPE per type in timeline order are named.
+        """
+        names = {}
+        per_type = {}
+        for detection in sorted(d for d in detections if d.in_file):
+            per_type[detection.type] = per_type.get(detection.type, 0) + 1
+            if PRERENDER_CLIPS and CLIP_MAX_PER_TYPE > 0 and per_type[detection.type] > CLIP_MAX_PER_TYPE:
+                continue
+            names[(detection.type, detection.id)] = f"{detection.type.lower()}-{detection.id}.wav"
+        return names
 
-        os.makedirs(os.path.join(self.out_dir, "clips"), exist_ok=True)
-        clip_path = os.path.join(self.out_dir, "clips", f"{det_type.lower()}-{id}.wav")
+    def save_clips(self, detections: list[Detection]) -> dict:
+        """
+        Write the clips named by clip_names into one container under clips/, in timeline
+        order. Returns the clip name per (type, id).
+        """
+        audio = self.get_audio()
+        sr = audio['samplerate']
+        names = self.clip_names(detections)
+        ranges = {names[(d.type, d.id)]: self.clip_range(d, sr) for d in detections if (d.type, d.id) in names}
+
+        write_clips(audio['data'], sr, ranges, os.path.join(self.out_dir, "clips"), CLIP_FORMAT)
+        print("Saved", len(ranges), "clips to", os.path.join(self.out_dir, "clips"))
+        return names
 
-        sf.write(clip_path, self.audio['data'][start:end], self.audio['samplerate'])
+    def load_and_queue(self, analyses: dict, mode: str = "auto"):
+        """
+        Load the audio and schedule its analyses.
 
-    def load_and_queue(self, analyses: dict):
+        mode "fanout" queues one job per analysis plus a report job, "fused" runs every
+        analysis in this job, "stream" does the same while decoding block by block so
+        memory does not grow with file length, "parallel" runs the analyses and time
+        slices of them in a PARALLEL_WORKERS process pool, "sharded" is fanout with long
+        analyses further split into SHARD_S time shards, one job each, and "auto" picks
+        one with choose_mode.
+        """
         try:
-            redis_conn = redis.from_url(self.redis_url)
-            job_queue = Queue(connection=redis_conn)
-            
+            redis_conn = redis_pool.get_redis(self.redis_url)
+            job_queue = Queue(self.queue_name, connection=redis_conn)
+
+            if mode == "auto":
+                mode = self.choose_mode(self.loader.probe_duration(self.audio_file))
+
+            self.set_status(redis_conn, {analysis_type: "queued" for analysis_type in analyses}, event="queued")
+
+            if mode == "stream":
+                self.run_streaming(analyses)
+                return
+
             print(f"Loading audio file: {self.audio_file}")
-            self.audio = self.loader.load_audio_file(self.audio_file)
+            if mode == "sharded":
+                # Shard jobs map slices from the store, so the whole file never needs to be in memory
+                self.load_audio_streamed()
+            else:
+                self.load_audio()
 
-            for analysis_type in analyses.keys():
-                self.job_ids.append(f"{self.audio_base}_{analysis_type}_{self.start_timestamp}")
-                redis_conn.hset("job_status", f"{self.audio_base}_{analysis_type}_{self.start_timestamp}", "queued")
+            pending = {t: p for t, p in analyses.items() if self.cached_detections(t, p, self.slice_impl(t, mode)) is None}
+            if mode == "fused" or not pending:
+                # With every analysis cached this only assembles the report
+                self.run_fused(analyses, mode)
+                return
+
+            if mode == "parallel":
+                self.run_parallel(analyses)
+                return
+
+            # Publish cached analyses before queueing the rest, so the last job to finish sees them completed
+            for analysis_type in [t for t in analyses if t not in pending]:
+                detections = self.cached_detections(analysis_type, analyses[analysis_type], self.slice_impl(analysis_type, mode))
+                self.push_results(redis_conn, detections)
+                self.mark_completed(redis_conn, analysis_type)
+                print("Using cached", analysis_type, "results for", self.audio_file)
 
             print(f"Queueing detection jobs for: {self.audio_file}")
-            for analysis_type, analysis_params in analyses.items():
-                job_queue.enqueue(self.run_detection, analysis_type, analysis_params)
+            for analysis_type, analysis_params in pending.items():
+                if mode == "sharded" and ANALYSIS_TYPES[analysis_type].get('shard') is not None:
+                    self.queue_shards(job_queue, analysis_type, analysis_params)
+                else:
+                    job_queue.enqueue(self.run_detection, analysis_type, analysis_params)
             return
         except Exception as e:
             print(f"[ERROR] Exception in load_and_queue: {e}")
             traceback.print_exc()
+            self.mark_failed(list(analyses))
             raise  # Optionally re-raise to let RQ mark the job as failed
-        
+
+    @staticmethod
+    def choose_mode(duration: float | None) -> str:
+        """
+        Mode for a file of this many seconds. Files from STREAM_MIN_DURATION_S are never
+        decoded whole: "stream" analyzes them in this job as the blocks are decoded, and
+        from SHARD_MIN_DURATION_S "sharded" decodes them block by block into the store
+        and splits the analyses into shard jobs, so other workers share the file.
+        """
+        if duration is None:
+            return "fanout"
+        if duration <= FUSED_MAX_DURATION_S:
+            return "fused"
+        if duration >= STREAM_MIN_DURATION_S:
+            return "sharded" if duration >= SHARD_MIN_DURATION_S else "stream"
+        return "parallel" if PARALLEL_WORKERS > 1 else "fanout"
+
+    @staticmethod
+    def slice_impl(det_type: str, mode: str) -> str | None:
+        """The variant an analysis runs as in a mode that splits it into time slices ("shard" or "parallel"), else None."""
+        if ANALYSIS_TYPES[det_type].get('shard') is None:
+            return None
+        return {"sharded": "shard", "parallel": "parallel"}.get(mode)
+
+    def result_key(self, det_type: str, params: dict, impl: str = None) -> str:
+        """
+        Result cache key for an analysis of this job's audio; params must already be filled.
+        impl names a variant other than the analysis's func ("stream", "shard" or
+        "parallel"), so its results are never served in place of the func's.
+        """
+        extra = {}
+        if ANALYSIS_TYPES[det_type].get('sr') is not None:
+            extra = {"sr": ANALYSIS_TYPES[det_type]['sr'], "res_type": self.loader.res_type}
+        if impl is not None:
+            extra["impl"] = impl
+        return ResultCache.key_for(self.audio_ref['key'], det_type, ANALYSIS_TYPES[det_type].get('version', 1), params, **extra)
+
+    def cached_detections(self, det_type: str, params: dict, impl: str = None) -> list[Detection] | None:
+        """
+        Detections from an earlier run with the same audio and params, or None. With impl,
+        that variant's results are used, or else the func's, which can stand in for any variant.
+        """
+        params = fill_default_params(ANALYSIS_TYPES[det_type]['func'], params)
+        if impl is not None:
+            cached = get_result_cache().get(self.result_key(det_type, params, impl))
+            if cached is not None:
+                return cached
+        return get_result_cache().get(self.result_key(det_type, params))
+
+    def detect(self, det_type: str, params: dict, impl: str = None) -> list[Detection]:
+        """
+        Run one analysis on the loaded audio and wrap its output as Detections, reusing
+        cached results (impl's too, as cached_detections does).
+        """
+        func = ANALYSIS_TYPES[det_type]['func']
+        sr = ANALYSIS_TYPES[det_type].get('sr')
+        params = fill_default_params(func, params)
+
+        self.get_audio()
+        cached = self.cached_detections(det_type, params, impl)
+        if cached is not None:
+            return cached
+        key = self.result_key(det_type, params)
+
+        # Detectors that take a feature cache share framings computed by earlier ones
+        extra = {}
+        if 'features' in inspect.signature(func).parameters:
+            extra['features'] = self.get_features(sr)
+
+        audio = self.get_audio(sr)
+        det_result = func(audio['data'], audio['samplerate'], **params, **extra)
+        detections = self.wrap_results(det_type, det_result, params)
+        get_result_cache().put(key, detections)
+        return detections
+
+    @staticmethod
+    def wrap_results(det_type: str, det_result, params: dict) -> list[Detection]:
+        if ANALYSIS_TYPES[det_type]['type'] != 'in-file':
+            return [Detection(result=det_result, type=det_type, params=params, in_file=False)]
+
+        detections = []
+        for id, det in enumerate(det_result):
+            if isinstance(det, tuple):
+                det = round(det[0], 3), round(det[1], 3)
+                detections.append(Detection(id=id, start=det[0], end=det[1], type=det_type, params=params))
+            else:
+                det = round(det, 3)
+                detections.append(Detection(id=id, start=det, type=det_type, params=params, in_file=True))
+        return detections
+
     def run_detection(self, det_type: str, params: dict):
-        redis_conn = redis.from_url(self.redis_url)
+        redis_conn = redis_pool.get_redis(self.redis_url)
         print(f"Running detection {det_type} on {self.audio_file}")
-        
-        params = fill_default_params(ANALYSIS_TYPES[det_type]['func'], params)
-        
-        det_result = ANALYSIS_TYPES[det_type]['func'](self.audio['data'], self.audio['samplerate'], **params)
-        
+        self.set_status(redis_conn, {det_type: "running"})
+
+        try:
+            detections = self.detect(det_type, params)
+        except Exception:
+            self.mark_failed([det_type])
+            raise
+
+        stored = self.push_results(redis_conn, detections)
+
         if ANALYSIS_TYPES[det_type]['type'] == 'in-file':
-            for id, det in enumerate(det_result):
-                if isinstance(det, tuple):
-                    det = round(det[0], 3), round(det[1], 3)
-                    self.save_clip(det_type, id=id, start_s=det[0], end_s=det[1])
-                    detection = Detection(id=id, start=det[0], end=det[1], type=det_type, params=params)
-                else:
-                    det = round(det, 3)
-                    self.save_clip(det_type, id=id, start_s=det)
-                    detection = Detection(id=id, start=det, type=det_type, params=params, in_file=True)
-                redis_conn.rpush(f"results:{self.audio_base}_{self.start_timestamp}", str(detection))
-            
-            print("Found", len(det_result), det_type, "detections")
-            print(redis_conn.llen(f"results:{self.audio_base}_{self.start_timestamp}"), "total detections for", self.audio_file, "so far")
+            print("Found", len(detections), det_type, "detections")
+            print(stored, "total detections for", self.audio_file, "so far")
         else:
-            detection = Detection(result=det_result, type=det_type, params=params, in_file=False)
-            redis_conn.rpush(f"results:{self.audio_base}_{self.start_timestamp}", str(detection))
-            
-            print("Overall", det_type, "result:", str(detection))
+            print("Overall", det_type, "result:", str(detections[0]))
             print("Completed", det_type, "analysis")
-        
+
         self.complete(det_type)
 
-    def complete(self, type : str):
-        redis_conn = redis.from_url(self.redis_url)
+    def push_results(self, redis_conn, detections: list[Detection]) -> int:
+        """Append detections to this run's results list in one RPUSH; returns the list's length."""
+        key = f"results:{self.audio_base}_{self.start_timestamp}"
+        if not detections:
+            return redis_conn.llen(key)
+        return redis_conn.rpush(key, *[str(d) for d in detections])
+
+    def queue_shards(self, job_queue: Queue, det_type: str, params: dict):
+        """Queue one run_shard job per time shard of an analysis."""
+        filled = fill_default_params(ANALYSIS_TYPES[det_type]['func'], params)
+        # Shards at another rate resample their own slices (see read_samples)
+        sr = ANALYSIS_TYPES[det_type].get('sr') or self.get_audio()['samplerate']
+        align, overlap = ANALYSIS_TYPES[det_type]['shard'](sr, **filled)
+        shards = parallel.plan_shards(self.num_samples(sr), int(SHARD_S * sr), align, overlap)
+        print(f"Queueing {len(shards)} {det_type} shards for: {self.audio_file}")
+        for index, shard in enumerate(shards):
+            job_queue.enqueue(self.run_shard, det_type, params, index, len(shards), *shard)
+
+    def run_shard(self, det_type: str, params: dict, index: int, count: int,
+                  read_start: int, core_start: int, core_end: int, read_end: int):
+        """
+        Run one analysis on one time shard. The job that stores the last shard merges
+        them across the seams and completes the analysis.
+        """
+        redis_conn = redis_pool.get_redis(self.redis_url)
+        print(f"Running detection {det_type} shard {index + 1}/{count} on {self.audio_file}")
+        self.set_status(redis_conn, {det_type: "running"})
+        filled = fill_default_params(ANALYSIS_TYPES[det_type]['func'], params)
+        sr = ANALYSIS_TYPES[det_type].get('sr') or self.get_audio()['samplerate']
+
+        try:
+            result = parallel.run_on_slice(det_type, filled, self.read_samples(sr, read_start, read_end), sr, read_start)
+        except Exception:
+            self.mark_failed([det_type])
+            raise
+        piece = {"core_start": core_start / sr, "core_end": core_end / sr, "result": result}
+
+        shards_key = f"shards:{self.audio_base}_{self.start_timestamp}:{det_type}"
+        pipe = redis_conn.pipeline(transaction=True)
+        pipe.hset(shards_key, index, json.dumps(piece))
+        # Shards of a run that fails or is abandoned expire with its status
+        pipe.expire(shards_key, run_status.RUN_STATUS_TTL_S)
+        pipe.hlen(shards_key)
+        stored = pipe.execute()[2]
+        self.publish_progress(redis_conn, "shard", detector=det_type, shards_done=stored, shards=count)
+        if stored != count:
+            return
+
+        pieces = []
+        for i in range(count):
+            piece = json.loads(redis_conn.hget(shards_key, i))
+            result = [tuple(det) if isinstance(det, list) else det for det in piece['result']]
+            pieces.append((piece['core_start'], piece['core_end'], result))
+        redis_conn.delete(shards_key)
+
+        detections = self.wrap_results(det_type, parallel.merge_shards(pieces, ANALYSIS_TYPES[det_type]['shard_merge']), filled)
+        # Merged shards are keyed apart, so they never stand in for a whole-file run
+        get_result_cache().put(self.result_key(det_type, filled, impl="shard"), detections)
+        self.push_results(redis_conn, detections)
+        print("Merged", count, det_type, "shards into", len(detections), "detections")
+        self.complete(det_type)
+
+    def run_fused(self, analyses: dict, mode: str = "fused"):
+        """
+        Run every requested analysis in this process and write the report directly.
+        Results cached by mode's time-sliced variants are reused as well.
+        """
+        redis_conn = redis_pool.get_redis(self.redis_url)
+        print(f"Running fused analysis on {self.audio_file}")
+
+        detections = []
+        last_users = self.last_feature_users(analyses)
+        for det_type, params in analyses.items():
+            self.set_status(redis_conn, {det_type: "running"})
+            det_detections = self.detect(det_type, params, self.slice_impl(det_type, mode))
+            self.release_features(det_type, last_users)
+            detections.extend(det_detections)
+            self.mark_completed(redis_conn, det_type)
+            print("Completed", det_type, "analysis with", len(det_detections), "result(s)")
+
+        self.write_report(detections)
+
+    def run_parallel(self, analyses: dict):
+        """
+        Run every requested analysis in a process pool against the decoded audio in
+        shared memory, splitting long analyses into time slices, and write the report.
+        """
+        redis_conn = redis_pool.get_redis(self.redis_url)
+        print(f"Running parallel analysis on {self.audio_file} with {PARALLEL_WORKERS} processes")
+
+        audio = self.get_audio()
+        signals = {audio['samplerate']: audio['data']}
+        filled = {}
+        pending = {}
+        for det_type, params in analyses.items():
+            filled[det_type] = fill_default_params(ANALYSIS_TYPES[det_type]['func'], params)
+            if self.cached_detections(det_type, params, self.slice_impl(det_type, "parallel")) is None:
+                pending[det_type] = filled[det_type]
+                sr = ANALYSIS_TYPES[det_type].get('sr')
+                if sr is not None and sr not in signals:
+                    signals[sr] = self.get_audio(sr)['data']
+
+        self.set_status(redis_conn, {det_type: "running" for det_type in pending})
+        raw = parallel.run_parallel(signals, audio['samplerate'], pending, PARALLEL_WORKERS, PARALLEL_SHARD_S)
 
-        lua = """
-        redis.call('HSET', KEYS[1], ARGV[1], 'completed')
-        for i = 2, #ARGV do
-            if redis.call('HGET', KEYS[1], ARGV[i]) ~= 'completed' then
-                return 0
-            end
-        end
-        return 1
+        detections = []
+        for det_type, params in filled.items():
+            impl = self.slice_impl(det_type, "parallel")
+            if det_type in raw:
+                det_detections = self.wrap_results(det_type, raw[det_type], params)
+                get_result_cache().put(self.result_key(det_type, params, impl), det_detections)
+            else:
+                det_detections = self.cached_detections(det_type, params, impl)
+            detections.extend(det_detections)
+            self.mark_completed(redis_conn, det_type)
+            print("Completed", det_type, "analysis with", len(det_detections), "result(s)")
+
+        self.write_report(detections)
+
+    def run_streaming(self, analyses: dict):
+        """
+        Fused analysis that decodes the file block by block. Analyses with a streaming
+        variant consume each block as it is decoded, through one streaming resampler per
+        rate they need; the samples are also written to the shared store, which the
+        remaining analyses and clip extraction then memory-map.
+        """
+        redis_conn = redis_pool.get_redis(self.redis_url)
+        print(f"Running streaming analysis on {self.audio_file}")
+
+        # A file decoded before with the same settings is read back from the cache instead
+        cache = get_decode_cache()
+        cache_key = cache.key_for(self.loader, self.audio_file)
+        cached = cache.get(cache_key)
+        self.record_decode_cache(cached is not None)
+        if cached is not None:
+            self.audio, self.audio_ref = cached
+            self.hold_audio(self.audio_ref['key'])
+            blocks = self.audio_blocks(self.audio, STREAM_BLOCK_S)
+        else:
+            blocks = self.loader.stream_audio_file(self.audio_file, block_s=STREAM_BLOCK_S)
+
+        self.set_status(redis_conn, {det_type: "running" for det_type in analyses})
+        streams = {}
+        # Results of streamed analyses found in the result cache
+        streamed_before = {}
+        stream_rates = {}
+        resamplers = {}
+        writer = None
+        sr = None
+        metadata = None
+        for block in blocks:
+            if sr is None:
+                sr = block['samplerate']
+                metadata = {"samplerate": sr, "channels": block['channels']}
+                if cached is None:
+                    writer = get_audio_store().open_writer(sr)
+                for det_type, params in analyses.items():
+                    stream_cls = ANALYSIS_TYPES[det_type].get('stream')
+                    if stream_cls is None:
+                        continue
+                    if cached is not None:
+                        reused = self.cached_detections(det_type, params, impl="stream")
+                        if reused is not None:
+                            streamed_before[det_type] = reused
+                            continue
+                    rate = ANALYSIS_TYPES[det_type].get('sr') or sr
+                    if rate != sr and rate not in resamplers:
+                        resamplers[rate] = self.loader.resample_stream(sr, rate)
+                    streams[det_type] = stream_cls(rate, **fill_default_params(stream_cls, params))
+                    stream_rates[det_type] = rate
+            if writer is not None:
+                writer.write(block['data'])
+            self.push_streams(streams, stream_rates, sr, block['data'], resamplers)
+
+        if sr is None:
+            raise ValueError(f"Could not decode {self.audio_file}")
+        if resamplers:
+            # Flush what the resamplers still hold
+            empty = np.zeros(0, dtype=np.float32)
+            self.push_streams(streams, stream_rates, sr, empty, resamplers, last=True)
+
+        if writer is not None:
+            metadata["duration_sec"] = writer.num_samples / sr
+            self.audio_ref = writer.close(metadata)
+            cache.add(cache_key, self.audio_ref)
+            self.hold_audio(self.audio_ref['key'])
+
+        detections = []
+        last_users = self.last_feature_users(d for d in analyses if d not in streams and d not in streamed_before)
+        for det_type, params in analyses.items():
+            if det_type in streams:
+                params = fill_default_params(ANALYSIS_TYPES[det_type]['func'], params)
+                det_detections = self.wrap_results(det_type, streams[det_type].finish(), params)
+                get_result_cache().put(self.result_key(det_type, params, impl="stream"), det_detections)
+            elif det_type in streamed_before:
+                det_detections = streamed_before[det_type]
+            else:
+                det_detections = self.detect(det_type, params)
+                self.release_features(det_type, last_users)
+            detections.extend(det_detections)
+            self.mark_completed(redis_conn, det_type)
+            print("Completed", det_type, "analysis with", len(det_detections), "result(s)")
+
+        self.write_report(detections)
+
+    @staticmethod
+    def audio_blocks(audio: dict, block_s: float):
+        """Yield an already decoded audio dict in blocks shaped like AudioLoader.stream_audio_file's."""
+        block_len = max(int(block_s * audio['samplerate']), 1)
+        for offset in range(0, len(audio['data']), block_len):
+            yield {
+                "data": np.array(audio['data'][offset:offset + block_len], dtype=np.float32),
+                "offset": offset,
+                "samplerate": audio['samplerate'],
+                "channels": audio['channels']
+            }
+
+    @staticmethod
+    def push_streams(streams: dict, stream_rates: dict, sr: int, data: np.ndarray, resamplers: dict, last: bool = False):
+        """Push one decoded block at rate sr to every stream detector, resampled to the rate it runs at."""
+        blocks = {sr: data}
+        for rate, resampler in resamplers.items():
+            blocks[rate] = resampler.resample_chunk(data, last=last)
+        for det_type, stream in streams.items():
+            if len(blocks[stream_rates[det_type]]) > 0:
+                stream.push(blocks[stream_rates[det_type]])
+
+    def run_key(self) -> str:
+        return f"{self.audio_base}_{self.start_timestamp}"
+
+    def set_status(self, redis_conn, statuses: dict, event: str = "detector") -> bool:
+        """
+        Set the status of some of this run's analyses and publish the change. Returns
+        True for the one call that completes the run.
         """
+        became_completed, completed, total, state, prev_state, version = run_status.set_statuses(
+            redis_conn, self.run_key(), self.start_timestamp, self.audio_file, statuses, batch=self.batch_id)
+        counts = {"completed": completed, "total": total, "state": state}
+        if version:
+            # A run state change; clients apply it to their queue counts once
+            counts.update(prev_state=prev_state or None, version=version)
+        if len(statuses) == 1:
+            (detector, status), = statuses.items()
+            self.publish_progress(redis_conn, event, counts, detector=detector, status=status)
+        else:
+            self.publish_progress(redis_conn, event, counts, statuses=statuses)
+        return became_completed
+
+    def publish_progress(self, redis_conn, event: str, counts: dict = None, **fields):
+        """
+        Publish a progress event for this run on QUEUE_EVENTS_CHANNEL, with how many of
+        its analyses are completed and its state, for the API to push to browsers.
+        """
+        if counts is None:
+            run = run_status.run_counts(redis_conn, self.run_key())
+            counts = {"completed": run.get("completed", 0), "total": run.get("total", 0), "state": run.get("state")}
+        message = {
+            "event": event,
+            "run": self.run_key(),
+            "file": self.audio_file,
+            "timestamp": self.start_timestamp,
+            **counts,
+            **fields
+        }
+        try:
+            redis_conn.publish(QUEUE_EVENTS_CHANNEL, json.dumps(message))
+        except redis.RedisError as e:
+            # Progress events are best effort; the run status keys stay the source of truth
+            print(f"[WARN] Could not publish progress event: {e}")
+
+    def mark_completed(self, redis_conn, det_type: str):
+        self.set_status(redis_conn, {det_type: "completed"})
+
+    def mark_failed(self, det_types: list[str]):
+        try:
+            redis_conn = redis_pool.get_redis(self.redis_url)
+            self.set_status(redis_conn, {det_type: "failed" for det_type in det_types})
+        except redis.RedisError as e:
+            print(f"[WARN] Could not mark {', '.join(det_types)} failed: {e}")
 
-        result = redis_conn.eval(lua, 1, "job_status", f"{self.audio_base}_{type}_{self.start_timestamp}", *self.job_ids)
+    def complete(self, type : str):
+        redis_conn = redis_pool.get_redis(self.redis_url)
 
-        if result != 1:
+        # Only the job that completes the last analysis queues the report
+        if not self.set_status(redis_conn, {type: "completed"}):
             return
 
-        job_queue = Queue(connection=redis_conn)
+        job_queue = Queue(self.queue_name, connection=redis_conn)
         job_queue.enqueue(self.create_report)
 
     def create_report(self):
-        redis_conn = redis.from_url(self.redis_url)
+        redis_conn = redis_pool.get_redis(self.redis_url)
         print(f"Creating report for {self.audio_file}...")
-        in_file_results = []
-        overall_results = []
-
-        while redis_conn.llen(f"results:{self.audio_base}_{self.start_timestamp}") > 0:
-            det_str = redis_conn.lpop(f"results:{self.audio_base}_{self.start_timestamp}").decode('utf-8')
-            detection = Detection.det_from_string(det_str)
-            if detection.in_file:
-                in_file_results.append(detection)
-            else:
-                overall_results.append(detection)
+
+        # Read and clear the whole results list in one round trip
+        pipe = redis_conn.pipeline(transaction=True)
+        pipe.lrange(f"results:{self.audio_base}_{self.start_timestamp}", 0, -1)
+        pipe.delete(f"results:{self.audio_base}_{self.start_timestamp}")
+        entries = pipe.execute()[0]
+        detections = [Detection.det_from_string(entry.decode('utf-8')) for entry in entries]
+
+        self.write_report(detections)
+
+    def write_report(self, detections: list[Detection]):
+        # Without pre-rendering the API cuts clips from the source file when they are played
+        clips = self.save_clips(detections) if PRERENDER_CLIPS else self.clip_names(detections)
+        in_file_results = [d for d in detections if d.in_file]
+        overall_results = [d for d in detections if not d.in_file]
         
         # Convert Detection objects to dicts for JSON serialization
         overall = []
@@ -148,17 +783,17 @@ class AudioDetectionJob:
                 {
                     "type": "samplerate",
                     "params": {},
-                    "result": self.audio['samplerate']
+                    "result": self.audio_ref['samplerate']
                 },
                 {
                     "type": "channels",
                     "params": {},
-                    "result": self.audio['channels']
+                    "result": self.audio_ref['channels']
                 },
                 {
                     "type": "duration",
                     "params": {},
-                    "result": seconds_to_mmss(self.audio['duration_sec'])
+                    "result": seconds_to_mmss(self.audio_ref['duration_sec'])
                 }
             ]
         )
@@ -175,6 +810,8 @@ class AudioDetectionJob:
         results_dicts = {
             "title": "AuQA Report for " + self.audio_file,
             "file": self.audio_file,
+            "source": os.path.abspath(os.path.join(self.loader.directory, self.audio_file)),
+            "clip_pad": self.clip_pad,
             "overall_results": overall,
             "in_file_detections": [
                 {
@@ -185,7 +822,8 @@ class AudioDetectionJob:
                     "params": d.params,
                     "start_mmss": seconds_to_mmss(d.start),
                     "end_mmss": seconds_to_mmss(d.end),
-                    "details": d.get_details()
+                    "details": d.get_details(),
+                    "clip": clips.get((d.type, d.id))
                 }
                 for d in sorted(in_file_results)
             ]
@@ -196,6 +834,13 @@ class AudioDetectionJob:
         with open(json_path, 'w') as f:
             json.dump(results_dicts, f, indent=2)
         print("Report saved to:", self.out_dir)
+        self.publish_progress(redis_pool.get_redis(self.redis_url), "report", report=os.path.basename(self.out_dir))
+
+        try:
+            get_report_catalog().add(describe_report(json_path, results_dicts))
+        except Exception as e:
+            # The report is on disk either way; a reindex picks it up
+            print(f"[WARN] Could not add report to the catalog: {e}")
 
 
 def simulate_artifacts(loader : Type[AudioLoader], input_file: str, output_file: str, artifacts: dict, seed: int = 42):
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """In-memory Redis (with Lua) behind redis_pool, shared by every client the code opens."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from job_queue import redis_pool, queue_events
+
+    server = fakeredis.FakeServer()
+    connect = lambda url, **kwargs: fakeredis.FakeRedis(server=server)
+    monkeypatch.setattr(redis_pool, "get_redis", connect)
+    monkeypatch.setattr(redis_pool, "get_dedicated", connect)
+    monkeypatch.setattr(queue_events, "_hubs", {})
+    return fakeredis.FakeRedis(server=server)
+
+@pytest.fixture
+def api(fake_redis, tmp_path, monkeypatch):
+    """Flask test client with detection results and the report catalog under tmp_path."""
+    from job_queue import api_server, report_catalog
+
+    results_dir = tmp_path / "detection_results"
+    results_dir.mkdir()
+    monkeypatch.setattr(api_server, "DETECTION_RESULTS_DIR", str(results_dir))
+    monkeypatch.setattr(api_server, "TRASH_DIR", str(results_dir / ".cache" / "trash"))
+    catalog = report_catalog.ReportCatalog(str(results_dir / ".cache" / "reports.sqlite3"))
+    monkeypatch.setattr(report_catalog, "_catalog", catalog)
+    api_server.app.config["TESTING"] = True
+    client = api_server.app.test_client()
+    client.results_dir = results_dir
+    client.catalog = catalog
+    return client
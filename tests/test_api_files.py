@@ -0,0 +1,82 @@
+import json
+
+from job_queue.report_catalog import describe_report
+
+def write_run(api, run_id, name, detections):
+    run_dir = api.results_dir / run_id
+    run_dir.mkdir()
+    report = {"file": name, "overall_results": [{"type": "duration", "params": {}, "result": "00:30.00"}],
+              "in_file_detections": detections}
+    report_path = run_dir / f"{name.rsplit('.', 1)[0]}_report.json"
+    report_path.write_text(json.dumps(report))
+    api.catalog.add(describe_report(str(report_path)))
+    return report
+
+DETECTIONS = [
+    {"type": "Clipping", "id": 0, "start": 1.0, "end": 1.5, "params": {}, "result": None},
+    {"type": "Cutout", "id": 1, "start": 4.0, "end": 4.2, "params": {"minimum_length": 100}, "result": None},
+    {"type": "Loudness", "id": 2, "start": 9.0, "end": 12.0, "params": {"threshold": -10.0}, "result": -6.5},
+    {"type": "Cutout", "id": 3, "start": 20.0, "end": 20.5, "params": {"minimum_length": 50}, "result": None},
+    {"type": "Loudness", "id": 4, "start": 25.0, "end": 26.0, "params": {"threshold": -20.0}, "result": -12.0},
+]
+
+def test_list_files_pages_and_projects(api):
+    for day in range(1, 6):
+        write_run(api, f"run{day}_2026-01-0{day}_10-00-00", f"file{day}.wav", DETECTIONS[:day])
+
+    body = api.get("/api/files?page=2&page_size=2&fields=id,issueCount").get_json()
+    assert body == {"files": [{"id": "run3_2026-01-03_10-00-00", "issueCount": 3},
+                              {"id": "run2_2026-01-02_10-00-00", "issueCount": 2}],
+                    "total": 5, "page": 2, "page_size": 2}
+
+    body = api.get("/api/files?page=1&sort=issues&order=asc&min_issues=2&fields=name").get_json()
+    assert body["files"] == [{"name": "file2.wav"}, {"name": "file3.wav"}, {"name": "file4.wav"}, {"name": "file5.wav"}]
+    assert body["page_size"] == 50
+
+    # Without page or page_size the full list is a bare array, as before paging
+    assert len(api.get("/api/files").get_json()) == 5
+    assert api.get("/api/files?sort=size").status_code == 400
+
+def test_list_files_revalidates_with_etag(api):
+    write_run(api, "run1_2026-01-01_10-00-00", "file1.wav", DETECTIONS)
+    first = api.get("/api/files")
+    assert first.headers["ETag"] and first.headers["Cache-Control"] == "no-cache"
+    assert api.get("/api/files", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    write_run(api, "run2_2026-01-02_10-00-00", "file2.wav", DETECTIONS)
+    changed = api.get("/api/files", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200 and len(changed.get_json()) == 2
+
+def test_report_filters_by_type_time_and_params(api):
+    write_run(api, "run1", "file1.wav", DETECTIONS)
+    ids = lambda query: [d["id"] for d in api.get(f"/api/files/run1/report?{query}").get_json()["in_file_detections"]]
+    assert ids("type=cutout,LOUDNESS") == [1, 2, 3, 4]
+    # Detections overlapping [4.1, 10] seconds
+    assert ids("start=4.1&end=10") == [1, 2]
+    assert ids("param.threshold=-10") == [2]
+    assert ids("type=Cutout&param.minimum_length=50") == [3]
+
+def test_report_pages_with_offset_and_limit(api):
+    report = write_run(api, "run1", "file1.wav", DETECTIONS)
+    body = api.get("/api/files/run1/report?offset=1&limit=2&fields=id,type").get_json()
+    assert body["in_file_detections"] == [{"id": 1, "type": "Cutout"}, {"id": 2, "type": "Loudness"}]
+    assert (body["detections_total"], body["offset"], body["next_offset"]) == (5, 1, 3)
+    assert body["overall_results"] == report["overall_results"]
+
+    last = api.get("/api/files/run1/report?offset=3&limit=2").get_json()
+    assert [d["id"] for d in last["in_file_detections"]] == [3, 4]
+    assert last["next_offset"] is None
+
+    # No query: the report exactly as written
+    assert api.get("/api/files/run1/report").get_json() == report
+
+def test_report_revalidates_with_etag(api):
+    write_run(api, "run1", "file1.wav", DETECTIONS)
+    first = api.get("/api/files/run1/report?type=cutout")
+    etag = first.headers["ETag"]
+    assert api.get("/api/files/run1/report?type=cutout", headers={"If-None-Match": etag}).status_code == 304
+    # Each query has its own ETag
+    other = api.get("/api/files/run1/report?type=clipping", headers={"If-None-Match": etag})
+    assert other.status_code == 200 and other.headers["ETag"] != etag
+
+    assert api.get("/api/files/missing/report").status_code == 404
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from audio_processing.audio_store import AudioStore, DecodeCache
+
+def audio(seed, n=1000):
+    data = np.random.default_rng(seed).uniform(-1, 1, n).astype(np.float32)
+    return {"data": data, "samplerate": 8000, "channels": "mono"}
+
+def age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+def entry_size(tmp_path):
+    probe = AudioStore(str(tmp_path / "probe"))
+    return os.path.getsize(probe._path(probe.put(audio(99))['key']))
+
+def test_get_marks_entry_as_used(tmp_path):
+    store = AudioStore(str(tmp_path), max_bytes=2 * entry_size(tmp_path))
+    old = store.put(audio(0))
+    new = store.put(audio(1))
+    age(store._path(old['key']), 100)
+    age(store._path(new['key']), 50)
+    store.get(old)
+
+    store.put(audio(2))
+    # The older entry was read last, so the other one goes
+    assert store.contains(old['key'])
+    assert not store.contains(new['key'])
+
+def test_memory_hit_marks_store_entry_as_used(tmp_path):
+    store = AudioStore(str(tmp_path))
+    cache = DecodeCache(store, max_memory_bytes=1 << 20)
+    ref = cache.put("source", audio(0))
+    age(store._path(ref['key']), 100)
+    assert cache.get("source") is not None
+    assert time.time() - os.path.getmtime(store._path(ref['key'])) < 10
+
+def test_prune_deletes_index_files_with_their_entries(tmp_path):
+    store = AudioStore(str(tmp_path), max_bytes=entry_size(tmp_path))
+    cache = DecodeCache(store)
+    first = cache.put("first", audio(0))
+    age(store._path(first['key']), 100)
+    cache.put("second", audio(1))
+
+    assert not store.contains(first['key'])
+    assert not os.path.exists(cache._index_path("first"))
+    assert os.path.exists(cache._index_path("second"))
+
+def test_prune_keeps_entries_in_use(tmp_path):
+    in_use = set()
+    store = AudioStore(str(tmp_path), max_bytes=entry_size(tmp_path), in_use=lambda: in_use)
+    held = store.put(audio(0))
+    in_use.add(held['key'])
+    age(store._path(held['key']), 100)
+    other = store.put(audio(1))
+    # Over budget, but the only entry it could drop is held
+    assert store.contains(held['key']) and store.contains(other['key'])
+
+    in_use.clear()
+    store.put(audio(2))
+    assert not store.contains(held['key'])
+
+def test_prune_waits_when_entries_in_use_are_unknown(tmp_path):
+    store = AudioStore(str(tmp_path), max_bytes=entry_size(tmp_path), in_use=lambda: None)
+    first = store.put(audio(0))
+    second = store.put(audio(1))
+    assert store.contains(first['key']) and store.contains(second['key'])
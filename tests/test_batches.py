@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from rq import Queue
+
+from job_queue import api_server, batches, lanes, run_status
+
+@pytest.fixture
+def audio_dir(tmp_path, monkeypatch):
+    """Three short wav files, set as the API's audio directory; runs write under tmp_path."""
+    sf = pytest.importorskip("soundfile")
+    from job_queue import worker
+    monkeypatch.setattr(worker, "OUTPUT_DIR", str(tmp_path / "out"))
+    directory = tmp_path / "audio_files"
+    directory.mkdir()
+    for name in ("a.wav", "b.wav", "c.wav"):
+        sf.write(directory / name, np.zeros(8000, dtype=np.float32), 8000)
+    monkeypatch.setattr(api_server, "get_audio_files_dir", lambda: str(directory))
+    return directory
+
+def submit(api, file_names, priority="batch"):
+    return api.post("/api/queue/job", json={"file_names": file_names, "detection_params": {"Cutout": {}},
+                                           "priority": priority, "submitter": "alice"})
+
+def finish(redis_conn, batch_id, runs):
+    """What workers report as each run of the batch completes."""
+    for run in runs:
+        run_status.set_statuses(redis_conn, run, 100, f"{run}.wav", {"Cutout": "completed"}, batch=batch_id)
+
+def test_small_batch_is_queued_during_the_request(api, fake_redis, audio_dir, monkeypatch):
+    monkeypatch.setattr(lanes, "FAST_LANE_MAX_S", 0.0)
+    response = submit(api, ["a.wav", "missing.wav", "b.wav"])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["queued"] == ["a.wav", "b.wav"]
+    assert body["lanes"] == {"batch": 2}
+    assert body["errors"] == [{"file": "missing.wav", "error": "File not found"}]
+    assert lanes.lane_depths(fake_redis)["batch"]["queued"] == 2
+
+    status = api.get(f"/api/queue/batch/{body['batch_id']}").get_json()
+    assert (status["state"], status["files"], status["submitted"], status["rejected"], status["pending"]) == \
+        ("queued", 3, 2, 1, 2)
+    assert status["errors"] == body["errors"]
+
+    finish(fake_redis, body["batch_id"], ["run-a", "run-b"])
+    status = api.get(f"/api/queue/batch/{body['batch_id']}").get_json()
+    assert (status["state"], status["completed"], status["pending"]) == ("done", 2, 0)
+
+def test_large_batch_is_queued_by_a_worker(api, fake_redis, audio_dir, monkeypatch):
+    monkeypatch.setattr(batches, "SYNC_SUBMIT_MAX_FILES", 2)
+    response = submit(api, ["a.wav", "b.wav", "c.wav"])
+    assert response.status_code == 202
+    body = response.get_json()
+    assert (body["accepted"], body["status_url"]) == (3, f"/api/queue/batch/{body['batch_id']}")
+    # Nothing is checked or queued yet, only the submission job
+    assert api.get(body["status_url"]).get_json()["state"] == "submitting"
+    submissions = Queue("fast", connection=fake_redis).jobs
+    assert [job.func for job in submissions] == [batches.submit_batch]
+
+    # Short files go to the fast lane
+    result = submissions[0].func(*submissions[0].args)
+    assert result["lanes"] == {"fast": 3}
+    status = api.get(body["status_url"]).get_json()
+    assert (status["state"], status["submitted"], status["lanes"]) == ("queued", 3, {"fast": 3})
+
+def test_rejects_unknown_priority(api, audio_dir):
+    assert submit(api, ["a.wav"], priority="urgent").status_code == 400
+    assert api.get("/api/queue/batch/nope").status_code == 404
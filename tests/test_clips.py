@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from audio_processing.clips import ClipCache
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = ClipCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"
+    cache.put("c", b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+    assert cache.bytes == 8
+
+def test_skips_clips_over_budget():
+    cache = ClipCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert cache.get("a") == b"1234"
+
+def test_replacing_an_entry_keeps_the_total():
+    cache = ClipCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("a", b"123456")
+    assert cache.bytes == 6 and len(cache.entries) == 1
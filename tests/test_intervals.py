@@ -0,0 +1,182 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from audio_processing.utils import mask_to_runs, merge_groups, region_reduce, merge_intervals, filter_min_duration
+from audio_processing.distortion_detection import _silent_regions, rms_frame_intervals_seconds
+from audio_processing.loudness import _merge_spikes
+from audio_processing.squim_detector import _low_mos
+
+# The loops the helpers replaced, kept here as the reference they must match
+
+def baseline_silent_regions(rms, intervals, silence_threshold):
+    silent_frames = rms < silence_threshold
+    regions = []
+    start_time = None
+    end_time = None
+    for i, is_silent in enumerate(silent_frames):
+        if is_silent:
+            if start_time is None:
+                start_time = intervals[i][0]
+            end_time = intervals[i][1]
+        elif not is_silent and start_time is not None:
+            regions.append((start_time, end_time))
+            start_time = None
+            end_time = None
+    if start_time is not None:
+        end_time = intervals[-1][1]
+        regions.append((start_time, end_time))
+    return regions
+
+def baseline_min_duration(regions, min_duration):
+    kept = []
+    for region in regions:
+        if region[1] - region[0] >= min_duration:
+            kept.append(region)
+    return kept
+
+def baseline_merge_sections(sections):
+    merged = []
+    for start, end in sorted(sections):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(m) for m in merged]
+
+def baseline_merge_spikes(starts, lufs, win_len, sr, threshold):
+    above = lufs > threshold
+    detections = [(int(start), int(start) + win_len, float(loud)) for start, loud in zip(starts[above], lufs[above])]
+    if len(detections) == 0:
+        return []
+    merged = []
+    current_start, current_end, current_max_lufs = detections[0]
+    for start, end, lufs in detections[1:]:
+        if start <= current_end:
+            current_end = max(current_end, end)
+            current_max_lufs = max(current_max_lufs, lufs)
+        else:
+            merged.append((current_start / sr, current_end / sr, current_max_lufs))
+            current_start, current_end, current_max_lufs = start, end, lufs
+    merged.append((current_start / sr, current_end / sr, current_max_lufs))
+    return merged
+
+def baseline_low_mos(scores, mos_threshold):
+    detections = []
+    for start_t, end_t, mos_val in scores:
+        if mos_val < mos_threshold:
+            detections.append((start_t, end_t, mos_val))
+    return detections
+
+def baseline_runs(mask):
+    runs = []
+    start = None
+    for i, value in enumerate(mask):
+        if value and start is None:
+            start = i
+        elif not value and start is not None:
+            runs.append((start, i))
+            start = None
+    if start is not None:
+        runs.append((start, len(mask)))
+    return runs
+
+MASKS = {
+    "empty": np.zeros(0, dtype=bool),
+    "all_true": np.ones(12, dtype=bool),
+    "all_false": np.zeros(12, dtype=bool),
+    "alternating": np.arange(11) % 2 == 0,
+    "edges": np.array([1, 1, 0, 0, 1, 0, 1, 1, 1], dtype=bool),
+    "random": np.random.default_rng(1).random(500) < 0.4,
+}
+
+@pytest.mark.parametrize("name", MASKS)
+def test_mask_to_runs(name):
+    runs = mask_to_runs(MASKS[name])
+    assert runs.shape == (len(baseline_runs(MASKS[name])), 2)
+    assert [tuple(r) for r in runs.tolist()] == baseline_runs(MASKS[name])
+
+@pytest.mark.parametrize("name", MASKS)
+def test_silent_regions(name):
+    mask = MASKS[name]
+    sr, frame_length, hop_length = 1000, 100, 50
+    rms = np.where(mask, 0.0, 1.0)
+    num_samples = max(len(rms) - 1, 0) * hop_length
+    intervals = rms_frame_intervals_seconds(len(rms), sr, frame_length, hop_length, duration_s=num_samples / sr)
+    expected = baseline_min_duration(baseline_silent_regions(rms, intervals, 0.5), (frame_length - 1) / sr)
+    assert _silent_regions(rms, sr, frame_length, hop_length, num_samples, 0.5) == expected
+
+def test_silent_regions_drop_partial_edge_frames():
+    sr, frame_length, hop_length = 1000, 100, 50
+    # Only the first and last frames, each half clamped away, are silent
+    rms = np.ones(21)
+    rms[[0, -1]] = 0.0
+    assert _silent_regions(rms, sr, frame_length, hop_length, 1000, 0.5) == []
+    rms[[1, -2]] = 0.0
+    np.testing.assert_allclose(_silent_regions(rms, sr, frame_length, hop_length, 1000, 0.5), [(0.0, 0.1), (0.9, 1.0)])
+
+SECTIONS = {
+    "empty": [],
+    "single": [(3, 9)],
+    "touching": [(0, 5), (5, 10), (10, 12)],
+    "gap": [(0, 5), (6, 10)],
+    "nested": [(0, 20), (2, 5), (8, 30), (31, 32)],
+    "random": [tuple(sorted(p)) for p in np.random.default_rng(2).integers(0, 1000, (200, 2)).tolist()],
+}
+
+@pytest.mark.parametrize("name", SECTIONS)
+def test_merge_intervals(name):
+    sections = np.array(sorted(SECTIONS[name]), dtype=np.int64).reshape(-1, 2)
+    starts, ends = merge_intervals(sections[:, 0], sections[:, 1])
+    assert list(zip(starts.tolist(), ends.tolist())) == baseline_merge_sections(SECTIONS[name])
+
+@pytest.mark.parametrize("name", SECTIONS)
+def test_merge_groups_and_region_reduce(name):
+    sections = np.array(sorted(SECTIONS[name]), dtype=np.int64).reshape(-1, 2)
+    values = np.arange(len(sections))[::-1]
+    groups = merge_groups(sections[:, 0], sections[:, 1])
+    lowest = region_reduce(values, groups, np.minimum)
+
+    # Reference: walk the sorted sections, tracking the furthest end and the group's min
+    expected = []
+    furthest = None
+    for (start, end), value in zip(sections.tolist(), values.tolist()):
+        if furthest is not None and start <= furthest:
+            expected[-1] = min(expected[-1], value)
+            furthest = max(furthest, end)
+        else:
+            expected.append(value)
+            furthest = end
+    assert lowest.tolist() == expected
+
+@pytest.mark.parametrize("threshold", [-100.0, -20.0, 0.0, 100.0])
+def test_merge_spikes(threshold):
+    rng = np.random.default_rng(3)
+    sr, win_len, hop_len = 1000, 400, 100
+    starts = np.arange(300) * hop_len
+    lufs = rng.normal(-20, 8, len(starts))
+    # Touching windows: exactly win_len apart
+    lufs[::4] = 50.0
+    assert _merge_spikes(starts, lufs, win_len, sr, threshold) == baseline_merge_spikes(starts, lufs, win_len, sr, threshold)
+
+@pytest.mark.parametrize("scores", [
+    [],
+    [(0.0, 1.0, 1.5), (0.5, 1.5, 2.5), (1.0, 2.0, 1.9)],
+    [(0.0, 1.0, 1.0), (0.5, 1.5, 1.0)],
+    [(0.0, 1.0, 3.0), (0.5, 1.5, 2.0)],
+])
+def test_low_mos(scores):
+    assert _low_mos(scores, 2.0) == baseline_low_mos(scores, 2.0)
+
+@pytest.mark.parametrize("name", SECTIONS)
+@pytest.mark.parametrize("min_duration", [0, 5, 100])
+def test_filter_min_duration(name, min_duration):
+    sections = np.array(sorted(SECTIONS[name]), dtype=np.int64).reshape(-1, 2)
+    values = np.arange(len(sections))
+    starts, ends, kept = filter_min_duration(sections[:, 0], sections[:, 1], min_duration, values)
+    expected = baseline_min_duration([(s, e, v) for (s, e), v in zip(sections.tolist(), values.tolist())], min_duration)
+    assert list(zip(starts.tolist(), ends.tolist(), kept.tolist())) == expected
@@ -0,0 +1,58 @@
+import pytest
+from rq import Queue
+from rq.job import Job
+
+from job_queue import lanes
+
+def analyze(submitter, n):
+    """Stands in for AudioDetectionJob.load_and_queue; only queued here, never run."""
+    return submitter, n
+
+def queued(redis_conn, lane):
+    """(submitter, n) of the jobs in a lane's RQ queue, in the order workers take them."""
+    return [tuple(Job.fetch(job_id, connection=redis_conn).args) for job_id in Queue(lane, connection=redis_conn).job_ids]
+
+def take_all(redis_conn, lane):
+    """What workers do: take every job off the lane's RQ queue."""
+    queue = Queue(lane, connection=redis_conn)
+    while queue.count:
+        queue.pop_job_id()
+
+@pytest.fixture
+def depth(monkeypatch):
+    monkeypatch.setattr(lanes, "FAIR_QUEUE_DEPTH", 4)
+
+def test_choose_lane(monkeypatch):
+    monkeypatch.setattr(lanes, "FAST_LANE_MAX_S", 60.0)
+    assert lanes.choose_lane("interactive", 30) == "fast"
+    assert lanes.choose_lane("batch", 60) == "fast"
+    assert lanes.choose_lane("batch", 61) == "batch"
+    assert lanes.choose_lane("batch", None) == "batch"
+    # Backfill never jumps ahead, however short
+    assert lanes.choose_lane("backfill", 5) == "backfill"
+    with pytest.raises(ValueError):
+        lanes.choose_lane("urgent", 5)
+
+def test_fair_lane_takes_submitters_in_turn(fake_redis, depth):
+    lanes.submit_many(fake_redis, "batch", "alice", [(analyze, ("alice", n)) for n in range(6)])
+    lanes.submit_many(fake_redis, "batch", "bob", [(analyze, ("bob", n)) for n in range(2)])
+    # alice had the lane to herself while the queue filled; the rest wait their turn
+    assert queued(fake_redis, "batch") == [("alice", 0), ("alice", 1), ("alice", 2), ("alice", 3)]
+    assert lanes.lane_depths(fake_redis)["batch"] == {"queued": 4, "running": 0, "waiting": 4, "submitters": 2}
+
+    take_all(fake_redis, "batch")
+    lanes.submit(fake_redis, "batch", "carol", analyze, "carol", 0)
+    # One job per submitter in turn; a late submitter does not wait behind alice's backlog
+    assert queued(fake_redis, "batch") == [("alice", 4), ("bob", 0), ("carol", 0), ("alice", 5)]
+    assert lanes.lane_depths(fake_redis)["batch"]["submitters"] == 1
+
+    take_all(fake_redis, "batch")
+    assert lanes.feed_all(fake_redis) == 1
+    assert queued(fake_redis, "batch") == [("bob", 1)]
+    assert lanes.lane_depths(fake_redis)["batch"]["submitters"] == 0
+    assert lanes.feed(fake_redis, "batch") == 0
+
+def test_other_lanes_queue_directly(fake_redis, depth):
+    lanes.submit_many(fake_redis, "fast", "alice", [(analyze, ("alice", n)) for n in range(6)])
+    assert len(queued(fake_redis, "fast")) == 6
+    assert lanes.lane_depths(fake_redis)["fast"] == {"queued": 6, "running": 0, "waiting": 0, "submitters": 0}
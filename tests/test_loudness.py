@@ -0,0 +1,84 @@
+import os
+import sys
+
+import numpy as np
+import pyloudnorm as pyln
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from audio_processing.features import FeatureCache, FEATURE_CHUNK_SAMPLES
+from audio_processing.loudness import COMPAT_TOLERANCE_LU, get_loudness_spikes, get_lufs, sliding_loudness
+
+def program(sr, seconds, seed=0):
+    """Noise and tones with a loudness envelope and a stretch of digital silence."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    envelope = 0.05 + 0.3 * (0.5 + 0.5 * np.sin(2 * np.pi * t / 7.0)) ** 2
+    audio = envelope * (0.5 * rng.normal(0, 0.3, len(t)) + np.sin(2 * np.pi * 440 * t) + 0.5 * np.sin(2 * np.pi * 97 * t))
+    audio[int(4 * sr):int(5.5 * sr)] = 0.0
+    return audio.astype(np.float32)
+
+@pytest.mark.parametrize("sr", [16000, 22050, 44100])
+def test_fast_matches_compat(sr):
+    audio = program(sr, 20)
+    win_len, hop_len = int(3.0 * sr), int(1.5 * sr)
+    fast_starts, fast = sliding_loudness(audio, sr, win_len, hop_len)
+    compat_starts, compat = sliding_loudness(audio, sr, win_len, hop_len, compat=True)
+
+    assert np.array_equal(fast_starts, compat_starts)
+    silent = np.isneginf(compat)
+    assert np.array_equal(np.isneginf(fast), silent)
+    # Every window after the first has a settled filter in fast mode only
+    assert np.max(np.abs(fast[~silent] - compat[~silent])) <= COMPAT_TOLERANCE_LU
+
+def test_spikes_match_compat():
+    sr = 16000
+    audio = program(sr, 20)
+    fast = get_loudness_spikes(audio, sr, threshold=-20.0)
+    compat = get_loudness_spikes(audio, sr, threshold=-20.0, compat=True)
+    assert fast
+    assert [(start, end) for start, end, _ in fast] == [(start, end) for start, end, _ in compat]
+    assert np.allclose([loud for *_, loud in fast], [loud for *_, loud in compat], atol=COMPAT_TOLERANCE_LU)
+
+@pytest.mark.parametrize("sr", [11025, 48000])
+def test_lufs_matches_pyloudnorm(sr):
+    audio = program(sr, 12)
+    assert get_lufs(audio, sr) == pytest.approx(pyln.Meter(sr).integrated_loudness(audio), abs=1e-6)
+
+def test_window_sums_across_chunks():
+    sr = 8000
+    audio = np.random.default_rng(4).normal(0, 0.5, FEATURE_CHUNK_SAMPLES * 2 + 777).astype(np.float32)
+    features = FeatureCache(audio, sr)
+    starts = np.random.default_rng(5).integers(-1000, len(audio), 300)
+    lengths = np.random.default_rng(6).integers(1, FEATURE_CHUNK_SAMPLES, 300)
+
+    energy = np.concatenate(([0.0], np.cumsum(np.square(audio, dtype=np.float64))))
+    lo, hi = np.clip(starts, 0, len(audio)), np.clip(starts + lengths, 0, len(audio))
+    assert np.allclose(features.window_sums("energy", starts, lengths), energy[hi] - energy[lo])
+    nonzero = np.concatenate(([0], np.cumsum(np.abs(audio) > 1e-8)))
+    assert np.array_equal(features.window_sums("nonzero", starts, lengths), nonzero[hi] - nonzero[lo])
+
+@pytest.mark.parametrize("sr", [16000, 22050, 44100, 48000])
+def test_spikes_and_lufs_share_one_k_weighting_pass(sr, monkeypatch):
+    audio = program(sr, 12)
+    features = FeatureCache(audio, sr)
+    passes = []
+    segment_sums = FeatureCache.segment_sums
+    def counting(self, stat, bounds, transform="raw"):
+        passes.append((stat, transform))
+        return segment_sums(self, stat, bounds, transform)
+    monkeypatch.setattr(FeatureCache, "segment_sums", counting)
+
+    spikes = get_loudness_spikes(audio, sr, threshold=-25.0, features=features)
+    lufs = get_lufs(audio, sr, features=features)
+    assert passes.count(("energy", "k_weighted")) == 1
+    assert passes.count(("nonzero", "raw")) == 1
+
+    # Same values as summing every window's bounds straight from the signal
+    monkeypatch.setattr(FeatureCache, "segment_sums", segment_sums)
+    monkeypatch.setattr(FeatureCache, "grid_sums", lambda self, *args, **kwargs: (np.array([-1, 2**40]), np.zeros(2)))
+    exact = get_loudness_spikes(audio, sr, threshold=-25.0)
+    assert [span[:2] for span in spikes] == [span[:2] for span in exact]
+    assert np.allclose([span[2] for span in spikes], [span[2] for span in exact], rtol=0, atol=1e-9)
+    assert lufs == pytest.approx(get_lufs(audio, sr), abs=1e-9)
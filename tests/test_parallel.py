@@ -0,0 +1,95 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from audio_processing.distortion_detection import detect_cutout, cutout_shard_context, _detect_clipping_blocks
+from audio_processing.loudness import get_loudness_spikes, spike_shard_context
+from job_queue.parallel import plan_shards, run_on_slice, merge_shards
+
+SR = 8000
+CUTOUT_PARAMS = {"silence_threshold": 0.0001, "minimum_length": 100}
+
+LOUDNESS_PARAMS = {"window_size": 0.4, "threshold": -16.0}
+
+def sliced(det_type, params, context, audio, shard_s):
+    align, overlap = context(SR, **params)
+    pieces = [
+        (core_start / SR, core_end / SR, run_on_slice(det_type, params, audio[read_start:read_end], SR, read_start))
+        for read_start, core_start, core_end, read_end in plan_shards(len(audio), int(shard_s * SR), align, overlap)
+    ]
+    return merge_shards(pieces, "regions")
+
+def sliced_cutout(audio, shard_s):
+    return sliced("Cutout", CUTOUT_PARAMS, cutout_shard_context, audio, shard_s)
+
+def assert_same_regions(actual, expected):
+    assert len(actual) == len(expected)
+    width = len(expected[0]) if expected else 2
+    np.testing.assert_allclose(np.array(actual).reshape(-1, width), np.array(expected).reshape(-1, width), atol=1e-9)
+
+@pytest.fixture
+def noise():
+    return np.random.default_rng(0).uniform(-0.5, 0.5, 10 * SR).astype(np.float32)
+
+@pytest.mark.parametrize("shard_s", [1.0, 2.0, 3.3, 4.0])
+def test_region_across_seams_is_joined(noise, shard_s):
+    noise[int(2.5 * SR):int(7.5 * SR)] = 0
+    assert_same_regions(sliced_cutout(noise, shard_s), detect_cutout(noise, SR, **CUTOUT_PARAMS))
+
+@pytest.mark.parametrize("shard_s", [1.0, 2.0, 4.0])
+def test_touching_regions_at_seam_stay_apart(noise, shard_s):
+    noise[3 * SR:6 * SR] = 0
+    # Two quiet samples, each below the threshold in the RMS frames either side but
+    # together above it in the frame between, leave one loud frame ending a silent
+    # run exactly where the next begins, at 4.0 s (a seam for every shard_s here)
+    noise[int(3.975 * SR)] = noise[int(4.025 * SR)] = 0.00245
+    whole = detect_cutout(noise, SR, **CUTOUT_PARAMS)
+    assert whole == [(3.0, 4.0), (4.0, 6.0)]
+    assert_same_regions(sliced_cutout(noise, shard_s), whole)
+
+@pytest.mark.parametrize("shard_s", [0.8, 1.0, 1.6, 2.2, 3.3])
+def test_loud_region_across_seams_is_joined(noise, shard_s):
+    # Loud from 1.8 s to 6.2 s (so in windows from 1.6 s to 6.4 s), over every seam;
+    # with 0.8 s and 1.6 s shards it starts and ends on seams. Shards restart the
+    # K-weighting filter, which has settled long before the core (see
+    # spike_shard_context), so values agree to rounding.
+    noise *= 0.05
+    noise[int(1.8 * SR):int(6.2 * SR)] *= 20
+    whole = get_loudness_spikes(noise, SR, **LOUDNESS_PARAMS)
+    assert [region[:2] for region in whole] == [(1.6, 6.4)]
+    assert_same_regions(sliced("Loudness", LOUDNESS_PARAMS, spike_shard_context, noise, shard_s), whole)
+
+@pytest.mark.parametrize("block_len", [SR, 2 * SR + 9, 2 * SR + 12])
+def test_clipped_region_across_block_seams_is_joined(block_len):
+    clipdetect = pytest.importorskip("clipdetect")
+    t = np.arange(4 * SR) / SR
+    audio = np.clip(0.9 * np.sin(2 * np.pi * 50 * t), -0.5, 0.5).astype(np.float32)
+    # A second-long clipped stretch over the 2 s seam, with dips below the threshold
+    # short enough to be bridged right after it
+    audio[int(1.5 * SR):int(2.5 * SR)] = 0.5
+    audio[2 * SR + 8:2 * SR + 11] = 0.45
+    sections, _ = clipdetect.detect_clipping(audio)
+    expected = [(s["start"], s["end"]) for s in sections]
+    assert any(start < 2 * SR < end for start, end in expected)
+    assert _detect_clipping_blocks(audio, block_len) == expected
+
+def test_merge_shards_drops_rounding_slivers_at_a_seam():
+    # A region that starts on the 1 s seam, seen from the slice before it in file
+    # time, starts a rounding error early
+    pieces = [(0.0, 1.0, [(0.9999999999999999, 1.6, -3.0)]), (1.0, 2.0, [(1.0, 1.6, -3.0)])]
+    assert merge_shards(pieces, "regions") == [(1.0, 1.6, -3.0)]
+
+def test_merge_shards_keeps_max_value_of_split_region():
+    pieces = [
+        (0.0, 1.0, [(0.2, 1.4, -5.0)]),
+        (1.0, 2.0, [(0.8, 1.5, -3.0), (1.5, 1.7, -8.0)]),
+    ]
+    assert merge_shards(pieces, "regions") == [(0.2, 1.5, -3.0), (1.5, 1.7, -8.0)]
+
+def test_merge_shards_windows_keeps_items_starting_in_core():
+    pieces = [(0.0, 1.0, [(0.5, 1.5, 1.0), (1.0, 2.0, 2.0)]), (1.0, 2.0, [(0.5, 1.5, 1.0), (1.0, 2.0, 2.0)])]
+    assert merge_shards(pieces, "windows") == [(0.5, 1.5, 1.0), (1.0, 2.0, 2.0)]
@@ -0,0 +1,81 @@
+import json
+import queue
+
+from job_queue import api_server, queue_events, run_status
+
+def events(response):
+    """Decoded data events of an SSE response, skipping keepalive comments."""
+    for chunk in response.response:
+        chunk = chunk.decode("utf-8") if isinstance(chunk, bytes) else chunk
+        if chunk.startswith("data: "):
+            yield json.loads(chunk[len("data: "):])
+
+def set_state(redis_conn, run, timestamp, statuses):
+    """What a worker does on a status change: update the run, then publish the event."""
+    _, completed, total, state, prev_state, version = run_status.set_statuses(redis_conn, run, timestamp, "a.wav", statuses)
+    message = {"event": "detector", "run": run, "timestamp": timestamp, "completed": completed, "total": total, "state": state}
+    if version:
+        message.update(prev_state=prev_state or None, version=version)
+    redis_conn.publish(api_server.QUEUE_EVENTS_CHANNEL, json.dumps(message))
+
+def test_version_counts_state_changes_only(fake_redis):
+    *_, state, prev_state, version = run_status.set_statuses(fake_redis, "r1", 100, "a.wav", {"Cutout": "queued"})
+    assert (state, prev_state, version) == ("queued", "", 1)
+    *_, version = run_status.set_statuses(fake_redis, "r1", 100, "a.wav", {"Clipping": "queued"})
+    assert version == 0
+    *_, state, prev_state, version = run_status.set_statuses(fake_redis, "r1", 100, "a.wav", {"Cutout": "running"})
+    assert (state, prev_state, version) == ("running", "queued", 2)
+    assert run_status.queue_snapshot(fake_redis) == ({"queued": 0, "running": 1, "completed": 0, "failed": 0}, 2)
+
+def test_snapshot_then_relayed_changes(api, fake_redis, monkeypatch):
+    monkeypatch.setattr(api_server, "SSE_KEEPALIVE_S", 0.2)
+    set_state(fake_redis, "old", 50, {"Cutout": "completed"})
+    set_state(fake_redis, "r1", 100, {"Cutout": "queued"})
+
+    response = api.get("/api/queue/events?since=90", buffered=False)
+    stream = events(response)
+    snapshot = next(stream)
+    assert snapshot == {"event": "snapshot", "counts": {"queued": 1, "running": 0, "completed": 0, "failed": 0}, "version": 2}
+
+    set_state(fake_redis, "old", 50, {"Clipping": "queued"})  # before ?since, filtered out
+    set_state(fake_redis, "r1", 100, {"Cutout": "completed"})
+    event = next(stream)
+    assert (event["run"], event["prev_state"], event["state"]) == ("r1", "queued", "completed")
+    assert event["version"] > snapshot["version"]
+    response.close()
+
+def test_streams_share_one_subscription(api, fake_redis, monkeypatch):
+    monkeypatch.setattr(api_server, "SSE_KEEPALIVE_S", 0.2)
+    responses = [api.get("/api/queue/events", buffered=False) for _ in range(3)]
+    streams = [events(response) for response in responses]
+    for stream in streams:
+        assert next(stream)["event"] == "snapshot"
+
+    hub = queue_events.get_event_hub(api_server.REDIS_URL, api_server.QUEUE_EVENTS_CHANNEL)
+    assert len(hub.clients) == 3
+    assert fake_redis.pubsub_numsub(api_server.QUEUE_EVENTS_CHANNEL)[0][1] == 1
+
+    set_state(fake_redis, "r1", 100, {"Cutout": "queued"})
+    assert all(next(stream)["run"] == "r1" for stream in streams)
+    for response in responses:
+        response.close()
+    assert len(hub.clients) == 0
+
+def test_turns_streams_away_past_the_limit(api, monkeypatch):
+    hub = queue_events.EventHub(api_server.REDIS_URL, api_server.QUEUE_EVENTS_CHANNEL, max_clients=1)
+    monkeypatch.setitem(queue_events._hubs, (api_server.REDIS_URL, api_server.QUEUE_EVENTS_CHANNEL), hub)
+    first = api.get("/api/queue/events", buffered=False)
+    assert next(events(first))["event"] == "snapshot"
+    assert api.get("/api/queue/events").status_code == 503
+    first.close()
+    # /api/queue/status still answers for clients that fall back to polling
+    assert api.get("/api/queue/status").get_json()["total"] == 0
+
+def test_slow_client_is_dropped():
+    hub = queue_events.EventHub("redis://unused", "channel")
+    client = queue.Queue(maxsize=2)
+    hub.clients.add(client)
+    for i in range(3):
+        hub._send(str(i))
+    assert client not in hub.clients
+    assert client.get_nowait() is None
@@ -0,0 +1,49 @@
+import pytest
+import redis
+
+from job_queue import redis_pool
+
+@pytest.fixture
+def pooled(monkeypatch):
+    """A two-connection pool on an in-memory Redis, registered as this process's client."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pool = redis_pool.CountingConnectionPool(connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(),
+                                             max_connections=2, timeout=0.1)
+    client = redis.Redis(connection_pool=pool)
+    monkeypatch.setattr(redis_pool, "_clients", {"redis://test": client})
+    return client
+
+def test_one_client_per_url(monkeypatch):
+    monkeypatch.setattr(redis_pool, "_clients", {})
+    client = redis_pool.get_redis("redis://localhost:1/0")
+    assert redis_pool.get_redis("redis://localhost:1/0") is client
+    assert redis_pool.get_redis("redis://localhost:1/1") is not client
+    assert isinstance(client.connection_pool, redis_pool.CountingConnectionPool)
+    # Connections are opened on demand, not when the client is made
+    assert redis_pool.pool_stats() == {"max": 2 * redis_pool.REDIS_POOL_SIZE, "created": 0, "in_use": 0, "idle": 0}
+
+def test_commands_reuse_a_pooled_connection(pooled):
+    for i in range(10):
+        pooled.set("key", i)
+    assert redis_pool.pool_stats() == {"max": 2, "created": 1, "in_use": 0, "idle": 1}
+
+def test_exhausted_pool_waits_then_fails(pooled):
+    pool = pooled.connection_pool
+    held = [pool.get_connection(), pool.get_connection()]
+    assert redis_pool.pool_stats() == {"max": 2, "created": 2, "in_use": 2, "idle": 0}
+    with pytest.raises(redis.ConnectionError):
+        pooled.get("key")
+
+    # A released connection is handed to the next caller instead of a new one
+    pool.release(held.pop())
+    assert pooled.set("key", 1)
+    assert redis_pool.pool_stats() == {"max": 2, "created": 2, "in_use": 1, "idle": 1}
+    pool.release(held.pop())
+    assert redis_pool.pool_stats()["in_use"] == 0
+
+def test_workers_publish_their_counters(pooled, fake_redis):
+    pooled.ping()
+    redis_pool.publish_pool_stats(fake_redis)
+    metrics = redis_pool.connection_metrics(fake_redis)
+    assert metrics["pool"] == {"max": 2, "created": 1, "in_use": 0, "idle": 1}
+    assert list(metrics["workers"].values()) == [{"role": "worker", "max": 2, "created": 1, "in_use": 0, "idle": 1}]
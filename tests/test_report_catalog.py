@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from job_queue.report_catalog import ReportCatalog, describe_report
+
+def write_run(results_dir, run_id, name, issues):
+    """A run directory holding a report with the given number of detections."""
+    run_dir = results_dir / run_id
+    run_dir.mkdir()
+    report = {"file": name, "overall_results": [], "in_file_detections": [{"type": "Cutout", "id": i} for i in range(issues)]}
+    report_path = run_dir / f"{name.rsplit('.', 1)[0]}_report.json"
+    report_path.write_text(json.dumps(report))
+    return describe_report(str(report_path))
+
+RUNS = [
+    ("a_2026-01-01_10-00-00", "alpha.wav", 3),
+    ("b_2026-01-02_10-00-00", "beta.wav", 0),
+    ("c_2026-01-03_10-00-00", "gamma.wav", 7),
+    ("d_2026-01-04_10-00-00", "alphabet.wav", 1),
+    ("e_2026-01-05_10-00-00", "delta.wav", 5),
+]
+
+@pytest.fixture
+def catalog(tmp_path):
+    results_dir = tmp_path / "detection_results"
+    results_dir.mkdir()
+    catalog = ReportCatalog(str(tmp_path / "reports.sqlite3"))
+    for run in RUNS:
+        catalog.add(write_run(results_dir, *run))
+    catalog.results_dir = results_dir
+    return catalog
+
+def ids(entries):
+    return [e['id'][0] for e in entries]
+
+def test_pages_newest_first(catalog):
+    assert [ids(catalog.query(page=p, page_size=2)[0]) for p in (1, 2, 3, 4)] == [["e", "d"], ["c", "b"], ["a"], []]
+    assert catalog.query(page=3, page_size=2)[1] == 5
+    assert ids(catalog.query()[0]) == ["e", "d", "c", "b", "a"]
+
+def test_sorts_and_filters(catalog):
+    assert ids(catalog.query(sort="issues", order="desc")[0]) == ["c", "e", "a", "d", "b"]
+    assert ids(catalog.query(sort="name", order="asc")[0]) == ["a", "d", "b", "e", "c"]
+    # Case-insensitive substring match, counted before paging
+    entries, total = catalog.query(name="ALPHA", page=1, page_size=1)
+    assert (ids(entries), total) == (["d"], 2)
+    # A bare end date covers the whole day
+    assert ids(catalog.query(date_from="2026-01-02", date_to="2026-01-04")[0]) == ["d", "c", "b"]
+    assert ids(catalog.query(min_issues=1, max_issues=5)[0]) == ["e", "d", "a"]
+
+def test_rejects_unknown_sort(catalog):
+    with pytest.raises(ValueError):
+        catalog.query(sort="size")
+    with pytest.raises(ValueError):
+        catalog.query(order="sideways")
+
+def test_reindex_rebuilds_from_run_directories(catalog):
+    catalog.remove(["a_2026-01-01_10-00-00"])
+    (catalog.results_dir / "b_2026-01-02_10-00-00" / "beta_report.json").unlink()
+    write_run(catalog.results_dir, "f_2026-01-06_10-00-00", "epsilon.wav", 2)
+    assert catalog.reindex(str(catalog.results_dir)) == 5
+    assert ids(catalog.query()[0]) == ["f", "e", "d", "c", "a"]
+
+def test_files_come_from_the_catalog(api):
+    write_run(api.results_dir, "a_2026-01-01_10-00-00", "alpha.wav", 3)
+    # Not cataloged yet, so not listed; the directory is not scanned per request
+    assert api.get("/api/files").get_json() == []
+
+    api.catalog.reindex(str(api.results_dir))
+    files = api.get("/api/files").get_json()
+    assert [(f['id'], f['name'], f['issueCount'], f['processedDate']) for f in files] == \
+        [("a_2026-01-01_10-00-00", "alpha.wav", 3, "2026-01-01 10:00:00")]
+
+    assert api.post("/api/files/delete", json={"file_ids": ["a_2026-01-01_10-00-00"]}).status_code == 200
+    assert api.get("/api/files").get_json() == []
@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from audio_processing.utils import Detection
+from job_queue.result_cache import ResultCache
+
+def detections(n):
+    return [Detection(type="Cutout", params={}, id=i, start=float(i), end=i + 0.5) for i in range(n)]
+
+def test_implementation_is_part_of_the_key():
+    whole = ResultCache.key_for("audio", "Cutout", 1, {"minimum_length": 100})
+    streamed = ResultCache.key_for("audio", "Cutout", 1, {"minimum_length": 100}, impl="stream")
+    assert whole != streamed
+    assert whole == ResultCache.key_for("audio", "Cutout", 1, {"minimum_length": 100.0})
+
+def test_put_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("a", detections(20))
+    entry_size = os.path.getsize(tmp_path / "a.json")
+    cache = ResultCache(str(tmp_path), max_bytes=2 * entry_size)
+
+    cache.put("b", detections(20))
+    past = time.time() - 100
+    os.utime(tmp_path / "a.json", (past, past))
+    os.utime(tmp_path / "b.json", (past + 1, past + 1))
+    assert cache.get("a") is not None  # a is now the most recently used
+
+    cache.put("c", detections(20))
+    assert cache.get("b") is None
+    assert len(cache.get("a")) == 20
+    assert len(cache.get("c")) == 20
@@ -0,0 +1,43 @@
+from job_queue import run_status
+
+def test_script_declares_every_key(fake_redis, monkeypatch):
+    touched = []
+    original = fake_redis.eval
+    def checking_eval(script, numkeys, *keys_and_args):
+        touched.append(list(keys_and_args[:numkeys]))
+        return original(script, numkeys, *keys_and_args)
+    monkeypatch.setattr(fake_redis, "eval", checking_eval)
+
+    run_status.set_statuses(fake_redis, "r1", 100, "a.wav", {"Cutout": "completed"}, batch="b1")
+    declared = set(touched[0])
+    # Everything the script wrote is among the keys it was given
+    assert set(k.decode() for k in fake_redis.keys("*")) <= declared
+    assert {"runs", "runs:queued", "runs:completed", "batch:b1"} <= declared
+
+def test_run_summaries_pages_newest_first(fake_redis):
+    for i in range(5):
+        run_status.set_statuses(fake_redis, f"r{i}", 100 + i, "a.wav", {"Cutout": "queued"})
+    first = run_status.run_summaries(fake_redis, limit=2)
+    assert list(first) == ["r4", "r3"]
+    assert list(run_status.run_summaries(fake_redis, offset=2, limit=2)) == ["r2", "r1"]
+    assert list(run_status.run_summaries(fake_redis, since=103, limit=10)) == ["r4", "r3"]
+    assert first["r4"]["state"] == "queued" and first["r4"]["total"] == 1
+
+def test_state_index_follows_runs(fake_redis):
+    run_status.set_statuses(fake_redis, "r1", 100, "a.wav", {"Cutout": "queued", "Clipping": "queued"})
+    run_status.set_statuses(fake_redis, "r1", 100, "a.wav", {"Cutout": "completed"})
+    assert run_status.queue_counts(fake_redis) == {"queued": 0, "running": 1, "completed": 0, "failed": 0}
+    run_status.set_statuses(fake_redis, "r1", 100, "a.wav", {"Clipping": "failed"})
+    assert run_status.queue_counts(fake_redis) == {"queued": 0, "running": 0, "completed": 0, "failed": 1}
+
+def test_audio_is_held_while_its_run_is_active(fake_redis):
+    run_status.set_statuses(fake_redis, "r1", 100, "a.wav", {"Cutout": "queued"})
+    run_status.set_statuses(fake_redis, "r2", 101, "b.wav", {"Cutout": "running"})
+    run_status.hold_audio(fake_redis, "r1", "a-native", "a-16k")
+    run_status.hold_audio(fake_redis, "r2", "b-native")
+    assert run_status.held_audio_keys(fake_redis) == {"a-native", "a-16k", "b-native"}
+
+    run_status.set_statuses(fake_redis, "r1", 100, "a.wav", {"Cutout": "completed"})
+    assert run_status.held_audio_keys(fake_redis) == {"b-native"}
+    run_status.set_statuses(fake_redis, "r2", 101, "b.wav", {"Cutout": "failed"})
+    assert run_status.held_audio_keys(fake_redis) == set()
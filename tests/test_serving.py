@@ -0,0 +1,85 @@
+import os
+import signal
+import sys
+import threading
+import types
+
+import pytest
+
+from job_queue import api_server, serving
+
+@pytest.fixture
+def shutting_down(monkeypatch):
+    event = threading.Event()
+    monkeypatch.setattr(serving, "shutting_down", event)
+    return event
+
+def test_gunicorn_runs_threaded_workers(monkeypatch, shutting_down):
+    base = pytest.importorskip("gunicorn.app.base")
+    settings = {}
+
+    def run(self):
+        settings.update({name: self.cfg.settings[name].get() for name in self.cfg.settings})
+        settings["app"] = self.load()
+    monkeypatch.setattr(base.BaseApplication, "run", run)
+
+    serving.serve(api_server.app, "127.0.0.1", 5999)
+    assert settings["bind"] == ["127.0.0.1:5999"]
+    assert settings["worker_class"] == "gthread"
+    assert (settings["workers"], settings["threads"]) == (serving.API_WORKERS, serving.API_THREADS)
+    assert settings["graceful_timeout"] == serving.API_GRACEFUL_TIMEOUT_S
+    assert settings["post_worker_init"] is serving._post_worker_init
+    assert settings["app"] is api_server.app
+
+def test_waitress_without_gunicorn(monkeypatch, shutting_down):
+    monkeypatch.setitem(sys.modules, "gunicorn.app.base", None)
+    calls = []
+    waitress = types.ModuleType("waitress")
+    waitress.serve = lambda app, **kwargs: calls.append((app, kwargs))
+    monkeypatch.setitem(sys.modules, "waitress", waitress)
+
+    serving.serve(api_server.app, "127.0.0.1", 5999)
+    assert calls == [(api_server.app, {"host": "127.0.0.1", "port": 5999, "threads": serving.API_THREADS})]
+    # waitress returns once it has shut down, so open event streams end too
+    assert shutting_down.is_set()
+
+    monkeypatch.setitem(sys.modules, "waitress", None)
+    with pytest.raises(SystemExit):
+        serving.serve(api_server.app, "127.0.0.1", 5999)
+
+def test_sigterm_sets_shutting_down_then_runs_the_previous_handler(shutting_down):
+    received = []
+    previous = signal.signal(signal.SIGTERM, lambda signum, frame: received.append(signum))
+    try:
+        serving._post_worker_init(None)
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    assert shutting_down.is_set()
+    assert received == [signal.SIGTERM]
+
+def test_event_streams_end_on_shutdown(api, monkeypatch, shutting_down):
+    monkeypatch.setattr(api_server, "SSE_KEEPALIVE_S", 0.1)
+    response = api.get("/api/queue/events", buffered=False)
+    chunks = (chunk.decode("utf-8") for chunk in response.response)
+    assert next(chunks).startswith("data: ")
+    shutting_down.set()
+    # At most one keepalive more, then the stream ends and frees its thread
+    assert [chunk for chunk in chunks if not chunk.startswith(": keepalive")] == []
+    response.close()
+
+def test_deleted_runs_are_removed_after_the_response(api, monkeypatch):
+    deferred = []
+    monkeypatch.setattr(api_server, "background", types.SimpleNamespace(submit=lambda *args, **kwargs: deferred.append((args, kwargs))))
+    (api.results_dir / "run1").mkdir()
+    (api.results_dir / "run1" / "clip.wav").write_bytes(b"x")
+
+    assert api.post("/api/files/delete", json={"file_ids": ["run1"]}).get_json()["deleted"] == ["run1"]
+    assert not (api.results_dir / "run1").exists()
+    # Only renamed into the trash during the request
+    (func, trash_dir), kwargs = deferred[0]
+    assert trash_dir.startswith(api_server.TRASH_DIR)
+    assert (api.results_dir / ".cache" / "trash" / os.path.basename(trash_dir) / "clip.wav").exists()
+    func(trash_dir, **kwargs)
+    assert list((api.results_dir / ".cache" / "trash").iterdir()) == []
+    assert api.get("/api/health").get_json() == {"status": "ok"}
@@ -0,0 +1,98 @@
+import io
+import json
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audio_processing.clips import SourceWindow, write_clips
+
+SR = 8000
+
+@pytest.fixture
+def source(tmp_path):
+    """Three seconds of 16-bit stereo noise; returns its path and samples as int16."""
+    rng = np.random.default_rng(0)
+    data = (rng.uniform(-0.5, 0.5, (3 * SR, 2)) * 32767).astype(np.int16)
+    path = tmp_path / "source.wav"
+    sf.write(path, data, SR, subtype='PCM_16')
+    return str(path), data
+
+@pytest.fixture
+def run(api, source):
+    """A run whose report points at the source, with one detection from 1.0 to 1.5 s."""
+    run_dir = api.results_dir / "run1"
+    run_dir.mkdir()
+    report = {"file": "source.wav", "source": source[0], "clip_pad": 0.1, "overall_results": [],
+              "in_file_detections": [{"type": "Cutout", "id": 0, "start": 1.0, "end": 1.5, "params": {}}]}
+    (run_dir / "source_report.json").write_text(json.dumps(report))
+    return run_dir
+
+def decode(body):
+    data, sr = sf.read(io.BytesIO(body), dtype='int16', always_2d=True)
+    return data, sr
+
+def test_window_reads_only_the_asked_bytes(source):
+    path, data = source
+    window = SourceWindow(path, 0.5, 1.25)
+    whole = window.read()
+    assert len(whole) == window.size
+    frames, sr = decode(whole)
+    assert sr == SR
+    np.testing.assert_array_equal(frames, data[int(0.5 * SR):int(1.25 * SR)])
+
+    # Any byte range, including ones splitting the header or a frame, matches the whole file
+    for start, end in [(0, 10), (40, 50), (44, 47), (1001, 2999), (window.size - 3, window.size)]:
+        window.seek(start)
+        assert window.read(end - start) == whole[start:end]
+    window.seek(-5, io.SEEK_END)
+    assert window.read() == whole[-5:]
+    window.close()
+
+def test_window_clamps_to_the_source(source):
+    path, data = source
+    with SourceWindow(path, 2.5, 10.0) as window:
+        np.testing.assert_array_equal(decode(window.read())[0], data[int(2.5 * SR):])
+
+def test_source_audio_answers_ranges(api, run, source):
+    whole = api.get("/api/files/run1/audio?start=0.5&end=1.25")
+    assert whole.status_code == 200
+    assert whole.headers["Accept-Ranges"] == "bytes"
+    np.testing.assert_array_equal(decode(whole.data)[0], source[1][int(0.5 * SR):int(1.25 * SR)])
+
+    part = api.get("/api/files/run1/audio?start=0.5&end=1.25", headers={"Range": "bytes=100-1099"})
+    assert part.status_code == 206
+    assert part.headers["Content-Range"] == f"bytes 100-1099/{len(whole.data)}"
+    assert part.data == whole.data[100:1100]
+
+    etag = whole.headers["ETag"]
+    assert api.get("/api/files/run1/audio?start=0.5&end=1.25", headers={"If-None-Match": etag}).status_code == 304
+    assert api.get("/api/files/run1/audio?start=0.5&end=0.25").status_code == 400
+    assert api.get("/api/files/missing/audio").status_code == 404
+
+def test_clip_is_cut_from_the_source(api, run, source):
+    response = api.get("/api/files/run1/clips/cutout-0.wav")
+    assert response.status_code == 200
+    # The detection plus the run's clip_pad on each side
+    frames, sr = decode(response.data)
+    expected = source[1][int(0.9 * SR):int(1.6 * SR)].mean(axis=1)
+    np.testing.assert_allclose(frames[:, 0], expected, atol=1)
+
+    padded = api.get("/api/files/run1/clips/cutout-0.wav?pad=0.5")
+    assert len(decode(padded.data)[0]) == int(2.0 * SR) - int(0.5 * SR)
+    part = api.get("/api/files/run1/clips/cutout-0.wav", headers={"Range": "bytes=0-43"})
+    assert (part.status_code, part.data) == (206, response.data[:44])
+    assert api.get("/api/files/run1/clips/cutout-0.wav", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+    assert api.get("/api/files/run1/clips/cutout-0.wav?pad=99").status_code == 400
+    assert api.get("/api/files/run1/clips/clipping-7.wav").status_code == 404
+
+def test_prerendered_clip_is_served_from_the_container(api, run, source):
+    data = source[1].mean(axis=1) / 32768
+    write_clips(data, SR, {"cutout-0.wav": (SR, 2 * SR)}, str(run / "clips"))
+    response = api.get("/api/files/run1/clips/cutout-0.wav")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["Cache-Control"]
+    assert len(decode(response.data)[0]) == SR
+    part = api.get("/api/files/run1/clips/cutout-0.wav", headers={"Range": "bytes=44-143"})
+    assert (part.status_code, part.data) == (206, response.data[44:144])
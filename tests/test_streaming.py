@@ -0,0 +1,142 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from audio_processing.audio_import import AudioLoader
+from audio_processing.distortion_detection import detect_cutout, StreamingCutout, _detect_clipping_blocks
+from audio_processing.loudness import get_loudness_spikes, get_lufs, StreamingLoudnessSpikes, StreamingLufs
+from audio_processing.squim_detector import detect_low_mos_regions, StreamingLowMOS
+
+SR = 16000
+# Whole seconds, half a second, an odd size and one that divides no window or hop
+BLOCK_LENS = [SR, SR // 2, 4099, 7 * SR + 3]
+
+@pytest.fixture(scope="module")
+def audio():
+    """Tones and noise with a varying level, a loud burst and two stretches of silence."""
+    rng = np.random.default_rng(0)
+    t = np.arange(20 * SR) / SR
+    envelope = 0.05 + 0.3 * (0.5 + 0.5 * np.sin(2 * np.pi * t / 6.0)) ** 2
+    audio = envelope * (np.sin(2 * np.pi * 440 * t) + 0.5 * rng.normal(0, 0.3, len(t)))
+    audio[int(3.2 * SR):int(4.7 * SR)] = 0.0
+    audio[int(14.1 * SR):int(14.35 * SR)] = 0.0
+    audio[int(9 * SR):int(10.5 * SR)] *= 6.0
+    return audio.astype(np.float32)
+
+def streamed(detector, audio, block_len):
+    for offset in range(0, len(audio), block_len):
+        detector.push(audio[offset:offset + block_len])
+    return detector.finish()
+
+def assert_same_rows(actual, expected, atol):
+    assert len(actual) == len(expected)
+    if expected:
+        np.testing.assert_allclose(np.array(actual, dtype=np.float64), np.array(expected, dtype=np.float64), atol=atol)
+
+@pytest.mark.parametrize("block_len", BLOCK_LENS)
+def test_streaming_cutout_matches_whole_signal(audio, block_len):
+    whole = detect_cutout(audio, SR)
+    assert len(whole) == 2
+    assert_same_rows(streamed(StreamingCutout(SR), audio, block_len), whole, 1e-9)
+
+@pytest.mark.parametrize("block_len", BLOCK_LENS)
+def test_streaming_loudness_spikes_match_whole_signal(audio, block_len):
+    whole = get_loudness_spikes(audio, SR, threshold=-20.0)
+    assert whole
+    assert_same_rows(streamed(StreamingLoudnessSpikes(SR, threshold=-20.0), audio, block_len), whole, 1e-6)
+
+@pytest.mark.parametrize("block_len", BLOCK_LENS)
+def test_streaming_lufs_matches_whole_signal(audio, block_len):
+    assert streamed(StreamingLufs(SR), audio, block_len) == pytest.approx(get_lufs(audio, SR), abs=1e-6)
+
+@pytest.mark.parametrize("block_len", BLOCK_LENS)
+def test_streaming_low_mos_matches_whole_signal(audio, block_len):
+    whole = detect_low_mos_regions(audio, SR, mos_threshold=5.0)
+    assert whole
+    assert_same_rows(streamed(StreamingLowMOS(SR, mos_threshold=5.0), audio, block_len), whole, 1e-5)
+
+def test_streaming_detectors_handle_signal_shorter_than_a_window():
+    short = np.random.default_rng(1).uniform(-0.5, 0.5, SR // 4).astype(np.float32)
+    assert streamed(StreamingCutout(SR), short, 1000) == detect_cutout(short, SR)
+    assert streamed(StreamingLoudnessSpikes(SR), short, 1000) == get_loudness_spikes(short, SR)
+
+def clipped(seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(6 * SR) / SR
+    audio = 0.9 * np.sin(2 * np.pi * 220 * t) * np.sin(2 * np.pi * 0.7 * t) + 0.05 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+@pytest.mark.parametrize("shape", ["rails", "negative rail", "shelf below peak", "clean"])
+@pytest.mark.parametrize("block_len", [1, 7, 1000, 7 * SR + 3])
+def test_blockwise_clipping_matches_clipdetect(shape, block_len):
+    clipdetect = pytest.importorskip("clipdetect")
+    audio = clipped(0)
+    if shape == "rails":
+        audio = np.clip(audio, -0.6, 0.6)
+    elif shape == "negative rail":
+        audio = np.maximum(audio, -0.4)
+    elif shape == "shelf below peak":
+        audio[1000:5000] = 0.8
+    if block_len == 1:
+        # Python-level per block, so keep it to the first loud stretch
+        audio = audio[4000:8000]
+    sections, _ = clipdetect.detect_clipping(audio)
+    expected = [(s["start"], s["end"]) for s in sections]
+    assert (len(expected) > 0) == (shape != "clean")
+    assert _detect_clipping_blocks(audio, block_len) == expected
+
+def write_wav(path, seconds, sr, channels=1):
+    rng = np.random.default_rng(2)
+    data = rng.uniform(-0.5, 0.5, (int(seconds * sr), channels)).astype(np.float32)
+    sf.write(path, data, sr, subtype='FLOAT')
+    return data.mean(axis=1)
+
+@pytest.mark.parametrize("channels", [1, 2])
+def test_stream_audio_file_blocks_overlap_and_cover_the_signal(tmp_path, channels):
+    expected = write_wav(tmp_path / "tone.wav", 5.3, SR, channels)
+    loader = AudioLoader(directory=str(tmp_path), sr=None)
+
+    blocks = list(loader.stream_audio_file("tone.wav", block_s=1.0, overlap_s=0.25))
+    overlap = int(0.25 * SR)
+    assert [b["offset"] for b in blocks] == [0] + [i * SR - overlap for i in range(1, 6)]
+    assert all(b["samplerate"] == SR for b in blocks)
+    assert all(b["channels"] == ("mono" if channels == 1 else "stereo") for b in blocks)
+    for previous, block in zip(blocks, blocks[1:]):
+        # Each block starts with the last overlap_s of the one before
+        np.testing.assert_array_equal(block["data"][:overlap], previous["data"][-overlap:])
+    for block in blocks:
+        np.testing.assert_allclose(block["data"], expected[block["offset"]:block["offset"] + len(block["data"])], atol=1e-7)
+
+    parts = [blocks[0]["data"]] + [b["data"][overlap:] for b in blocks[1:]]
+    np.testing.assert_allclose(np.concatenate(parts), expected, atol=1e-7)
+
+def test_stream_audio_file_resampled_matches_whole_load(tmp_path):
+    write_wav(tmp_path / "tone.wav", 4.0, 22050)
+    loader = AudioLoader(directory=str(tmp_path), sr=SR)
+
+    blocks = list(loader.stream_audio_file("tone.wav", block_s=0.7))
+    whole = loader.load_audio_file("tone.wav")['data']
+    assert [b["offset"] for b in blocks] == list(range(0, len(whole), int(0.7 * SR)))
+    streamed_data = np.concatenate([b["data"] for b in blocks])
+    assert len(streamed_data) == len(whole)
+    # Same soxr quality, but a stream resampler rather than one whole-signal call
+    np.testing.assert_allclose(streamed_data, whole, atol=1e-3)
+
+def test_long_files_are_streamed_or_sharded(monkeypatch):
+    from job_queue import worker
+    monkeypatch.setattr(worker, "FUSED_MAX_DURATION_S", 300.0)
+    monkeypatch.setattr(worker, "STREAM_MIN_DURATION_S", 1800.0)
+    monkeypatch.setattr(worker, "SHARD_MIN_DURATION_S", 3600.0)
+    monkeypatch.setattr(worker, "PARALLEL_WORKERS", 1)
+    choose = worker.AudioDetectionJob.choose_mode
+    assert [choose(d) for d in (None, 60, 900, 1800, 3599, 3600, 3 * 3600)] == \
+        ["fanout", "fused", "fanout", "stream", "stream", "sharded", "sharded"]
+
+    # A shard threshold below the stream one still never shards a file that is not streamed
+    monkeypatch.setattr(worker, "SHARD_MIN_DURATION_S", 600.0)
+    assert [choose(d) for d in (900, 1800)] == ["fanout", "sharded"]
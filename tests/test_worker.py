@@ -0,0 +1,117 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from audio_processing.audio_import import AudioLoader
+
+SR = 8000
+
+class ListQueue:
+    """Stands in for an RQ queue; keeps the enqueued calls for the test to run."""
+    def __init__(self):
+        self.calls = []
+
+    def enqueue(self, func, *args):
+        self.calls.append((func, args))
+
+@pytest.fixture
+def worker(fake_redis, tmp_path, monkeypatch):
+    from job_queue import worker
+    monkeypatch.setattr(worker, "OUTPUT_DIR", str(tmp_path / "out"))
+    monkeypatch.setattr(worker, "AUDIO_STORE_DIR", str(tmp_path / "audio"))
+    monkeypatch.setattr(worker, "RESULT_CACHE_DIR", str(tmp_path / "results"))
+    monkeypatch.setattr(worker, "SHARD_S", 2.0)
+    return worker
+
+@pytest.fixture
+def audio():
+    rng = np.random.default_rng(0)
+    data = rng.uniform(-0.5, 0.5, 10 * SR).astype(np.float32)
+    # Silence across the 4 s seam
+    data[int(3.5 * SR):int(4.6 * SR)] = 0
+    return {"data": data, "samplerate": SR, "channels": "mono", "duration_sec": 10.0}
+
+def new_job(worker, audio, tmp_path):
+    job = worker.AudioDetectionJob(AudioLoader(directory=str(tmp_path), sr=None), "x.wav", "redis://test")
+    job.audio_ref = worker.get_audio_store().put(audio)
+    return job
+
+def as_text(detections):
+    return [str(d) for d in detections]
+
+def run_sharded(job, det_type, params):
+    jobs = ListQueue()
+    job.queue_shards(jobs, det_type, params)
+    assert len(jobs.calls) > 1
+    for func, args in jobs.calls:
+        func(*args)
+
+def test_merged_shards_are_cached_apart_from_whole_file_results(worker, audio, tmp_path):
+    job = new_job(worker, audio, tmp_path)
+    run_sharded(job, "Cutout", {})
+
+    sharded = job.cached_detections("Cutout", {}, impl="shard")
+    assert [(d.start, d.end) for d in sharded] == [(3.5, 4.6)]
+    assert job.cached_detections("Cutout", {}) is None
+
+    # A whole-file run computes its own result instead of taking the merged shards
+    later = new_job(worker, audio, tmp_path)
+    whole = later.detect("Cutout", {})
+    assert as_text(job.cached_detections("Cutout", {})) == as_text(whole)
+    assert as_text(later.cached_detections("Cutout", {}, impl="shard")) == as_text(sharded)
+
+def test_whole_file_results_stand_in_for_a_variant(worker, audio, tmp_path):
+    job = new_job(worker, audio, tmp_path)
+    whole = job.detect("Loudness", {})
+    assert as_text(job.cached_detections("Loudness", {}, impl="shard")) == as_text(whole)
+    assert as_text(job.cached_detections("Loudness", {}, impl="parallel")) == as_text(whole)
+
+def test_slice_impl():
+    from job_queue.worker import AudioDetectionJob
+    assert AudioDetectionJob.slice_impl("Cutout", "sharded") == "shard"
+    assert AudioDetectionJob.slice_impl("Cutout", "parallel") == "parallel"
+    assert AudioDetectionJob.slice_impl("Cutout", "fused") is None
+    # Analyses without a shard function always run whole
+    assert AudioDetectionJob.slice_impl("Clipping", "sharded") is None
+
+def refuse(*args, **kwargs):
+    raise AssertionError("the whole file was loaded or resampled at once")
+
+def test_read_samples_resamples_only_the_range(worker, audio, tmp_path):
+    job = new_job(worker, audio, tmp_path)
+    whole = job.loader.resample_stream(SR, 16000).resample_chunk(audio['data'], last=True)
+    assert job.num_samples(16000) == len(whole)
+    for start, end in [(0, 5000), (30001, 64003), (len(whole) - 777, len(whole))]:
+        np.testing.assert_allclose(job.read_samples(16000, start, end), whole[start:end], atol=1e-5)
+
+def test_shards_at_another_rate_resample_their_own_slices(worker, audio, tmp_path, monkeypatch):
+    job = new_job(worker, audio, tmp_path)
+    monkeypatch.setattr(job.loader, "resample", refuse)
+    run_sharded(job, "Speech Quality", {"mos_threshold": 5.0})
+    assert job.cached_detections("Speech Quality", {"mos_threshold": 5.0}, impl="shard")
+    # Only the native audio is in the store
+    assert len(list((tmp_path / "audio").glob("*.npy"))) == 1
+
+def test_evicted_audio_is_decoded_again_block_by_block(worker, audio, tmp_path, monkeypatch):
+    sf = pytest.importorskip("soundfile")
+    sf.write(tmp_path / "x.wav", audio['data'], SR, subtype='FLOAT')
+    job = new_job(worker, audio, tmp_path)
+    job.audio_ref = dict(job.audio_ref, key="evicted")
+    monkeypatch.setattr(job.loader, "load_audio_file", refuse)
+    np.testing.assert_array_equal(job.get_audio()['data'], audio['data'])
+
+def test_clip_cap_applies_only_to_prerendered_clips(worker, monkeypatch, tmp_path):
+    from audio_processing.utils import Detection
+    job = worker.AudioDetectionJob(AudioLoader(directory=str(tmp_path), sr=None), "x.wav", "redis://test")
+    detections = [Detection(id=i, type="Cutout", params={}, start=float(i), end=i + 0.5, in_file=True) for i in range(5)]
+    monkeypatch.setattr(worker, "CLIP_MAX_PER_TYPE", 2)
+
+    monkeypatch.setattr(worker, "PRERENDER_CLIPS", False)
+    assert len(job.clip_names(detections)) == 5
+
+    monkeypatch.setattr(worker, "PRERENDER_CLIPS", True)
+    assert sorted(job.clip_names(detections).values()) == ["cutout-0.wav", "cutout-1.wav"]